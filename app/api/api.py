@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from app.api.profiles.routes import router as profiles_routes
 from app.api.auth.routes import router as auth_routes
 from app.api.users.routes import router as users_routes
@@ -7,8 +7,12 @@ from app.api.history.routes import router as history_routes
 from app.api.second_missions.routes import router as secondary_routes
 from app.api.assignments.routes import router as assignments_routes
 from app.api.group.routes import router as group_routes
+from app.api.internal.routes import router as internal_routes
+from app.core.config import settings
+from app.database.monitoring import track_route
 
-api_router = APIRouter()
+# Every query issued while handling a request is attributed to its route
+api_router = APIRouter(dependencies=[Depends(track_route)])
 
 # Public routes (no authentication required)
 api_router.include_router(profiles_routes, prefix="/profiles", tags=["Profiles"])
@@ -19,3 +23,6 @@ api_router.include_router(history_routes, prefix="/history", tags=["History"])
 api_router.include_router(secondary_routes, prefix="/secondary", tags=["Secondary Missions"])
 api_router.include_router(assignments_routes, prefix="/assignments", tags=["Assignments"])
 api_router.include_router(group_routes, prefix="/groups", tags=["Group"])
+# Server internals (pool, query and cache statistics), for admins and only where enabled
+if settings.INTERNAL_ENDPOINTS_ENABLED:
+    api_router.include_router(internal_routes, prefix="/internal", tags=["Internal"])
@@ -0,0 +1,7 @@
+from app.database.indexes import IndexSpec
+
+INDEXES = [
+    IndexSpec(collection="assignments", keys=[("person_id", 1)], name="assignments_person_id_unique", unique=True),
+    # Only assignments with a pending finalization carry the field
+    IndexSpec(collection="assignments", keys=[("outbox_retry_at", 1)], name="assignments_outbox_retry_at", sparse=True),
+]
@@ -0,0 +1,204 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.api.history.repository import HistoryRepository
+from app.api.history.schemas import Event
+from app.api.missions.catalog import get_catalog
+from app.api.profiles.repository import PROFILE_REWARD_FIELDS, ProfileRepository, week_key
+from app.api.second_missions.repository import SecondaryMissionRepository
+from app.core.config import settings
+from app.database.codec import codec_for
+from .repository import AssignmentRepository
+from .schemas import FinalizationEntry, MissionStatus, MissionType
+
+import logging
+logger = logging.getLogger(__name__)
+
+entry_codec = codec_for(FinalizationEntry)
+event_codec = codec_for(Event)
+
+# Backoff between attempts never grows past this
+MAX_RETRY_DELAY = timedelta(minutes=5)
+
+class FinalizationOutbox:
+    """
+    Applies the effects of closed votings: the history event and the aura reward.
+    - The vote that closes a voting pushes a FinalizationEntry to the assignment's `outbox` in the same write,
+      so a closed mission always has its finalization recorded.
+    - The worker drains the outboxes in batches: one bulk insert for the events and one bulk update for the rewards.
+    - Both writes are idempotent (the event `_id` is the entry id, profiles remember the reward ids they applied),
+      so an entry interrupted halfway is simply applied again. Entries are removed once both writes succeeded.
+    - Failed assignments are retried with exponential backoff, up to FINALIZATION_OUTBOX_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, batch_size: int, poll_seconds: float, max_attempts: int, retry_seconds: float):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self._lock = asyncio.Lock()
+        self._pending = False
+        self._drain_task: Optional[asyncio.Task] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.finalized = 0
+        self.failed = 0
+        self.abandoned = 0
+
+    def notify(self, db):
+        "Drain soon; called after a voting was closed"
+        self._pending = True
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain_logged(db))
+
+    def start(self, db):
+        "Poll for due retries and entries left by a previous process"
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.create_task(self._poll(db))
+
+    async def stop(self):
+        for task in (self._poll_task, self._drain_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._poll_task = self._drain_task = None
+
+    async def _poll(self, db):
+        while True:
+            await self._drain_logged(db)
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _drain_logged(self, db):
+        try:
+            await self.drain(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Error draining the finalization outbox")
+
+    async def drain(self, db) -> int:
+        "Process batches until no entry is due; returns the number of entries finalized"
+        finalized = 0
+        async with self._lock:
+            self._pending = True
+            while self._pending:
+                self._pending = False
+                while True:
+                    done, processed = await self.process_batch(db)
+                    finalized += done
+                    if processed < self.batch_size:
+                        break
+        return finalized
+
+    def _retry_at(self, now: datetime, attempts: int) -> datetime:
+        return now + min(timedelta(seconds=self.retry_seconds * 2 ** attempts), MAX_RETRY_DELAY)
+
+    async def process_batch(self, db) -> tuple[int, int]:
+        "Finalize the entries of one batch of assignments; returns (entries finalized, assignments read)"
+        now = datetime.now(timezone.utc)
+        assignments = AssignmentRepository(db)
+        documents = await assignments.get_pending_outbox(now, self.max_attempts, self.batch_size)
+        if not documents:
+            return 0, 0
+        self.batches += 1
+
+        entries = [
+            (document["person_id"], entry_codec.load(entry))
+            for document in documents for entry in document.get("outbox") or []
+        ]
+        failed = set()
+
+        # Rewards: primary missions come from the catalog, the others in one query
+        snapshot = await get_catalog(db)
+        other_ids = list({entry.mission_id for _, entry in entries if entry.tipo != MissionType.MAIN})
+        other_rewards = await SecondaryMissionRepository(db).get_rewards(other_ids) if other_ids else {}
+        rewards = {}
+        for person_id, entry in entries:
+            reward = snapshot.get_reward(entry.mission_id) if entry.tipo == MissionType.MAIN else other_rewards.get(entry.mission_id)
+            if reward is None:
+                logger.error(f"Mission details not found for mission_id: {entry.mission_id}")
+                failed.add(entry.id)
+                continue
+            rewards[entry.id] = -int(reward) if entry.status == MissionStatus.FAILED else int(reward)
+
+        # History events, keyed by entry id
+        events = []
+        for person_id, entry in entries:
+            event = event_codec.encode(Event(
+                user_id=person_id,
+                mission_id=entry.mission_id,
+                name=entry.name,
+                tipo=entry.tipo,
+                result=entry.result,
+                status=entry.status,
+                created=entry.created,
+                logro_name=entry.logro_name
+            ))
+            events.append({"_id": entry.id, **event})
+        failed |= await HistoryRepository(db).insert_events(events)
+
+        # Rewards, one update per profile for all of its entries
+        by_user = defaultdict(list)
+        for person_id, entry in entries:
+            if entry.id in rewards:
+                by_user[person_id].append(entry)
+        profiles = ProfileRepository(db)
+        read = {
+            profile["user_id"]: profile
+            for profile in await profiles.get_by_user_ids(list(by_user), PROFILE_REWARD_FIELDS)
+        }
+        updates = []
+        for person_id, user_entries in by_user.items():
+            profile = read.get(person_id)
+            if profile is None:
+                logger.error(f"Profile not found for user_id: {person_id}")
+                failed.update(entry.id for entry in user_entries)
+                continue
+            applied = set(profile.get("last_reward_ids") or [])
+            pending = [entry for entry in user_entries if entry.id not in applied]
+            if pending:
+                updates.append((profile, [entry.id for entry in pending], sum(rewards[entry.id] for entry in pending)))
+        await profiles.apply_rewards(updates, week_key(now))
+        if updates:
+            # An update that did not apply (the aura read changed meanwhile, or a write error) is retried
+            written = await profiles.get_by_user_ids([profile["user_id"] for profile, _, _ in updates], PROFILE_REWARD_FIELDS)
+            recorded = {reward_id for profile in written for reward_id in profile.get("last_reward_ids") or []}
+            for _, reward_ids, _ in updates:
+                failed.update(reward_id for reward_id in reward_ids if reward_id not in recorded)
+
+        done = defaultdict(list)
+        retry_at = {}
+        for document in documents:
+            person_id = document["person_id"]
+            for entry in document.get("outbox") or []:
+                if entry["id"] in failed:
+                    attempts = document.get("outbox_attempts") or 0
+                    retry_at[person_id] = self._retry_at(now, attempts)
+                    if attempts + 1 >= self.max_attempts:
+                        self.abandoned += 1
+                        logger.error(f"Giving up on finalization {entry['id']} for user {person_id} after {attempts + 1} attempts")
+                else:
+                    done[person_id].append(entry["id"])
+        await assignments.settle_outbox(done, retry_at)
+
+        finalized = sum(len(entry_ids) for entry_ids in done.values())
+        self.finalized += finalized
+        self.failed += len(failed)
+        return finalized, len(documents)
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self._poll_task is not None and not self._poll_task.done(),
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "finalized": self.finalized,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+        }
+
+finalization_outbox = FinalizationOutbox(
+    settings.FINALIZATION_OUTBOX_BATCH_SIZE,
+    settings.FINALIZATION_OUTBOX_POLL_SECONDS,
+    settings.FINALIZATION_OUTBOX_MAX_ATTEMPTS,
+    settings.FINALIZATION_OUTBOX_RETRY_SECONDS
+)
@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import Optional
+from pymongo import ReturnDocument, UpdateOne
+from app.database.repository import Repository
+from .schemas import MissionStatus
+
+# The outbox is internal to the finalization worker
+ASSIGNMENT_FIELDS = {"_id": 0, "outbox": 0, "outbox_retry_at": 0, "outbox_attempts": 0}
+OUTBOX_FIELDS = {"person_id": 1, "outbox": 1, "outbox_attempts": 1, "_id": 0}
+# Slots whose missions live in the secondary collection, and where the lookup puts their details
+LOOKUP_SLOTS = {"secondary_mission": "secondary_mission_details", "group_mission": "group_mission_details"}
+# Votes are only counted while the mission is open; a closed voting is never counted or finalized again
+VOTING_STATUSES = [MissionStatus.ACTIVE.value, MissionStatus.PENDING_REVIEW.value]
+
+class AssignmentRepository(Repository):
+    collection_name = "assignments"
+
+    async def get_by_person_id(self, person_id: str, projection: dict = ASSIGNMENT_FIELDS) -> Optional[dict]:
+        return await self.find_one({"person_id": person_id}, projection)
+
+    async def get_mission_id(self, person_id: str, mission_field: str) -> Optional[dict]:
+        "Only the id of one mission slot, e.g. {'mission': {'mission_id': '3'}}"
+        return await self.find_one({"person_id": person_id}, {f"{mission_field}.mission_id": 1, "_id": 0})
+
+    def _with_missions(self, match: dict, slot_projection: dict) -> list[dict]:
+        "Pipeline: matching assignments, projected, with the secondary documents of the LOOKUP_SLOTS"
+        return [
+            {"$match": match},
+            {"$project": {"_id": 0, **slot_projection}},
+            *(
+                {"$lookup": {"from": "secondary", "localField": f"{slot}.mission_id", "foreignField": "id", "as": details}}
+                for slot, details in LOOKUP_SLOTS.items()
+            ),
+            {"$project": {f"{details}._id": 0 for details in LOOKUP_SLOTS.values()}},
+        ]
+
+    async def get_with_missions(self, person_id: str) -> Optional[dict]:
+        """
+        The mission ids of every slot, plus the secondary collection documents of the secondary
+        and group slots under LOOKUP_SLOTS, in one aggregation.
+        """
+        slot_ids = {f"{slot}.mission_id": 1 for slot in ("mission", *LOOKUP_SLOTS)}
+        documents = await self.aggregate(self._with_missions({"person_id": person_id}, slot_ids), limit=1)
+        return documents[0] if documents else None
+
+    async def get_many_with_missions(self, person_ids: list[str]) -> list[dict]:
+        "Several assignments with their full slots, plus the looked-up secondary documents, in one aggregation"
+        slots = {"person_id": 1, "mission": 1, **{slot: 1 for slot in LOOKUP_SLOTS}}
+        return await self.aggregate(self._with_missions({"person_id": {"$in": person_ids}}, slots), limit=len(person_ids))
+
+    async def add_vote(
+        self,
+        person_id: str,
+        mission_field: str,
+        voter_id: str,
+        like: bool,
+        max_voters: int,
+    ) -> Optional[dict]:
+        "Count a vote unless the voter already voted or the mission has `max_voters` voters; None if it did not apply"
+        return await self.collection.find_one_and_update(
+            {
+                "person_id": person_id,
+                mission_field: {"$ne": None},
+                f"{mission_field}.status": {"$in": VOTING_STATUSES},
+                f"{mission_field}.voters": {"$ne": voter_id},
+                f"{mission_field}.voters.{max_voters - 1}": {"$exists": False},
+            },
+            {
+                "$addToSet": {f"{mission_field}.voters": voter_id},
+                "$inc": {f"{mission_field}.{'like' if like else 'dislike'}": 1},
+            },
+            projection=ASSIGNMENT_FIELDS,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def close_voting(
+        self,
+        person_id: str,
+        mission_field: str,
+        mission_id: str,
+        voters: list[str],
+        voter_id: str,
+        like: bool,
+        status: str,
+        entry: dict,
+        now: datetime,
+    ) -> Optional[dict]:
+        """
+        Count the last vote, set the final status and queue the finalization entry in one write.
+        Applies only if the voting is still open with the voters that were read; None otherwise.
+        """
+        return await self.collection.find_one_and_update(
+            {
+                "person_id": person_id,
+                f"{mission_field}.mission_id": mission_id,
+                f"{mission_field}.status": {"$in": VOTING_STATUSES},
+                f"{mission_field}.voters": voters,
+            },
+            {
+                "$addToSet": {f"{mission_field}.voters": voter_id},
+                "$inc": {f"{mission_field}.{'like' if like else 'dislike'}": 1},
+                "$set": {f"{mission_field}.status": status, "outbox_retry_at": now, "outbox_attempts": 0},
+                "$push": {"outbox": entry},
+            },
+            projection=ASSIGNMENT_FIELDS,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def get_pending_outbox(self, now: datetime, max_attempts: int, limit: int) -> list[dict]:
+        return await self.find_many(
+            {"outbox_retry_at": {"$lte": now}, "outbox_attempts": {"$not": {"$gte": max_attempts}}},
+            OUTBOX_FIELDS,
+            limit=limit
+        )
+
+    async def settle_outbox(self, done: dict[str, list[str]], retry_at: dict[str, datetime]):
+        "Remove the finalized entries and push back the assignments whose entries failed"
+        requests = [
+            UpdateOne({"person_id": person_id}, {"$pull": {"outbox": {"id": {"$in": entry_ids}}}})
+            for person_id, entry_ids in done.items()
+        ]
+        requests += [
+            UpdateOne({"person_id": person_id}, {"$set": {"outbox_retry_at": at}, "$inc": {"outbox_attempts": 1}})
+            for person_id, at in retry_at.items()
+        ]
+        # An entry pushed meanwhile keeps the outbox non-empty, so it is not dropped from the queue
+        requests += [
+            UpdateOne(
+                {"person_id": person_id, "outbox": {"$size": 0}},
+                {"$unset": {"outbox": "", "outbox_retry_at": "", "outbox_attempts": ""}}
+            )
+            for person_id in done if person_id not in retry_at
+        ]
+        if requests:
+            await self.collection.bulk_write(requests, ordered=True)
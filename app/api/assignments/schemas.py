@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel
+import uuid
+from pydantic import BaseModel, Field
 from typing import Optional
 from ..missions.schemas import Extra, MissionLogro, Nivel
 from ..second_missions.schemas import SecondaryMission as SecondaryMissionResponse
@@ -33,6 +34,17 @@ class Assignments(BaseModel):
     secondary_mission: Optional[Mission] = None
     group_mission: Optional[Mission] = None
 
+class FinalizationEntry(BaseModel):
+    """A closed voting waiting in the assignment outbox for its history event and reward."""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tipo: MissionType
+    mission_id: str
+    name: str
+    result: str
+    status: MissionStatus
+    logro_name: Optional[str] = None
+    created: datetime = Field(default_factory=datetime.now)
+
 class MissionResponse(BaseModel):
     id: str
     nombre: str
@@ -67,7 +79,8 @@ class ParamsUpdate(BaseModel):
 class ParamsUpdateVote(BaseModel):
     mission_type: MissionType
     like: bool
-    group_size: int
+    # Ignored: the group size is read from the group of the user being voted
+    group_size: Optional[int] = None
 
 class MissionParamsUpdate(BaseModel):
     mission: Optional[ParamsUpdate] = None
@@ -1,18 +1,24 @@
 from fastapi import HTTPException,status
-from app.database.database import prepare_for_mongo
-from .schemas import AssignmentsMissionsResponse,Mission,MissionResponse,Assignments, MissionType, ParamsUpdate,MissionStatus, ParamsUpdateVote
+from app.database.codec import codec_for
+from app.database.operations import Precondition
+from app.api.missions.catalog import get_catalog
+from app.api.group.repository import GroupRepository
+from .repository import ASSIGNMENT_FIELDS, LOOKUP_SLOTS, VOTING_STATUSES, AssignmentRepository
+from .outbox import entry_codec, finalization_outbox
+from .schemas import AssignmentsMissionsResponse,FinalizationEntry,Mission,MissionResponse,Assignments, MissionType, ParamsUpdate,MissionStatus, ParamsUpdateVote
 from app.api.missions.schemas import Mission as PrimaryMission
-from datetime import datetime
-import json
-from ..history.schemas import Event
-from ..history.service import create_event
+from datetime import datetime, timezone
+from typing import Optional
 from ..second_missions.service import create_secondary_mission
+from ..users.service import get_cached_user
 
 import logging
 logger = logging.getLogger("assignments.service")
 
-with open('./init_missions.json', 'r', encoding='utf-8') as f:
-    missions = json.load(f)
+# A vote that races with another for the last place re-reads the mission this many times
+CLOSE_VOTING_ATTEMPTS = 3
+
+assignments_codec = codec_for(Assignments)
 
 
 async def get_assignments(person_id: str, db) -> Assignments:
@@ -20,14 +26,14 @@ async def get_assignments(person_id: str, db) -> Assignments:
     try:
         logger.info(f"Get assignments for user: {person_id}.")
 
-        assignments = await db.assignments.find_one({"person_id":person_id})
+        assignments = await AssignmentRepository(db).get_by_person_id(person_id)
         if not assignments:
             logger.error(f"No assignments were found for user: {person_id}."),
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"No assignments were found for user: {person_id}."
                 )
-        return Assignments(**assignments)
+        return assignments_codec.load(assignments)
     except HTTPException:
         raise
     except Exception as e:
@@ -46,9 +52,18 @@ async def create_assignments(
     try:
         logger.info(f"Creating assignments for user {person_id}.")
 
+        snapshot = await get_catalog(db)
+        first_mission = snapshot.get_mission(snapshot.first_mission_id) if snapshot.first_mission_id else None
+        if first_mission is None:
+            logger.error("First primary mission not found.")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="First primary mission not found."
+            )
+
         mission_data = Mission(
-            mission_id="1",
-            mission_name=missions[0]["nombre"],  # Access as a dictionary
+            mission_id=first_mission.id,
+            mission_name=first_mission.nombre,
             creation_date=datetime.now(),
             status = MissionStatus.ACTIVE
         )
@@ -61,8 +76,8 @@ async def create_assignments(
             group_mission=None
         )
         
-        assignment_doc = prepare_for_mongo(assignment.dict())
-        result = await db.assignments.insert_one(assignment_doc)
+        assignment_doc = assignments_codec.encode(assignment)
+        result = await AssignmentRepository(db).insert_one(assignment_doc)
         
         if not result.inserted_id:
             logger.error(f"Error inserting assignments for user:{person_id}")
@@ -92,47 +107,45 @@ async def update_assignments_missions(
     try:
         logger.info(f"Updating assignments mission for user: {user_id}.")
 
-        existing_assignment = await db.assignments.find_one({"person_id": user_id})
-        
-        if not existing_assignment:
-            logger.error(f"No assignment was found for the user: {user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No assignment was found for the user: {user_id}",
-            )
+        not_found_detail = f"No assignment was found for the user: {user_id}"
+        assignments = AssignmentRepository(db)
+        preconditions = []
 
-        update_fields = {}
+        # Checked first so an unknown user never costs a secondary mission generation
+        existing_assignment = await assignments.get_mission_id(user_id, type.value)
+        if existing_assignment is None:
+            logger.error(not_found_detail)
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
         
         if type==MissionType.SECONDARY:
             new_mission = await create_secondary_mission(user_id,db)
             logger.info(f"New secondary mission created successfully")
         elif type==MissionType.MAIN:
-            mission_id = existing_assignment[type]["mission_id"]
+            # The next mission depends on the current one
+            mission_id = existing_assignment[type.value]["mission_id"]
             new_mission = await get_next_primary_mission(mission_id,db)
-            
+            # Do not skip a mission if another request already advanced it
+            preconditions.append(Precondition(
+                {"mission.mission_id": mission_id},
+                status.HTTP_409_CONFLICT,
+                "The mission was already updated by another request"
+            ))
         
         mission_obj = Mission(
             mission_name=new_mission.nombre,
             mission_id=new_mission.id
         )   
         logger.info("New mission validated")
-        mission_doc = mission_obj.model_dump()
-        # temporarily convert datetime to ISO string
-        mission_doc["creation_date"] = mission_doc["creation_date"].isoformat()
-        update_fields[type] = mission_doc
         
-        result = await db.assignments.update_one(
+        updated_assignment = await assignments.update_and_return(
             {"person_id": user_id},
-            {"$set": update_fields}
+            {"$set": {type.value: mission_obj.model_dump()}},
+            ASSIGNMENT_FIELDS,
+            preconditions=preconditions,
+            not_found_detail=not_found_detail
         )
-    
-        if result.modified_count > 0:
-            updated_assignment = await db.assignments.find_one({"person_id": user_id})
-            logger.info("Mission successfully updated in the assignment.")
-        else:
-            updated_assignment = existing_assignment
-            logger.info("No changes were made to the assignment's missions.")
-        return Assignments(**updated_assignment)
+        logger.info("Mission successfully updated in the assignment.")
+        return assignments_codec.load(updated_assignment)
     
     except HTTPException:
         raise
@@ -142,55 +155,54 @@ async def update_assignments_missions(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail=f"Error updating the assignment missions: {str(e)}")
 
+def resolve_secondary_slot(assignment: dict, slot: str) -> Optional[MissionResponse]:
+    "The mission of a secondary or group slot, from the details looked up with the assignment"
+    mission_id = (assignment.get(slot) or {}).get("mission_id")
+    if not mission_id:
+        return None
+    details = assignment.get(LOOKUP_SLOTS[slot]) or []
+    if not details:
+        logger.error(f"Secondary mission with id {mission_id} not found.")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Secondary mission with id {mission_id} not found."
+        )
+    return MissionResponse(**details[0])
+
 async def get_assignments_missions(person_id: str, db) -> AssignmentsMissionsResponse:
+    """
+    The missions of every slot of an assignment.
+    - The assignment and its secondary and group missions are read in one aggregation.
+    - The primary mission comes from the in-memory catalog.
+    """
     try:
         logger.info(f"Getting assignments missions for user: {person_id}.")
-        assignments = await db.assignments.find_one({"person_id": person_id})
+        assignment = await AssignmentRepository(db).get_with_missions(person_id)
 
-        if not assignments:
+        if not assignment:
            logger.error(f"No assignment was found for the user: {person_id}")
            raise HTTPException(
                status_code=status.HTTP_404_NOT_FOUND, 
                detail=f"No assignment was found for the user: {person_id}."
                )
-        
-        assignments_obj = Assignments(**assignments)
-        
-        # Search for secondary_mission if it exists.
-        secondary_mission = None
-        if (assignments_obj.secondary_mission and 
-            assignments_obj.secondary_mission.mission_id):
-            
-            secondary_mission = await db.secondary.find_one({
-                "id": assignments_obj.secondary_mission.mission_id
-            })
-            if not secondary_mission:
-                logger.error(f"Secondary mission with id {assignments_obj.secondary_mission.mission_id} not found.")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Secondary mission with id {assignments_obj.secondary_mission.mission_id} not found."
-                )
-            secondary_mission=MissionResponse(**secondary_mission)
-        
+
         # Search for primary_mission if it exists.
         mission = None
-        if (assignments_obj.mission and 
-            assignments_obj.mission.mission_id):
-            
-            mission = await db.missions.find_one({
-                "id": assignments_obj.mission.mission_id
-            })
+        mission_id = (assignment.get("mission") or {}).get("mission_id")
+        if mission_id:
+            mission = (await get_catalog(db)).get_mission(mission_id)
             if not mission:
-                logger.error(f"Primary mission with id {assignments_obj.mission.mission_id} not found.")
+                logger.error(f"Primary mission with id {mission_id} not found.")
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Primary mission with id {assignments_obj.mission.mission_id} not found."
+                    detail=f"Primary mission with id {mission_id} not found."
                 )
-            mission=MissionResponse(**mission)
+            mission=MissionResponse(**mission.model_dump())
 
         response =  AssignmentsMissionsResponse(
             mission=mission,
-            secondary_mission=secondary_mission
+            secondary_mission=resolve_secondary_slot(assignment, "secondary_mission"),
+            group_mission=resolve_secondary_slot(assignment, "group_mission")
         )
 
         return response
@@ -216,28 +228,8 @@ async def update_missions_params(
     """
     try:
         logger.info(f"update mission parameters for user: {person_id}")
-        existing_assignment = await db.assignments.find_one({"person_id": person_id})
-        
-        if not existing_assignment:
-            logger.error(f"No assignment was found for the user: {person_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"No assignment was found for the user: {person_id}"
-                )
-
-        # Verify that the mission to be updated exists and is not null.
         mission_field = update_data.mission_type.value
-        current_mission = existing_assignment.get(mission_field)
-        
-        if current_mission is None:
-            logger.error(f"The {mission_field} cannot be updated because it does not exist.")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"The {mission_field} cannot be updated because it does not exist.",
-            )
 
-        # Prepare update operations
-        update_operations = {}
         provided_data = update_data.model_dump(exclude_unset=True, exclude_none=True)
 
         # Handle like and dislike fields as regular status and result fields
@@ -251,30 +243,31 @@ async def update_missions_params(
         if "dislike" in provided_data:
             set_updates[f"{mission_field}.dislike"] = provided_data["dislike"]
 
-        if set_updates:
-            update_operations["$set"] = set_updates
-
         # If there are no valid operations
-        if not update_operations:
+        if not set_updates:
             logger.error("No valid parameters were provided for the update.")
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
                 detail="No valid parameters were provided for the update.",
             )
         
-        result = await db.assignments.update_one(
+        # Verify that the mission to be updated exists and is not null.
+        updated_assignment = await AssignmentRepository(db).update_and_return(
             {"person_id": person_id},
-            update_operations
+            {"$set": set_updates},
+            ASSIGNMENT_FIELDS,
+            preconditions=[Precondition(
+                {mission_field: {"$ne": None}},
+                status.HTTP_404_NOT_FOUND,
+                f"The {mission_field} cannot be updated because it does not exist."
+            )],
+            not_found_detail=f"No assignment was found for the user: {person_id}"
         )
-
-        if result.modified_count > 0:
-            updated_assignment = await db.assignments.find_one({"person_id": person_id})
-            logger.info("No changes were made to the assignment parameters")
-        else:
-            updated_assignment = existing_assignment
-            logger.info("Assignment parameters updated successfully")
-        return updated_assignment
+        logger.info("Assignment parameters updated successfully")
+        return assignments_codec.load(updated_assignment)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating the assignment parameters: {str(e)}")
         raise HTTPException(
@@ -282,6 +275,24 @@ async def update_missions_params(
             detail=f"Error updating the assignment parameters: {str(e)}"
             )
     
+async def get_votes_needed(user_id: str, db) -> int:
+    "Votes that close a mission: every member of the user's group except the user"
+    user = await get_cached_user(user_id, db)
+    if not user.group_id:
+        logger.error(f"The user: {user_id} does not belong to a group")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"The user: {user_id} does not belong to a group",
+        )
+    members = await GroupRepository(db).get_members(user.group_id)
+    if members is None:
+        logger.error(f"Group not found: {user.group_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Group not found: {user.group_id}",
+        )
+    return len(members) - 1
+
 async def update_missions_params_vote(
     user_id: str, 
     voter_id: str,
@@ -290,109 +301,48 @@ async def update_missions_params_vote(
 ) -> Assignments:
     """
     Endpoint to update specific parameters of a mission.
-    - Allows increasing likes/dislikes only if the voter is not already in the list of voters.
-    - Checks if the number of voters is equal to the group size and decides whether the mission is approved or disapproved.
+    - Adds the voter and increments like/dislike in one conditional update, so concurrent votes are never lost.
+    - The vote is rejected if the voter already voted or the voting is closed. The voting closes with the
+      vote of the last member still to vote, or with the next vote if members left meanwhile.
+    - The last vote also decides whether the mission is approved or disapproved and queues its
+      finalization (history event and reward) in the same write; the outbox worker applies it.
     """
     try:
         logger.info(f"Updating mission vote parameters for user: {user_id}")
-        existing_assignment = await db.assignments.find_one({"person_id": user_id})
-        
-        if not existing_assignment:
-            logger.error(f"No assignment was found for the user: {user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No assignment was found for the user: {user_id}",
-            )
-        
-        # Verify that the mission to be updated exists and is not null.
         mission_field = update_data.mission_type.value
-        current_mission = existing_assignment.get(mission_field)
-        
-        if current_mission is None:
-            logger.error(f"Cannot update {mission_field} because it does not exist.")
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-                detail=f"Cannot update {mission_field} because it does not exist.",
-            )
-        
-        
-        # Check if the user voted
-        voters = current_mission["voters"]
-        for voter in voters:
-            if voter == voter_id:
-                logger.error(f"The user: {voter_id} has already voted")
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail=f"The user: {voter_id} has already voted",
-                )
+        # The group size comes from the group itself, update_data.group_size is ignored
+        votes_needed = await get_votes_needed(user_id, db)
 
-        votesNeeded = update_data.group_size-1
-    
-        if len(voters)>=votesNeeded:
+        if votes_needed < 1:
             logger.error("The voting is full")
             raise HTTPException(
                 status_code=status.HTTP_406_NOT_ACCEPTABLE,
                 detail="The voting is full",
             )
-        
-        # prepare the base of the update operations
-        set_updates = {}
-        # Add new voter
-        newListUsers = voters + [voter_id]
-        set_updates[f"{mission_field}.voters"] = newListUsers
-        # Handle increments like or dislike)
-        like_count=current_mission["like"]
-        dislike_count=current_mission["dislike"]
-        
-        if  update_data.like:
-            like_count+=1
-            set_updates[f"{mission_field}.like"] = like_count
-        else:
-            dislike_count+=1
-            set_updates[f"{mission_field}.dislike"] = dislike_count
-            
-        # We check if it's the last vote
-        if len(voters)+1>=votesNeeded:
-
-            # Final result of the mission
-            status_result = ""
-            if like_count>=dislike_count:
-                status_result = MissionStatus.COMPLETED
-            else: status_result = MissionStatus.FAILED
-
-            logger.info(f"Mission status set to: {status_result}")
-            set_updates[f"{mission_field}.status"] = status_result
-    
-            # We process the result of the mission 
-            await archive_result_mission(user_id,current_mission,mission_field,status_result,db)
-            
-            # We process the mission reward
-            await add_mission_recompensa(user_id,current_mission,mission_field,status_result,db)
-
-        update_operations = {}
-        if set_updates:
-            update_operations["$set"] = set_updates
 
-        # If there are no valid operations
-        if not update_operations:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-                detail="No valid parameters were provided for update",
+        assignments = AssignmentRepository(db)
+        if votes_needed > 1:
+            # Any vote but the last one: the last place stays free
+            updated_assignment = await assignments.add_vote(
+                user_id, mission_field, voter_id, update_data.like, votes_needed - 1
             )
-        
-        result = await db.assignments.update_one(
-            {"person_id": user_id},
-            update_operations
+            if updated_assignment is not None:
+                logger.info("Voting parameters updated successfully.")
+                return assignments_codec.load(updated_assignment)
+
+        # Either this is the last vote or the vote is rejected; the mission tells which
+        for _ in range(CLOSE_VOTING_ATTEMPTS):
+            updated_assignment = await close_voting(user_id, voter_id, mission_field, update_data.like, votes_needed, assignments, db)
+            if updated_assignment is not None:
+                finalization_outbox.notify(db)
+                return assignments_codec.load(updated_assignment)
+
+        logger.error("The voting was updated by another request")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The voting was updated by another request",
         )
         
-        if result.modified_count > 0:
-            updated_assignment = await db.assignments.find_one({"person_id": user_id})
-            logger.info("Voting parameters updated successfully.")
-        else:
-            updated_assignment = existing_assignment
-            logger.info("No changes were made to the voting parameters.")
-        return Assignments(**updated_assignment)
-        
     except HTTPException:
         raise
     except Exception as e:
@@ -401,122 +351,109 @@ async def update_missions_params_vote(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing the vote: {str(e)}",
         )
-    
 
-async def archive_result_mission(user_id:str,current_mission:dict,mission_field:MissionType,status_result:str,db):
+async def close_voting(
+    user_id: str,
+    voter_id: str,
+    mission_field: str,
+    like: bool,
+    votes_needed: int,
+    assignments: AssignmentRepository,
+    db
+) -> Optional[dict]:
     """
-    We are preparing the mission to be archived as a historical event.
+    Cast the vote that fills the voting, or raise why the vote is not accepted.
+    Returns None if another vote changed the voting in between.
     """
-    try:
-        logger.info(f"Archiving mission result for user: {user_id}")
-        current_mission_obj:Mission = Mission(**current_mission)
-
-        if mission_field==MissionType.MAIN:
-            mission_details = await db.missions.find_one({"id":current_mission_obj.mission_id})
-            logro = mission_details["logro"]
-            if logro : logro_name = logro["nombre"]
-            else: logro_name = None
-        else: logro_name = None
-
-        event_data = Event(
-            user_id=user_id,
-            mission_id=current_mission_obj.mission_id,
-            result=current_mission_obj.result,
-            tipo=mission_field,
-            name=current_mission_obj.mission_name,
-            status=status_result,
-            logro_name=logro_name
-        )
-        
-        await create_event(event_data,db)
-        logger.info("Mission result archived successfully")   
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error archiving mission result: {str(e)}")
+    existing_assignment = await assignments.get_by_person_id(user_id, {mission_field: 1, "_id": 0})
+    if not existing_assignment:
+        logger.error(f"No assignment was found for the user: {user_id}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error archiving mission result: {str(e)}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No assignment was found for the user: {user_id}",
         )
 
-async def add_mission_recompensa(user_id:str,current_mission:dict,mission_field:str,status_result:MissionStatus,db):
-    """
-    # We process the reward based on the mission outcome.
-    """
-    try:
-        logger.info(f"Processing mission reward for user: {user_id}")
-        current_mission_obj:Mission = Mission(**current_mission)
-        mission_id=current_mission_obj.mission_id
-        
-        if mission_field==MissionType.MAIN:
-            mission_details = await db.missions.find_one({"id":mission_id})
-        else: 
-            mission_details = await db.secondary.find_one({"id":mission_id})
-        
-        if not mission_details:
-            logger.error(f"Mission details not found for mission_id: {mission_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Mission details not found for mission_id: {mission_id}",
-            )
-        
-        recompensa = mission_details["recompensa"]
-        recompensa_int = int(recompensa)
-
-        if status_result == MissionStatus.FAILED:
-            recompensa_int = - recompensa_int
- 
-        user_profile_data = await db.profiles.find_one({"user_id":user_id})
-        
-        if not user_profile_data:
-            logger.error(f"Profile not found for user_id: {user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Profile not found for user_id: {user_id}",
-            )
-        
-        user_score = user_profile_data["aura"]
-        user_score_int = int(user_score)
+    current_mission = existing_assignment.get(mission_field)
+    if current_mission is None:
+        logger.error(f"Cannot update {mission_field} because it does not exist.")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Cannot update {mission_field} because it does not exist.",
+        )
 
-        update_score = user_score_int + recompensa_int
+    voters = current_mission["voters"]
+    if voter_id in voters:
+        logger.error(f"The user: {voter_id} has already voted")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"The user: {voter_id} has already voted",
+        )
 
-        update_data = {
-            "aura":str(update_score)
-        }
-        result = await db.profiles.update_one(
-                {"user_id": user_id}, 
-                {"$set": update_data}
-            )
-        if not result.matched_count > 0:
-            logger.error(f"Failed to register reward for user_id:{user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-                detail=f"Failed to register reward for user_id:{user_id}",
-            )
-        logger.info("Mission reward processed successfully")
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error processing the reward: {e}")
+    # Checked on the mission, not on the voter count: the group may have grown since the voting closed
+    if current_mission["status"] not in VOTING_STATUSES:
+        logger.error("The voting is closed")
         raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error processing the reward",
-            )
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="The voting is closed",
+        )
+
+    # A voting that already has votes_needed voters is open only because a member left;
+    # the next vote closes it like the last one
+    if len(voters) < votes_needed - 1:
+        # The mission was replaced after the first attempt; count the vote as any other
+        return await assignments.add_vote(user_id, mission_field, voter_id, like, votes_needed - 1)
+
+    # Final result of the mission
+    like_count = current_mission["like"] + (1 if like else 0)
+    dislike_count = current_mission["dislike"] + (0 if like else 1)
+    if like_count >= dislike_count:
+        status_result = MissionStatus.COMPLETED
+    else: status_result = MissionStatus.FAILED
+
+    if mission_field == MissionType.MAIN:
+        logro_name = (await get_catalog(db)).get_logro_name(current_mission["mission_id"])
+    else: logro_name = None
+
+    entry = FinalizationEntry(
+        tipo=mission_field,
+        mission_id=current_mission["mission_id"],
+        name=current_mission["mission_name"],
+        result=current_mission["result"],
+        status=status_result,
+        logro_name=logro_name
+    )
+    updated_assignment = await assignments.close_voting(
+        user_id,
+        mission_field,
+        current_mission["mission_id"],
+        voters,
+        voter_id,
+        like,
+        status_result,
+        entry_codec.encode(entry),
+        datetime.now(timezone.utc)
+    )
+    if updated_assignment is not None:
+        logger.info(f"Mission status set to: {status_result}")
+    return updated_assignment
     
 
 async def get_next_primary_mission(mission_id:str,db)->PrimaryMission:
+    "The successor from the catalog's progression index; no database read once the catalog is loaded"
     try:
         logger.info(f"Getting next primary mission")
-        mission_id_int = int(mission_id)
-        next_mission_id = str(mission_id_int+1)
-        next_mission = await db.missions.find_one({"id": next_mission_id})
+        snapshot = await get_catalog(db)
+        next_mission = snapshot.get_next_mission(mission_id)
         if not next_mission:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="The following main mission was not found.",
             )
+        level = snapshot.get_progression(mission_id).level
+        if next_mission.nivel.numeroNivel != level:
+            logger.info(f"Advancing from level {level} to level {next_mission.nivel.numeroNivel}")
         logger.info(f"Next primary mission found successfully")
-        return PrimaryMission(**next_mission)
+        return next_mission
     
     except HTTPException:
         raise
@@ -525,4 +462,4 @@ async def get_next_primary_mission(mission_id:str,db)->PrimaryMission:
         raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error getting next main mission.: {str(e)}",
-            )
\ No newline at end of file
+            )
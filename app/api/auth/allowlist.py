@@ -0,0 +1,148 @@
+import asyncio
+from datetime import timedelta
+import hashlib
+import math
+import time
+from typing import Optional
+from bson import ObjectId
+from app.core.config import settings
+from .repository import EmailRepository
+
+import logging
+logger = logging.getLogger(__name__)
+
+# ObjectIds are generated by the clients, so ids from different writers can arrive slightly out of order.
+# Incremental refreshes look back this far past the newest id already seen.
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for `capacity` entries at `error_rate` false positives."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def __len__(self) -> int:
+        return self.count
+
+class EmailAllowlist:
+    """
+    In-process copy of the `emails` collection used to validate registrations without a database read.
+    - Lists up to EMAIL_ALLOWLIST_BLOOM_THRESHOLD entries are kept in a set, larger ones in a Bloom filter.
+    - Every EMAIL_ALLOWLIST_REFRESH_SECONDS only the documents added since the last refresh are read;
+      a full reload every EMAIL_ALLOWLIST_FULL_RELOAD_SECONDS picks up removals.
+    - An email not found triggers an incremental refresh before it is rejected, so new entries are
+      accepted immediately. Bloom filter hits are confirmed with a point read, since they can be false positives.
+    """
+
+    def __init__(self):
+        self._entries = set()
+        self._last_id: Optional[ObjectId] = None
+        self._refreshed_at = 0.0
+        self._reloaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.reloads = 0
+
+    @property
+    def is_bloom(self) -> bool:
+        return isinstance(self._entries, BloomFilter)
+
+    def _track(self, document: dict):
+        if isinstance(document.get("_id"), ObjectId) and (self._last_id is None or document["_id"] > self._last_id):
+            self._last_id = document["_id"]
+
+    async def reload(self, db):
+        "Replace the allowlist with the full contents of the collection"
+        async with self._lock:
+            documents = await EmailRepository(db).get_all()
+            emails = [document["email"] for document in documents if document.get("email")]
+            if len(emails) > settings.EMAIL_ALLOWLIST_BLOOM_THRESHOLD:
+                # Headroom so the filter keeps its error rate while the list grows until the next reload
+                entries = BloomFilter(len(emails) * 2, settings.EMAIL_ALLOWLIST_BLOOM_ERROR_RATE)
+                for email in emails:
+                    entries.add(email)
+            else:
+                entries = set(emails)
+
+            self._last_id = None
+            for document in documents:
+                self._track(document)
+            self._entries = entries
+            self._reloaded_at = self._refreshed_at = time.monotonic()
+            self.loaded = True
+            self.reloads += 1
+            logger.info(f"Email allowlist loaded: {len(emails)} emails{' (Bloom filter)' if self.is_bloom else ''}")
+
+    async def refresh(self, db):
+        "Add the emails inserted since the last refresh"
+        if not self.loaded or time.monotonic() - self._reloaded_at >= settings.EMAIL_ALLOWLIST_FULL_RELOAD_SECONDS:
+            await self.reload(db)
+            return
+        async with self._lock:
+            since = None
+            if self._last_id is not None:
+                since = ObjectId.from_datetime(self._last_id.generation_time - REFRESH_OVERLAP)
+            for document in await EmailRepository(db).get_added_since(since):
+                # The overlap re-reads recent entries; skip them so the Bloom filter count stays meaningful
+                if document.get("email") and document["email"] not in self._entries:
+                    self._entries.add(document["email"])
+                self._track(document)
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+
+    async def contains(self, email: str, db) -> bool:
+        refreshed = False
+        if not self.loaded or time.monotonic() - self._refreshed_at >= settings.EMAIL_ALLOWLIST_REFRESH_SECONDS:
+            await self.refresh(db)
+            refreshed = True
+
+        if email not in self._entries and not refreshed:
+            # It may have been added since the last refresh
+            await self.refresh(db)
+
+        if email not in self._entries:
+            self.misses += 1
+            return False
+
+        if self.is_bloom and not await EmailRepository(db).is_allowed(email):
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "kind": "bloom" if self.is_bloom else "set",
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "reloads": self.reloads,
+        }
+
+email_allowlist = EmailAllowlist()
@@ -0,0 +1,26 @@
+from app.database.indexes import IndexSpec
+
+INDEXES = [
+    # 0 = delete immediately upon exceeding the date
+    IndexSpec(
+        collection="refresh_tokens",
+        keys=[("delete_at", 1)],
+        name="auto_delete_refresh_tokens",
+        expire_after_seconds=0
+    ),
+    IndexSpec(
+        collection="refresh_tokens",
+        keys=[("user_id", 1), ("is_revoked", 1), ("created_at", -1)],
+        name="refresh_tokens_user_active"
+    ),
+    # Sparse: tokens stored before hashing have no token_hash and would collide as nulls until they expire
+    IndexSpec(
+        collection="refresh_tokens",
+        keys=[("token_hash", 1)],
+        name="refresh_tokens_token_hash_unique",
+        unique=True,
+        sparse=True
+    ),
+    IndexSpec(collection="refresh_tokens", keys=[("family_id", 1)], name="refresh_tokens_family"),
+    IndexSpec(collection="emails", keys=[("email", 1)], name="emails_email_unique", unique=True),
+]
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from app.database.repository import Repository
+
+class EmailRepository(Repository):
+    collection_name = "emails"
+
+    async def is_allowed(self, email: str) -> bool:
+        return await self.exists({"email": email})
+
+    async def get_all(self) -> list[dict]:
+        return await self.find_many({}, {"_id": 1, "email": 1})
+
+    async def get_added_since(self, since: Optional[ObjectId]) -> list[dict]:
+        "Entries with an _id after `since`, i.e. inserted after it"
+        filter = {"_id": {"$gt": since}} if since is not None else {}
+        return await self.find_many(filter, {"_id": 1, "email": 1}, sort=[("_id", 1)])
+
+class RefreshTokenRepository(Repository):
+    collection_name = "refresh_tokens"
+
+    async def rotate(self, user_id: str, token_hash: bytes, successor_hash: bytes, now: datetime) -> Optional[dict]:
+        """
+        Revoke a live, unexpired token and record its successor in one conditional write.
+        Returns the token as it was, or None when it is unknown, expired or already revoked.
+        """
+        return await self.collection.find_one_and_update(
+            {"token_hash": token_hash, "user_id": user_id, "is_revoked": False, "expires_at": {"$gt": now}},
+            {"$set": {"is_revoked": True, "replaced_by": successor_hash, "revoked_at": now}},
+            projection={"_id": 0, "family_id": 1}
+        )
+
+    async def get_by_hash(self, user_id: str, token_hash: bytes) -> Optional[dict]:
+        return await self.find_one(
+            {"token_hash": token_hash, "user_id": user_id},
+            {"_id": 0, "family_id": 1, "is_revoked": 1, "replaced_by": 1, "revoked_at": 1, "expires_at": 1}
+        )
+
+    async def get_keep_cutoff(self, user_id: str, keep: int) -> Optional[datetime]:
+        "Creation date of the user's keep-th newest live token, or None when there are no more than that"
+        tokens = await self.find_many(
+            {"user_id": user_id, "is_revoked": False},
+            {"_id": 0, "created_at": 1},
+            sort=[("created_at", -1)],
+            limit=keep
+        )
+        return tokens[-1]["created_at"] if len(tokens) == keep else None
+
+    async def revoke(self, filter: dict):
+        return await self.collection.update_one(filter, {"$set": {"is_revoked": True}})
+
+    async def revoke_many(self, filter: dict):
+        return await self.collection.update_many(filter, {"$set": {"is_revoked": True}})
@@ -86,12 +86,9 @@ async def login_user(login_data: UserLogin,response: Response, db=Depends(get_da
 @router.post("/refresh", response_model=User)
 async def refresh_token(response: Response,request:Request, db=Depends(get_database)):
     
-    user = await service.refresh_access_token(request,db)
+    user, new_refresh_token = await service.refresh_access_token(request,db)
     
     new_access_token = create_access_token(data={"sub": user.id})
-    new_refresh_token = create_refresh_token(data={"sub": user.id})
-    
-    await service.save_refresh_token_to_db(user.id, new_refresh_token, db)
 
     response.set_cookie(
         key="access_token",
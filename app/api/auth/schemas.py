@@ -39,7 +39,10 @@ class Token(BaseModel):
 
 class RefreshToken(BaseModel):
     user_id: str
-    token: str
+    token_hash: bytes # SHA-256 of the JWT, the token itself is never stored
+    family_id: str # shared by every token rotated from the same login
+    replaced_by: Optional[bytes] = None # token_hash of the successor once rotated
+    revoked_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     expires_at: datetime
     delete_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,43 +1,62 @@
 from datetime import datetime, timedelta
 import random
 from typing import Optional
+import uuid
 from app.core.config import settings
 import jwt
-from app.core.security import decode_refresh_token, get_password_hash, verify_password
+from app.core.hashing import get_password_hash_async, verify_and_update_password_async
+from app.core.security import create_refresh_token, decode_refresh_token, refresh_token_digest
 from fastapi import HTTPException, Request,status
 from .schemas import RefreshToken, UserCreate, UserLogin, User,UserInDb
-from app.database.database import prepare_for_mongo, parse_from_mongo
+from app.database.codec import codec_for
+from app.api.users.repository import USER_WITH_PASSWORD_FIELDS, UserRepository
+from app.api.users.service import ADMIN_ROLE, get_cached_user
+from pymongo.errors import DuplicateKeyError
+from .allowlist import email_allowlist
+from .repository import RefreshTokenRepository
 import logging
 
 logger = logging.getLogger(__name__)
 
+user_codec = codec_for(User)
+
+# Set by verify_email_index once users.email is confirmed unique; until then registrations look the email up first
+_email_index_verified = False
+
+async def verify_email_index(db) -> bool:
+    "Check the unique index on users.email; called after the indexes are reconciled"
+    global _email_index_verified
+    _email_index_verified = await UserRepository(db).has_unique_email_index()
+    if not _email_index_verified:
+        logger.error("users.email has no unique index; registrations check for an existing email before inserting")
+    return _email_index_verified
+
 async def validate_user_by_email(user_email:str,db) -> bool:
-    try:
-        result = await db.emails.find_one({"email": user_email})
-        if result:
-            return True
-        return False
-    except:
-        return False
+    return await email_allowlist.contains(user_email, db)
     
 async def find_user_by_email(user_email:str,db) -> Optional[UserInDb]:
-    return await db.users.find_one({"email": user_email})
-
-async def get_user_by_id(user_id: str,db) -> Optional[UserInDb]:
-    return await db.users.find_one({"id": user_id})           
+    return await UserRepository(db).get_by_email(user_email, USER_WITH_PASSWORD_FIELDS)
         
 async def create_user(user_data:UserCreate,db) -> User:
-    
-    existing_user = await find_user_by_email(user_data.email,db)
-    
-    if existing_user :
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT,detail="User email already registered")
-    
-    valid_user = await validate_user_by_email(user_data.email,db)
+    """
+    Register a user with a single insert; the unique index on users.email rejects duplicates.
+    Until that index is verified, the email is also looked up before inserting.
+    """
+    try:
+        valid_user = await validate_user_by_email(user_data.email,db)
+    except Exception as e:
+        logger.error(f"Error validating email: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error validating email")
     if not valid_user : 
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid email")
 
-    hashed_password=get_password_hash(user_data.password)
+    if user_data.role == ADMIN_ROLE:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="The admin role cannot be self-assigned")
+
+    if not _email_index_verified and await find_user_by_email(user_data.email,db):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,detail="User email already registered")
+
+    hashed_password=await get_password_hash_async(user_data.password)
     
     user_data_dict = user_data.dict()
     
@@ -45,11 +64,14 @@ async def create_user(user_data:UserCreate,db) -> User:
 
     user_data_object = User(**user_data_dict)
 
-    user_data_doc = prepare_for_mongo(user_data_object.dict())
+    user_data_doc = user_codec.encode(user_data_object)
     
     user_data_doc["hashed_password"] = hashed_password
 
-    await db.users.insert_one(user_data_doc)
+    try:
+        await UserRepository(db).insert_one(user_data_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,detail="User email already registered")
     
     return  user_data_object
 
@@ -61,12 +83,15 @@ async def authenticate_user(login_data:UserLogin,db) -> User:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
         hashed_password = existing_user.get('hashed_password')
-        is_verify = verify_password(login_data.password, hashed_password)
+        is_verify, new_hash = await verify_and_update_password_async(login_data.password, hashed_password)
 
         if not is_verify:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
-        user_obj = User(**parse_from_mongo(existing_user))
+        if new_hash:
+            await upgrade_password_hash(existing_user["id"], hashed_password, new_hash, db)
+
+        user_obj = user_codec.load(existing_user)
 
         return  user_obj
     except HTTPException:
@@ -75,11 +100,21 @@ async def authenticate_user(login_data:UserLogin,db) -> User:
         logger.error(f"Authentication error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Authentication error")
 
+async def upgrade_password_hash(user_id: str, old_hash: str, new_hash: str, db):
+    "Store a hash computed with the current bcrypt cost; a failure here never fails the login"
+    try:
+        await UserRepository(db).replace_password_hash(user_id, old_hash, new_hash)
+        logger.info(f"Upgraded the password hash of user {user_id}")
+    except Exception as e:
+        logger.error(f"Error upgrading the password hash of user {user_id}: {str(e)}")
+
 async def save_refresh_token_to_db(
     user_id: str, 
     token: str, 
-    db
+    db,
+    family_id: Optional[str] = None
 ) -> str:
+    """Store a refresh token. Without a family_id it starts a new family (a login) and trims old sessions."""
     try:
         
         expires_at = datetime.utcnow() + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
@@ -89,18 +124,21 @@ async def save_refresh_token_to_db(
         
         refresh_token_obj = RefreshToken(
             user_id=user_id,
-            token=token,
+            token_hash=refresh_token_digest(token),
+            family_id=family_id or str(uuid.uuid4()),
             created_at=datetime.utcnow(),
             expires_at=expires_at,
             delete_at=delete_at,
             is_revoked=False
         )
         
-        result = await db.refresh_tokens.insert_one(refresh_token_obj.dict())
+        result = await RefreshTokenRepository(db).insert_one(refresh_token_obj.dict())
         if result.inserted_id is None:
             raise Exception("Failed to insert refresh token")
         
-        await cleanup_old_refresh_tokens(user_id, db)
+        # Rotation replaces a token one for one, only new logins can exceed the limit
+        if family_id is None:
+            await cleanup_old_refresh_tokens(user_id, db)
 
         return result.inserted_id
     
@@ -110,71 +148,72 @@ async def save_refresh_token_to_db(
         raise HTTPException(status_code=500, detail=f"Error saving refresh token: {str(e)}")
 
 
-async def validate_and_revoke_refresh_token(user_id: str, token: str, db) -> bool:
-
-    token_doc = await db.refresh_tokens.find_one({
-        "user_id": user_id,
-        "token": token,
-        "is_revoked": False
-    })
-    
-    if not token_doc:
-        return False
-    
-    # verify expire at
-    expires_at = token_doc.get("expires_at")
-    if expires_at and expires_at < datetime.utcnow():
-        await revoke_refresh_token_by_id(token_doc["_id"], db)
-        return False
-    
-    await revoke_refresh_token_by_id(token_doc["_id"], db)
-    return True
+async def rotate_refresh_token(user_id: str, token: str, new_token: str, db) -> None:
+    """
+    Replace a refresh token by its successor.
+    The old token is revoked and linked to the new one in a single conditional write, so of two
+    concurrent refreshes with the same token only one succeeds. Presenting a token that was already
+    rotated, after the retry grace period, is treated as theft and revokes its whole family.
+    """
+    now = datetime.utcnow()
+    token_hash = refresh_token_digest(token)
+    refresh_tokens = RefreshTokenRepository(db)
+
+    rotated = await refresh_tokens.rotate(user_id, token_hash, refresh_token_digest(new_token), now)
+    if rotated is None:
+        await reject_refresh_token(user_id, token_hash, now, db)
+
+    # Tokens stored before families existed start one
+    await save_refresh_token_to_db(user_id, new_token, db, family_id=rotated.get("family_id") or str(uuid.uuid4()))
+
+async def reject_refresh_token(user_id: str, token_hash: bytes, now: datetime, db) -> None:
+    "Raise the error for a token that could not be rotated; only failed refreshes pay for this read"
+    refresh_tokens = RefreshTokenRepository(db)
+    token_doc = await refresh_tokens.get_by_hash(user_id, token_hash)
+
+    if not token_doc or not token_doc.get("is_revoked"):
+        # Unknown or expired
+        raise HTTPException(status_code=400, detail="Invalid refresh token")
+
+    revoked_at = token_doc.get("revoked_at")
+    grace = timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+    if token_doc.get("replaced_by") and revoked_at and now - revoked_at <= grace:
+        logger.info(f"Refresh token of user {user_id} replayed during the retry grace period")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Refresh token already rotated")
+
+    family_id = token_doc.get("family_id")
+    if family_id:
+        await refresh_tokens.revoke_many({"family_id": family_id, "is_revoked": False})
+    logger.error(f"Reuse of a revoked refresh token by user {user_id}, token family revoked")
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token reuse detected")
 
 async def cleanup_old_refresh_tokens(user_id: str, db, max_tokens: int = 2) -> None:
+    """Keep the user's newest max_tokens sessions: one read for the cutoff and one update, however many tokens exist."""
     try:
-        # Obtain the tokens sorted by creation
-        tokens = await db.refresh_tokens.find(
-            {"user_id": user_id, "is_revoked": False}
-        ).sort("created_at", -1).to_list(length=None)
-        
-        # Revoke the oldest ones
-        if len(tokens) > max_tokens:
-            tokens_to_revoke = tokens[max_tokens:]
-            
-            for token in tokens_to_revoke:
-                await revoke_refresh_token_by_id(token["_id"], db)
+        refresh_tokens = RefreshTokenRepository(db)
+        cutoff = await refresh_tokens.get_keep_cutoff(user_id, max_tokens)
+
+        # Revoke every live token older than the oldest one kept
+        if cutoff is not None:
+            await refresh_tokens.revoke_many({"user_id": user_id, "is_revoked": False, "created_at": {"$lt": cutoff}})
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error cleaning up old refresh tokens")
 
 async def revoke_all_user_refresh_tokens(user_id: str, db) -> None:
     try:
-        await db.refresh_tokens.update_many(
-            {"user_id": user_id, "is_revoked": False},
-            {"$set": {"is_revoked": True}}
-        )
+        await RefreshTokenRepository(db).revoke_many({"user_id": user_id, "is_revoked": False})
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error revoking all refresh token")
     
 async def revoke_refresh_token(token: str, db) -> None:
     try:
-        await db.refresh_tokens.update_one(
-            {"token": token},
-            {"$set": {"is_revoked": True}}
-        )
+        await RefreshTokenRepository(db).revoke({"token_hash": refresh_token_digest(token)})
     except Exception as e:
         logger.error(f"Error revoking refresh token: {str(e)}")
         raise HTTPException(status_code=500, detail="Error revoking refresh token")
-    
-async def revoke_refresh_token_by_id(id: str, db) -> None:
-    try:
-        await db.refresh_tokens.update_one(
-            {"_id": id},
-            {"$set": {"is_revoked": True}}
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Error revoking refresh token")
 
-async def refresh_access_token(request:Request, db) -> User:
+async def refresh_access_token(request:Request, db) -> tuple[User, str]:
+    """Rotate the refresh token in the request cookie and return the user with the new refresh token."""
 
     try:
         token = request.cookies.get("refresh_token")
@@ -187,14 +226,12 @@ async def refresh_access_token(request:Request, db) -> User:
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid refresh token")
         
-        if not await validate_and_revoke_refresh_token(user_id,token,db):
-            raise HTTPException(status_code=400, detail="Invalid refresh token")
+        new_refresh_token = create_refresh_token(data={"sub": user_id})
+        await rotate_refresh_token(user_id, token, new_refresh_token, db)
 
-        # get user data
-        existing_user = await get_user_by_id(user_id,db)
-        user_obj = User(**parse_from_mongo(existing_user))
+        user = await get_cached_user(user_id, db)
 
-        return user_obj
+        return user, new_refresh_token
         
     except HTTPException:
         raise
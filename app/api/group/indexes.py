@@ -0,0 +1,5 @@
+from app.database.indexes import IndexSpec
+
+INDEXES = [
+    IndexSpec(collection="groups", keys=[("id", 1)], name="groups_id_unique", unique=True),
+]
@@ -0,0 +1,21 @@
+from typing import Optional
+from app.database.repository import Repository
+
+GROUP_FIELDS = {"_id": 0}
+GROUP_MEMBERS_FIELDS = {"members": 1, "_id": 0}
+
+class GroupRepository(Repository):
+    collection_name = "groups"
+
+    async def get_by_id(self, group_id: str, projection: dict = GROUP_FIELDS) -> Optional[dict]:
+        return await self.find_one({"id": group_id}, projection)
+
+    async def get_all(self, projection: dict = GROUP_FIELDS, limit: Optional[int] = None) -> list[dict]:
+        return await self.find_many({}, projection, limit=limit)
+
+    async def get_members(self, group_id: str) -> Optional[list[dict]]:
+        group = await self.find_one({"id": group_id}, GROUP_MEMBERS_FIELDS)
+        return group["members"] if group else None
+
+    async def delete(self, group_id: str):
+        return await self.collection.delete_one({"id": group_id})
@@ -2,8 +2,9 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.api.users.service import get_current_user_id
 from app.database.database import get_database
-from .schemas import Group,UpdateGroup,UpdateMembers,CreateGroup
-from .service import update_members,update_group,create_group,delete_group_in_cascade,delete_group_by_id
+from .schemas import Group,GroupDashboard,Leaderboard,UpdateGroup,UpdateMembers,CreateGroup
+from .service import update_members,update_group,create_group,delete_group_in_cascade,delete_group_by_id,get_global_leaderboard,get_group_dashboard,get_group_leaderboard
+from .repository import GroupRepository
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,7 +30,7 @@ async def update_members_group(group_id: str, update_data: UpdateMembers,user_id
 async def get_groups(db=Depends(get_database),user_id:str=Depends(get_current_user_id)):
     try:
         logger.info("Retrieving all groups")
-        groups = await db.groups.find().to_list(100)
+        groups = await GroupRepository(db).get_all(limit=100)
         if not groups:
             logger.error("No groups found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No groups found")
@@ -40,11 +41,27 @@ async def get_groups(db=Depends(get_database),user_id:str=Depends(get_current_us
         logger.error(f"Error retrieving groups: {type(e).__name__}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving groups")
 
+# Declared before /{group_id} so "leaderboard" is not taken for a group id
+@router.get("/leaderboard", response_model=Leaderboard)
+async def get_top_leaderboard(limit: int = 10, db=Depends(get_database), user_id: str = Depends(get_current_user_id)):
+    "Top `limit` profiles by aura across all groups (at most 100)."
+    return await get_global_leaderboard(limit, db)
+
+@router.get("/{group_id}/leaderboard", response_model=Leaderboard)
+async def get_group_ranking(group_id: str, db=Depends(get_database), user_id: str = Depends(get_current_user_id)):
+    "Members of the group ranked by aura, with the aura gained this week."
+    return await get_group_leaderboard(group_id, db)
+
+@router.get("/{group_id}/dashboard", response_model=GroupDashboard)
+async def get_dashboard(group_id: str, db=Depends(get_database), user_id: str = Depends(get_current_user_id)):
+    "Every member of the group with their profile summary, mission states, votes and missions."
+    return await get_group_dashboard(group_id, db)
+
 @router.get("/{group_id}", response_model=Group)
 async def get_group_by_id(group_id: str, db=Depends(get_database),user_id:str=Depends(get_current_user_id)):
     try:
         logger.info(f"Retrieving group with id: {group_id}")
-        group = await db.groups.find_one({"id": group_id})
+        group = await GroupRepository(db).get_by_id(group_id)
         if not group:
             logger.error(f"Group not found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
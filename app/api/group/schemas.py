@@ -1,7 +1,8 @@
 from datetime import datetime
 import uuid
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer
 from typing import List, Optional
+from ..assignments.schemas import Mission, MissionResponse
 
 class EventResponse(BaseModel):
     id: str
@@ -34,4 +35,55 @@ class CreateGroup(BaseModel):
     group_name: str
     current_user_id: str
     current_user_name: str
-    password:str
\ No newline at end of file
+    password:str
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    name: str
+    apodo: str = ""
+    aura: int
+    delta: int # aura gained or lost this week
+    group_id: Optional[str] = None
+
+    @field_serializer("aura", when_used="json")
+    def serialize_aura(self, aura: int) -> str:
+        "Sent as a string, like Profile.aura"
+        return str(aura)
+
+class Leaderboard(BaseModel):
+    group_id: Optional[str] = None
+    week: str
+    entries: List[LeaderboardEntry]
+
+class DashboardMission(Mission):
+    """A mission slot: its voting state and the mission it refers to."""
+    details: Optional[MissionResponse] = None
+
+class DashboardProfile(BaseModel):
+    name: str
+    apodo: str = ""
+    titulo: str = ""
+    aura: int = 0
+    img: str = ""
+
+    @field_serializer("aura", when_used="json")
+    def serialize_aura(self, aura: int) -> str:
+        "Sent as a string, like Profile.aura"
+        return str(aura)
+
+class DashboardMember(BaseModel):
+    user_id: str
+    user_name: str
+    profile: Optional[DashboardProfile] = None
+    mission: Optional[DashboardMission] = None
+    secondary_mission: Optional[DashboardMission] = None
+    group_mission: Optional[DashboardMission] = None
+
+class GroupDashboard(BaseModel):
+    id: str
+    group_name: str
+    created_by: str
+    creator_id: str
+    votes_needed: int # votes that close a member's mission
+    members: List[DashboardMember]
@@ -1,10 +1,27 @@
-from datetime import datetime
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
 from fastapi import  HTTPException,status
-from .schemas import Group,Member, UpdateGroup,UpdateMembers,CreateGroup
+from app.database.operations import Precondition
+from app.api.assignments.repository import LOOKUP_SLOTS, AssignmentRepository
+from app.api.assignments.schemas import MissionResponse
+from app.api.missions.catalog import get_catalog
+from app.api.profiles.migration import completed_migrations
+from app.api.profiles.repository import PROFILE_SUMMARY_FIELDS, ProfileRepository, week_key
+from app.database.codec import codec_for
+from app.api.users.cache import user_cache
+from app.api.users.repository import UserRepository
+from .repository import GROUP_FIELDS, GroupRepository
+from .schemas import DashboardMember,DashboardMission,DashboardProfile,Group,GroupDashboard,Leaderboard,LeaderboardEntry,Member, UpdateGroup,UpdateMembers,CreateGroup
 import logging
 
 logger = logging.getLogger(__name__)
 
+MAX_GROUP_MEMBERS = 5
+GLOBAL_LEADERBOARD_MAX = 100
+
+dashboard_mission_codec = codec_for(DashboardMission)
+
 async def create_group(group_data: CreateGroup, db) -> Group:
     try:
         logger.info("Init create group")
@@ -19,7 +36,7 @@ async def create_group(group_data: CreateGroup, db) -> Group:
             password=group_data.password
         )
         
-        result = await db.groups.insert_one(new_group.dict())
+        result = await GroupRepository(db).insert_one(new_group.dict())
 
         if not result.inserted_id:
             logger.error("The group could not be created")
@@ -27,10 +44,9 @@ async def create_group(group_data: CreateGroup, db) -> Group:
         
         logger.info(f"Created group with id:{str(result.inserted_id)}")
         
-        update_result = await db.users.update_one(
-            {"id": group_data.current_user_id}, 
-            {"$set": {"group_id": new_group.id}}
-        )
+        update_result = await UserRepository(db).set_group(group_data.current_user_id, new_group.id)
+        user_cache.invalidate([group_data.current_user_id])
+        await ProfileRepository(db).set_group(group_data.current_user_id, new_group.id)
 
         if update_result.modified_count == 0:
             logger.error("Group created but user not updated")
@@ -48,66 +64,60 @@ async def create_group(group_data: CreateGroup, db) -> Group:
 async def update_members(group_id: str, update_data: UpdateMembers, db):
     try:
         logger.info("Init Update group member")
-        
-        existing_group = await db.groups.find_one({"id": group_id})
-        if not existing_group:
-            logger.error("Group not found")
-            raise HTTPException(status_code=404, detail="Group not found")
-        
-        group = Group(**existing_group)
 
         # Delete member
         if update_data.remove:
-            
-            if update_data.user_id == group.creator_id:
-                logger.error("The group creator cannot be removed")
-                raise HTTPException(status_code=400, detail="The group creator cannot be removed")
-            
-            member_exists = any(member.user_id == update_data.user_id for member in group.members)
-            if not member_exists:
-                logger.error("User does not exist in the group")
-                raise HTTPException(status_code=404, detail="User does not exist in the group")
-            
-            # Exclude member
-            updated_members = [member for member in group.members if member.user_id != update_data.user_id]
+            group_update = {"$pull": {"members": {"user_id": update_data.user_id}}}
+            preconditions = [
+                Precondition(
+                    {"creator_id": {"$ne": update_data.user_id}},
+                    status.HTTP_400_BAD_REQUEST,
+                    "The group creator cannot be removed"
+                ),
+                Precondition(
+                    {"members.user_id": update_data.user_id},
+                    status.HTTP_404_NOT_FOUND,
+                    "User does not exist in the group"
+                ),
+            ]
             new_group = None
         
         # Add member
         else:
-            # No more than 5 members
-            if len(group.members) >= 5:
-                logger.error("The group cannot contain more than 5 members")
-                raise HTTPException(status_code=400, detail="The group cannot contain more than 5 members")
-            
-            # Verify that the user is not already in the group
-            member_exists = any(member.user_id == update_data.user_id for member in group.members)
-            if member_exists:
-                logger.error("The user is already a member of the group")
-                raise HTTPException(status_code=400, detail="The user is already a member of the group")
-            
-            # Add new member
             new_member = Member(user_id=update_data.user_id, user_name=update_data.user_name)
-            updated_members = group.members + [new_member]
+            group_update = {"$push": {"members": new_member.dict()}}
+            preconditions = [
+                # No more than 5 members
+                Precondition(
+                    {f"members.{MAX_GROUP_MEMBERS - 1}": {"$exists": False}},
+                    status.HTTP_400_BAD_REQUEST,
+                    f"The group cannot contain more than {MAX_GROUP_MEMBERS} members"
+                ),
+                # Verify that the user is not already in the group
+                Precondition(
+                    {"members.user_id": {"$ne": update_data.user_id}},
+                    status.HTTP_400_BAD_REQUEST,
+                    "The user is already a member of the group"
+                ),
+            ]
             new_group = group_id
-        
-        group_update_result = await db.groups.update_one(
-            {"id": group_id}, 
-            {"$set": {"members": [member.dict() for member in updated_members]}}
+
+        updated_group = await GroupRepository(db).update_and_return(
+            {"id": group_id},
+            group_update,
+            GROUP_FIELDS,
+            preconditions=preconditions,
+            not_found_detail="Group not found"
         )
-        if group_update_result.modified_count == 0:
-            logger.error("The group could not be updated")
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="The group could not be updated")
         
         # Update user group information
-        user_update_result = await db.users.update_one(
-            {"id": update_data.user_id}, 
-            {"$set": {"group_id": new_group}}
-        )
+        user_update_result = await UserRepository(db).set_group(update_data.user_id, new_group)
+        user_cache.invalidate([update_data.user_id])
+        await ProfileRepository(db).set_group(update_data.user_id, new_group)
         if user_update_result.modified_count == 0:
             logger.error("Group upadted but user not updated")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Group upadted but user not updated")
         
-        updated_group = await db.groups.find_one({"id": group_id})
         logger.info("Updated group members succes")
         return Group(**updated_group)
     
@@ -120,41 +130,43 @@ async def update_members(group_id: str, update_data: UpdateMembers, db):
 async def update_group(group_id: str, update_data: UpdateGroup, db):
     try:
         logger.info("Init update group")
-        existing_group = await db.groups.find_one({"id": group_id})
-        if not existing_group:
-            logger.error("Group not found")
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
-        
-        group = Group(**existing_group)
         update_dict = {}
-        
+        preconditions = []
         
         if update_data.members:
             # 5 members max
-            if len(update_data.members) > 5:
+            if len(update_data.members) > MAX_GROUP_MEMBERS:
                 logger.error("The group is full.")
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The group is full.")
             
             # The creator remains
-            creator_still_member = any(member.user_id == group.creator_id for member in update_data.members)
-            if not creator_still_member:
-                logger.error("The group creator must remain a member")
-                raise HTTPException(status_code=400, detail="The group creator must remain a member")
+            preconditions.append(Precondition(
+                {"creator_id": {"$in": [member.user_id for member in update_data.members]}},
+                status.HTTP_400_BAD_REQUEST,
+                "The group creator must remain a member"
+            ))
             
             update_dict["members"] = [member.dict() for member in update_data.members]
         
-        if update_dict:
-            result  = await db.groups.update_one({"id": group_id}, {"$set": update_dict})
-        
-        if result.modified_count == 0:
-            response_group = existing_group
-            logger.error("The group could not be updated")
-        else:
-            updated_group = await db.groups.find_one({"id": group_id})
-            response_group = Group(**updated_group)
-            logger.info(f"Group {group_id} updated successfully")
+        groups = GroupRepository(db)
+
+        if not update_dict:
+            existing_group = await groups.get_by_id(group_id)
+            if not existing_group:
+                logger.error("Group not found")
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+            logger.info("No changes were made to the group")
+            return Group(**existing_group)
 
-        return response_group
+        updated_group = await groups.update_and_return(
+            {"id": group_id},
+            {"$set": update_dict},
+            GROUP_FIELDS,
+            preconditions=preconditions,
+            not_found_detail="Group not found"
+        )
+        logger.info(f"Group {group_id} updated successfully")
+        return Group(**updated_group)
     
     except HTTPException:
         raise
@@ -166,7 +178,7 @@ async def delete_group_by_id(group_id: str,db):
     try:
         logger.info(f"Init delete group by id: {group_id}")
         
-        result = await db.groups.delete_one({"id": group_id})
+        result = await GroupRepository(db).delete(group_id)
         
         if result.deleted_count == 0:
             logger.error("Grupo not found")
@@ -183,24 +195,23 @@ async def delete_group_by_id(group_id: str,db):
 async def delete_group_in_cascade(group_id: str,db):
     try:
         logger.info(f"Init delete group in cascade: {group_id}")
-        group = await db.groups.find_one({"id": group_id})
-        group_obj = Group(**group)
-        group_size = len(group_obj.members)
+        groups = GroupRepository(db)
+        members = await groups.get_members(group_id)
         
-        if not group:
+        if members is None:
             logger.error("Grupo not found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grupo not found")
+        group_size = len(members)
         
-        delete_result = await db.groups.delete_one({"id": group_id})
+        delete_result = await groups.delete(group_id)
         
         if delete_result.deleted_count != 1:
             logger.error("Error deleting group")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error al eliminar el grupo")
         
-        update_result = await db.users.update_many(
-            {"group_id": group_id},
-            {"$set": {"group_id": None}}
-        )
+        update_result = await UserRepository(db).clear_group(group_id)
+        user_cache.invalidate(member["user_id"] for member in members)
+        await ProfileRepository(db).clear_group(group_id)
 
         if update_result.modified_count != group_size:
             logger.error("Group deleted but not all users were updated")
@@ -213,4 +224,139 @@ async def delete_group_in_cascade(group_id: str,db):
         raise
     except Exception as e:
         logger.error(f"Error in cascading deletion: {type(e).__name__}: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error in cascading deletion")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error in cascading deletion")
+
+def rank_profiles(profiles: list[dict], week: str) -> list[LeaderboardEntry]:
+    """
+    Leaderboard rows from profiles read in aura order. Equal auras share a rank (1, 2, 2, 4).
+    The delta is the aura gained since the first reward of the week; no reward this week means no change.
+    """
+    # Profiles not migrated yet hold the aura as a string, which the database sorts apart from numbers
+    profiles = sorted(profiles, key=lambda profile: int(profile.get("aura") or 0), reverse=True)
+    entries = []
+    for position, profile in enumerate(profiles, start=1):
+        aura = int(profile.get("aura") or 0)
+        if entries and entries[-1].aura == aura:
+            rank = entries[-1].rank
+        else: rank = position
+        delta = aura - int(profile.get("aura_week_start") or 0) if profile.get("aura_week") == week else 0
+        entries.append(LeaderboardEntry(
+            rank=rank,
+            user_id=profile["user_id"],
+            name=profile.get("name", ""),
+            apodo=profile.get("apodo") or "",
+            aura=aura,
+            delta=delta,
+            group_id=profile.get("group_id")
+        ))
+    return entries
+
+async def get_group_leaderboard(group_id: str, db) -> Leaderboard:
+    try:
+        logger.info(f"Retrieving leaderboard for group: {group_id}")
+        week = week_key(datetime.now(timezone.utc))
+        if "groups" in completed_migrations:
+            profiles = await ProfileRepository(db).get_group_ranking(group_id, MAX_GROUP_MEMBERS)
+            # Only an empty result needs to tell an unknown group from one without profiles
+            group_found = bool(profiles) or await GroupRepository(db).exists({"id": group_id})
+        else:
+            # Profiles from before the group backfill lack group_id; rank the members listed in the group
+            members = await GroupRepository(db).get_members(group_id)
+            group_found = members is not None
+            profiles = await ProfileRepository(db).get_members_ranking([member["user_id"] for member in members or []])
+            profiles = [{**profile, "group_id": group_id} for profile in profiles]
+
+        if not group_found:
+            logger.error("Group not found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+
+        return Leaderboard(group_id=group_id, week=week, entries=rank_profiles(profiles, week))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving the group leaderboard: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving the group leaderboard")
+
+async def get_global_leaderboard(limit: int, db) -> Leaderboard:
+    try:
+        logger.info(f"Retrieving the global leaderboard, top {limit}")
+        week = week_key(datetime.now(timezone.utc))
+        limit = min(max(limit, 1), GLOBAL_LEADERBOARD_MAX)
+        profiles = await ProfileRepository(db).get_top_ranking(limit)
+        if "aura" not in completed_migrations:
+            # Until the aura migration finishes, string auras compete with the numeric top
+            profiles += await ProfileRepository(db).get_string_aura_ranking()
+        return Leaderboard(week=week, entries=rank_profiles(profiles, week)[:limit])
+
+    except Exception as e:
+        logger.error(f"Error retrieving the global leaderboard: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving the global leaderboard")
+
+def dashboard_slot(assignment: dict, slot: str, snapshot) -> Optional[DashboardMission]:
+    "A slot of an aggregated assignment with its mission resolved; a missing mission is left out, not an error"
+    state = assignment.get(slot)
+    if not state:
+        return None
+    if slot in LOOKUP_SLOTS:
+        found = assignment.get(LOOKUP_SLOTS[slot]) or []
+        details = MissionResponse(**found[0]) if found else None
+    else:
+        primary = snapshot.get_mission(state.get("mission_id"))
+        details = MissionResponse(**primary.model_dump()) if primary else None
+    if details is None:
+        logger.warning(f"Mission {state.get('mission_id')} of {slot} not found for user {assignment.get('person_id')}")
+    return dashboard_mission_codec.load({**state, "details": details})
+
+async def get_group_dashboard(group_id: str, db) -> GroupDashboard:
+    """
+    Everything the group screen shows, in one call: every member with their profile summary,
+    the state and votes of each mission slot, and the missions themselves.
+    - After the group read, profiles and assignments are read concurrently with one $in query each;
+      the assignment query looks up the secondary and group missions in the same aggregation.
+    - Primary missions come from the in-memory catalog.
+    """
+    try:
+        logger.info(f"Retrieving dashboard for group: {group_id}")
+        group = await GroupRepository(db).get_by_id(group_id)
+        if not group:
+            logger.error("Group not found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+
+        members = [Member(**member) for member in group["members"]]
+        user_ids = [member.user_id for member in members]
+        profiles, assignments, snapshot = await asyncio.gather(
+            ProfileRepository(db).get_by_user_ids(user_ids, PROFILE_SUMMARY_FIELDS),
+            AssignmentRepository(db).get_many_with_missions(user_ids),
+            get_catalog(db)
+        )
+        profiles = {profile["user_id"]: profile for profile in profiles}
+        assignments = {assignment["person_id"]: assignment for assignment in assignments}
+
+        dashboard_members = []
+        for member in members:
+            profile = profiles.get(member.user_id)
+            assignment = assignments.get(member.user_id) or {}
+            dashboard_members.append(DashboardMember(
+                user_id=member.user_id,
+                user_name=member.user_name,
+                profile=DashboardProfile(**profile) if profile else None,
+                mission=dashboard_slot(assignment, "mission", snapshot),
+                secondary_mission=dashboard_slot(assignment, "secondary_mission", snapshot),
+                group_mission=dashboard_slot(assignment, "group_mission", snapshot)
+            ))
+
+        return GroupDashboard(
+            id=group["id"],
+            group_name=group["group_name"],
+            created_by=group["created_by"],
+            creator_id=group["creator_id"],
+            votes_needed=max(len(members) - 1, 0),
+            members=dashboard_members
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving the group dashboard: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving the group dashboard")
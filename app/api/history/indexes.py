@@ -0,0 +1,5 @@
+from app.database.indexes import IndexSpec
+
+INDEXES = [
+    IndexSpec(collection="history", keys=[("user_id", 1), ("created", -1)], name="history_user_created"),
+]
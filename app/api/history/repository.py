@@ -0,0 +1,35 @@
+from typing import Optional
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from app.database.repository import Repository
+
+EVENT_FIELDS = {"_id": 0}
+# What the mission generator needs from past events
+EVENT_PROMPT_FIELDS = {"tipo": 1, "description": 1, "result": 1, "_id": 0}
+
+class HistoryRepository(Repository):
+    collection_name = "history"
+
+    async def get_by_user_id(
+        self,
+        user_id: str,
+        projection: dict = EVENT_FIELDS,
+        limit: Optional[int] = None
+    ) -> list[dict]:
+        return await self.find_many({"user_id": user_id}, projection, limit=limit)
+
+    async def insert_events(self, documents: list[dict]) -> set:
+        """
+        Insert events that carry their own `_id`; an `_id` already stored counts as inserted,
+        so a batch can be retried. Returns the ids that could not be written.
+        """
+        if not documents:
+            return set()
+        try:
+            await self.collection.bulk_write([InsertOne(document) for document in documents], ordered=False)
+        except BulkWriteError as e:
+            return {
+                documents[error["index"]]["_id"]
+                for error in e.details["writeErrors"] if error.get("code") != 11000
+            }
+        return set()
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException,status
 from app.api.users.service import get_current_user_id
 from app.database.database import get_database
 from .schemas import Event, History
-from .service import create_event, get_group_history
+from .service import create_event, event_codec, get_group_history
+from .repository import HistoryRepository
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,11 +18,11 @@ async def create_event_history(event_data: Event,db=Depends(get_database),user_i
 async def get_event_history(user_id:str=Depends(get_current_user_id), db=Depends(get_database)):
     try:
         logger.info(f"Retrieving events for user: {user_id}")
-        events = await db.history.find({"user_id": user_id}).to_list(100)
+        events = await HistoryRepository(db).get_by_user_id(user_id, limit=100)
         if not events:
             logger.error(f"Events not found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Events not found")
-        return [Event(**event) for event in events]
+        return [event_codec.load(event) for event in events]
     except HTTPException:
         raise
     except Exception as e:
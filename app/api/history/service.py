@@ -1,17 +1,21 @@
 from fastapi import HTTPException,status
-from app.api.group.schemas import Group
+from app.api.group.schemas import Member
 from .schemas import Event, History
-from app.database.database import prepare_for_mongo
+from app.database.codec import codec_for
+from app.api.group.repository import GroupRepository
+from .repository import HistoryRepository
 import logging
 logger = logging.getLogger(__name__)
 
+event_codec = codec_for(Event)
+
 async def create_event(event_data: Event, db) -> str:
     try:
         logger.info(f"Creating event for user: {event_data.user_id}")
 
-        event_data_doc = prepare_for_mongo(event_data.dict())
+        event_data_doc = event_codec.encode(event_data)
         
-        result = await db.history.insert_one(event_data_doc)
+        result = await HistoryRepository(db).insert_one(event_data_doc)
         
         if not result.inserted_id:
             logger.error("Failed to create event: No inserted_id returned")
@@ -33,20 +37,19 @@ async def create_event(event_data: Event, db) -> str:
 async def get_group_history(group_id,db)->list[History]:
     try:
         logger.info(f"Fetching history for group: {group_id}")
-        group = await db.groups.find_one({"id": group_id})
-        if not group:
+        members = await GroupRepository(db).get_members(group_id)
+        if members is None:
             logger.error(f"Group not found")
             raise HTTPException(status_code=404, detail="Group not found")
         
-        group = Group(**group)
-        members = group.members
+        members = [Member(**member) for member in members]
+        history_repository = HistoryRepository(db)
 
         history_list = []
 
         for member in members:
-            events_cursor = db.history.find({"user_id": member.user_id}).limit(100)
-            events = await events_cursor.to_list(length=100)
-            event_objects = [Event(**event) for event in events]
+            events = await history_repository.get_by_user_id(member.user_id, limit=100)
+            event_objects = [event_codec.load(event) for event in events]
             
             history = History(
                 user_name=member.user_name,
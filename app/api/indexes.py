@@ -0,0 +1,20 @@
+from app.api.profiles.indexes import INDEXES as profiles_indexes
+from app.api.auth.indexes import INDEXES as auth_indexes
+from app.api.users.indexes import INDEXES as users_indexes
+from app.api.missions.indexes import INDEXES as missions_indexes
+from app.api.history.indexes import INDEXES as history_indexes
+from app.api.second_missions.indexes import INDEXES as secondary_indexes
+from app.api.assignments.indexes import INDEXES as assignments_indexes
+from app.api.group.indexes import INDEXES as group_indexes
+
+# Every index the application relies on, reconciled at startup.
+INDEX_REGISTRY = [
+    *profiles_indexes,
+    *auth_indexes,
+    *users_indexes,
+    *missions_indexes,
+    *history_indexes,
+    *secondary_indexes,
+    *assignments_indexes,
+    *group_indexes,
+]
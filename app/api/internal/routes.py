@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends
+from app.api.assignments.outbox import finalization_outbox
+from app.api.auth.allowlist import email_allowlist
+from app.api.users.cache import user_cache
+from app.api.users.service import get_current_admin
+from app.core.hashing import password_executor
+from app.core.security import access_claims_cache
+from app.database.monitoring import pool_stats, query_stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only mounted with INTERNAL_ENDPOINTS_ENABLED, and only for admins
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+@router.get("/pool-stats", response_model=dict)
+async def get_pool_stats():
+    "Connection pool usage: checked out connections, wait queue depth and checkout latency."
+    return pool_stats.snapshot()
+
+@router.get("/query-stats", response_model=dict)
+async def get_query_stats():
+    "Database time per route, collection and operation, plus the most recent slow queries."
+    return query_stats.snapshot()
+
+@router.get("/user-cache", response_model=dict)
+async def get_user_cache_stats():
+    "Authenticated user cache size, hit and miss counters, evictions and invalidations."
+    return user_cache.snapshot()
+
+@router.get("/token-cache", response_model=dict)
+async def get_token_cache_stats():
+    "Verified access-token claims cache size and hit and miss counters."
+    return access_claims_cache.snapshot()
+
+@router.get("/password-hashing", response_model=dict)
+async def get_password_hashing_stats():
+    "bcrypt executor load: queue depth, running calls, rejections and timeouts."
+    return password_executor.snapshot()
+
+@router.get("/email-allowlist", response_model=dict)
+async def get_email_allowlist_stats():
+    "In-memory registration allowlist: size, representation and refresh counters."
+    return email_allowlist.snapshot()
+
+@router.get("/finalization-outbox", response_model=dict)
+async def get_finalization_outbox_stats():
+    "Vote finalization worker: batches, entries finalized, failed attempts and entries given up on."
+    return finalization_outbox.snapshot()
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from pydantic import TypeAdapter
+from app.core.config import settings
+from .repository import CatalogVersionRepository, LogroRepository, MissionRepository
+from .schemas import CatalogMission, Logro, Mission
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Dumped as Mission, so server-only CatalogMission fields never reach the clients
+_missions_adapter = TypeAdapter(list[Mission])
+_logros_adapter = TypeAdapter(list[Logro])
+
+@dataclass(frozen=True)
+class Progression:
+    """Where a primary mission sits in the chain."""
+    mission_id: str
+    level: int
+    next_id: Optional[str] = None
+    logro_name: Optional[str] = None
+
+def build_progression(missions: list[CatalogMission], logros: list[Logro]) -> dict[str, Progression]:
+    """
+    Successor, level and logro of every mission, from missions already in catalog order.
+    - A mission's `siguiente` names its successor; without it the next mission in order follows,
+      so gaps in the ids are skipped. The last mission has no successor.
+    - A successor that is not in the catalog is dropped (and logged), ending the chain there.
+    - The logro is the one embedded in the mission, or else the logro whose idMision points to it.
+    """
+    ids = {mission.id for mission in missions}
+    logro_names = {logro.idMision: logro.nombre for logro in logros}
+    progression = {}
+    for position, mission in enumerate(missions):
+        if mission.siguiente is None:
+            next_id = missions[position + 1].id if position + 1 < len(missions) else None
+        elif mission.siguiente in ids and mission.siguiente != mission.id:
+            next_id = mission.siguiente
+        else:
+            logger.warning(f"Mission {mission.id} names an unknown successor: {mission.siguiente}")
+            next_id = None
+        progression[mission.id] = Progression(
+            mission_id=mission.id,
+            level=mission.nivel.numeroNivel,
+            next_id=next_id,
+            logro_name=mission.logro.nombre if mission.logro else logro_names.get(mission.id)
+        )
+    return progression
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Immutable view of the mission and logro catalog.
+    A reseed builds a new snapshot and swaps it in, so readers never see a half-loaded catalog.
+    """
+    # Catalog version stored in the database when the snapshot was read, the same in every worker
+    version: int = 0
+    missions: dict[str, CatalogMission] = field(default_factory=dict)
+    logros: dict[str, Logro] = field(default_factory=dict)
+    # Pre-serialized list responses, served without validating or encoding again
+    missions_json: bytes = b"[]"
+    logros_json: bytes = b"[]"
+    etag: str = '"empty"'
+    progression: dict[str, Progression] = field(default_factory=dict)
+    # Where new assignments start: the first mission in order that no other mission leads to
+    first_mission_id: Optional[str] = None
+
+    def get_mission(self, mission_id: str) -> Optional[Mission]:
+        return self.missions.get(mission_id)
+
+    def get_progression(self, mission_id: str) -> Optional[Progression]:
+        return self.progression.get(mission_id)
+
+    def get_next_mission(self, mission_id: str) -> Optional[Mission]:
+        "The mission that follows; None at the end of the chain or for an unknown mission"
+        step = self.progression.get(mission_id)
+        return self.missions.get(step.next_id) if step and step.next_id else None
+
+    def get_reward(self, mission_id: str) -> Optional[str]:
+        mission = self.missions.get(mission_id)
+        return mission.recompensa if mission else None
+
+    def get_logro_name(self, mission_id: str) -> Optional[str]:
+        step = self.progression.get(mission_id)
+        return step.logro_name if step else None
+
+def _mission_sort_key(mission_id: str):
+    # Ids are numeric strings; order them numerically and keep any other id after them
+    return (0, int(mission_id), "") if mission_id.isdigit() else (1, 0, mission_id)
+
+class MissionCatalog:
+    """
+    Process-wide holder of the current catalog snapshot.
+    - A reseed bumps the catalog version stored in the database (publish).
+    - Every CATALOG_REFRESH_SECONDS each worker compares that version with its snapshot's and reloads
+      when they differ, so workers that did not serve the reseed catch up within that interval.
+    """
+
+    def __init__(self):
+        self._snapshot = CatalogSnapshot()
+        self._lock = asyncio.Lock()
+        self._checked_at = 0.0
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    async def reload(self, db) -> CatalogSnapshot:
+        "Read both collections and atomically replace the current snapshot"
+        async with self._lock:
+            # Read first: a reseed in between leaves an older version and is picked up by the next check
+            version = await CatalogVersionRepository(db).get_version()
+            self._checked_at = time.monotonic()
+            mission_docs = await MissionRepository(db).get_all()
+            logro_docs = await LogroRepository(db).get_all()
+
+            missions = sorted((CatalogMission(**doc) for doc in mission_docs), key=lambda m: _mission_sort_key(m.id))
+            logros = sorted((Logro(**doc) for doc in logro_docs), key=lambda l: _mission_sort_key(l.id))
+            missions_json = _missions_adapter.dump_json(missions)
+            logros_json = _logros_adapter.dump_json(logros)
+            digest = hashlib.sha256(missions_json + b"\0" + logros_json).hexdigest()[:16]
+            progression = build_progression(missions, logros)
+            followers = {step.next_id for step in progression.values()}
+            first_mission_id = next((mission.id for mission in missions if mission.id not in followers), None)
+
+            snapshot = CatalogSnapshot(
+                version=version,
+                missions={mission.id: mission for mission in missions},
+                logros={logro.id: logro for logro in logros},
+                missions_json=missions_json,
+                logros_json=logros_json,
+                etag=f'"{digest}"',
+                progression=progression,
+                first_mission_id=first_mission_id
+            )
+            self._snapshot = snapshot
+            logger.info(
+                f"Mission catalog v{snapshot.version} loaded: "
+                f"{len(snapshot.missions)} missions, {len(snapshot.logros)} logros"
+            )
+            return snapshot
+
+    async def publish(self, db) -> CatalogSnapshot:
+        "After a reseed: bump the stored version so the other workers reload, then reload this one"
+        await CatalogVersionRepository(db).bump()
+        return await self.reload(db)
+
+    def is_due(self) -> bool:
+        return time.monotonic() - self._checked_at >= settings.CATALOG_REFRESH_SECONDS
+
+    async def refresh(self, db) -> CatalogSnapshot:
+        "Reload if another worker published a different version; keeps serving the current snapshot on errors"
+        # Marked before the read so concurrent requests do not all check
+        self._checked_at = time.monotonic()
+        try:
+            if await CatalogVersionRepository(db).get_version() != self._snapshot.version:
+                return await self.reload(db)
+        except Exception:
+            logger.exception("Could not check the mission catalog version")
+        return self._snapshot
+
+catalog = MissionCatalog()
+
+async def get_catalog(db) -> CatalogSnapshot:
+    "Current snapshot, loaded on first use when startup found the catalog empty and refreshed when due"
+    snapshot = catalog.snapshot
+    if not snapshot.missions:
+        snapshot = await catalog.reload(db)
+    elif catalog.is_due():
+        snapshot = await catalog.refresh(db)
+    return snapshot
@@ -0,0 +1,6 @@
+from app.database.indexes import IndexSpec
+
+INDEXES = [
+    IndexSpec(collection="missions", keys=[("id", 1)], name="missions_id_unique", unique=True),
+    IndexSpec(collection="logros", keys=[("id", 1)], name="logros_id_unique", unique=True),
+]
@@ -0,0 +1,36 @@
+from typing import Optional
+from pymongo import ReturnDocument
+from app.database.repository import Repository
+
+MISSION_FIELDS = {"_id": 0}
+LOGRO_FIELDS = {"_id": 0}
+CATALOG_VERSION_ID = "catalog"
+
+class MissionRepository(Repository):
+    collection_name = "missions"
+
+    async def get_all(self, projection: dict = MISSION_FIELDS, limit: Optional[int] = None) -> list[dict]:
+        return await self.find_many({}, projection, limit=limit)
+
+class LogroRepository(Repository):
+    collection_name = "logros"
+
+    async def get_all(self, projection: dict = LOGRO_FIELDS, limit: Optional[int] = None) -> list[dict]:
+        return await self.find_many({}, projection, limit=limit)
+
+class CatalogVersionRepository(Repository):
+    """Version of the mission catalog, bumped on every reseed so every worker reloads it."""
+    collection_name = "catalog_meta"
+
+    async def get_version(self) -> int:
+        document = await self.find_one({"_id": CATALOG_VERSION_ID}, {"version": 1})
+        return document["version"] if document else 0
+
+    async def bump(self) -> int:
+        document = await self.collection.find_one_and_update(
+            {"_id": CATALOG_VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return document["version"]
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from app.api.users.service import get_current_user_id
 from app.database.database import get_database
+from .catalog import CatalogSnapshot, catalog, get_catalog
 from .schemas import Logro, Mission
 from .service import initialize_logros, initialize_missions
 import logging
@@ -9,15 +10,22 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def catalog_response(request: Request, snapshot: CatalogSnapshot, content: bytes) -> Response:
+    "Serve a pre-serialized catalog list, answering 304 when the client already has this version"
+    headers = {"ETag": snapshot.etag, "X-Catalog-Version": str(snapshot.version)}
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
+
 @router.get("", response_model=list[Mission])
-async def get_all_missions(db=Depends(get_database),user_id: str = Depends(get_current_user_id)):
+async def get_all_missions(request: Request, db=Depends(get_database),user_id: str = Depends(get_current_user_id)):
     try:
         logger.info("Retrieving all missions")
-        missions = await db.missions.find().to_list(100)
-        if not missions :
+        snapshot = await get_catalog(db)
+        if not snapshot.missions:
             logger.error("No missions found")
             raise HTTPException(status_code=404, detail="No missions found")
-        return [Mission(**mission) for mission in missions]
+        return catalog_response(request, snapshot, snapshot.missions_json)
     except HTTPException:
         raise
     except Exception as e:
@@ -25,14 +33,14 @@ async def get_all_missions(db=Depends(get_database),user_id: str = Depends(get_c
         raise HTTPException(status_code=500, detail="Error retrieving missions")
 
 @router.get("/logros", response_model=list[Logro])
-async def get_missions_logros(db=Depends(get_database),user_id: str = Depends(get_current_user_id)):
+async def get_missions_logros(request: Request, db=Depends(get_database),user_id: str = Depends(get_current_user_id)):
     try:
         logger.info("Retrieving all logros")
-        logros = await db.logros.find().to_list(100)
-        if not logros:
+        snapshot = await get_catalog(db)
+        if not snapshot.logros:
             logger.error("No logros found")
             raise HTTPException(status_code=404, detail="No logros found")
-        return [Logro(**logro) for logro in logros]
+        return catalog_response(request, snapshot, snapshot.logros_json)
     except HTTPException:
         raise
     except Exception as e:
@@ -43,11 +51,11 @@ async def get_missions_logros(db=Depends(get_database),user_id: str = Depends(ge
 async def get_mission(mission_id: str, db=Depends(get_database),user_id: str = Depends(get_current_user_id)):
     try:
         logger.info(f"Retrieving mission with ID: {mission_id}")
-        mission = await db.missions.find_one({"id": mission_id})
+        mission = (await get_catalog(db)).get_mission(mission_id)
         if mission is None:
             logger.error(f"Mission not found")
             raise HTTPException(status_code=404, detail="Mission not found")
-        return Mission(**mission)
+        return mission
     except HTTPException:
         raise
     except Exception as e:
@@ -58,4 +66,15 @@ async def get_mission(mission_id: str, db=Depends(get_database),user_id: str = D
 async def initialize_missions_data(db=Depends(get_database),user_id: str = Depends(get_current_user_id)):
     resultMissions = await initialize_missions(db)
     resultLogros = await initialize_logros(db)
-    return {"message": f"Initialized {resultMissions} missions and {resultLogros} logros."}
\ No newline at end of file
+    snapshot = await catalog.publish(db)
+    return {
+        "message": (
+            f"Missions: {resultMissions['inserted']} inserted, {resultMissions['updated']} updated, "
+            f"{resultMissions['unchanged']} unchanged. "
+            f"Logros: {resultLogros['inserted']} inserted, {resultLogros['updated']} updated, "
+            f"{resultLogros['unchanged']} unchanged."
+        ),
+        "missions": resultMissions,
+        "logros": resultLogros,
+        "catalog_version": snapshot.version,
+    }
\ No newline at end of file
@@ -39,3 +39,8 @@ class Mission(BaseModel):
     extra: Optional[Extra] = None
     descripcion: str
     logro: Optional[MissionLogro] = None
+
+class CatalogMission(Mission):
+    """A mission as seeded and stored, with the fields only the server uses; served as Mission."""
+    # Id of the mission that follows; without it the next mission in id order follows
+    siguiente: Optional[str] = None
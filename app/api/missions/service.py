@@ -1,39 +1,41 @@
-from .schemas import Logro, Mission
+from .schemas import CatalogMission, Logro
 from fastapi import HTTPException,status
-import json
-from app.database.database import prepare_for_mongo
+from app.database.codec import codec_for
+from app.database.seeding import iter_json_array
+from .repository import LogroRepository, MissionRepository
 
 import logging
 logger = logging.getLogger(__name__)
 
-with open('./init_missions.json', 'r', encoding='utf-8') as f:
-    missions = json.load(f)
+mission_codec = codec_for(CatalogMission)
+logro_codec = codec_for(Logro)
 
-with open('./init_logros.json', 'r', encoding='utf-8') as f:
-    logros = json.load(f)
+MISSIONS_FILE = './init_missions.json'
+LOGROS_FILE = './init_logros.json'
 
-async def initialize_missions(db):
+def read_catalog(path: str, model, codec):
+    "Validate and encode the entries of a catalog file as they are read"
+    for entry in iter_json_array(path):
+        yield codec.encode(model(**entry))
+
+async def initialize_missions(db, path: str = MISSIONS_FILE) -> dict:
+    """Upsert the mission catalog keyed on id and return the inserted/updated/unchanged counts."""
     try:
         logger.info("Initializing missions data")
-        for mission in missions:
-            mission_obj = Mission(**mission)
-            mission_doc = prepare_for_mongo(mission_obj.dict())
-            await db.missions.insert_one(mission_doc)
-
+        report = await MissionRepository(db).bulk_upsert(read_catalog(path, CatalogMission, mission_codec))
+        logger.info(f"Missions seeded: {report}")
+        return report
     except Exception as e:
         logger.error(f"Error initializing missions: {type(e).__name__}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error initializing missions")
-    return len(missions)
 
-async def initialize_logros(db):
+async def initialize_logros(db, path: str = LOGROS_FILE) -> dict:
+    """Upsert the logro catalog keyed on id and return the inserted/updated/unchanged counts."""
     try:
         logger.info("Initializing logros data")
-        for logro in logros:
-            logro_obj = Logro(**logro)
-            logro_doc = prepare_for_mongo(logro_obj.dict())
-            await db.logros.insert_one(logro_doc)
-
+        report = await LogroRepository(db).bulk_upsert(read_catalog(path, Logro, logro_codec))
+        logger.info(f"Logros seeded: {report}")
+        return report
     except Exception as e:
         logger.error(f"Error initializing logros: {type(e).__name__}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error initializing logros")
-    return len(logros)
\ No newline at end of file
@@ -0,0 +1,8 @@
+from app.database.indexes import IndexSpec
+
+INDEXES = [
+    IndexSpec(collection="profiles", keys=[("user_id", 1)], name="profiles_user_id_unique", unique=True),
+    # Leaderboards: the members of a group by aura, and the global top
+    IndexSpec(collection="profiles", keys=[("group_id", 1), ("aura", -1)], name="profiles_group_aura"),
+    IndexSpec(collection="profiles", keys=[("aura", -1)], name="profiles_aura"),
+]
@@ -0,0 +1,120 @@
+"""
+Profile migrations, safe to stop at any point and run again.
+
+- aura: convert `profiles.aura` from the legacy string to a number. Only profiles whose aura is still
+  a string are read, so a new run continues where the last one stopped. Each conversion is written
+  only if the aura was not changed in between, and rewards applied meanwhile convert the profile themselves.
+- groups: copy `users.group_id` to `profiles.group_id`, which the leaderboards read.
+  Profiles that already hold the right group are not written.
+
+The API runs both in the background on every startup (PROFILE_MIGRATIONS_ON_STARTUP).
+To run them by hand, from the repository root:
+    python -m app.api.profiles.migration
+    python -m app.api.profiles.migration --only groups --batch-size 500 --dry-run
+"""
+import argparse
+import asyncio
+from app.api.users.repository import UserRepository
+from app.core.config import settings
+from .repository import ProfileRepository
+
+import logging
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = 1000
+# Migrations finished by this process; until then the leaderboards also read profiles they have not reached
+completed_migrations: set[str] = set()
+
+async def migrate_aura_to_int(db, batch_size: int = MIGRATION_BATCH_SIZE, dry_run: bool = False) -> dict:
+    "Convert string auras in batches; returns how many were read, converted and left as invalid"
+    profiles = ProfileRepository(db)
+    report = {"read": 0, "converted": 0, "invalid": 0}
+    last_id = None
+
+    while True:
+        batch = await profiles.get_string_auras(last_id, batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        report["read"] += len(batch)
+
+        conversions = []
+        for profile in batch:
+            try:
+                conversions.append((profile["_id"], profile["aura"], int(profile["aura"])))
+            except ValueError:
+                # Left as is and skipped; the API fails on it just like before
+                logger.error(f"Profile {profile['_id']} has a non-numeric aura: {profile['aura']!r}")
+                report["invalid"] += 1
+
+        if not dry_run:
+            report["converted"] += await profiles.convert_auras(conversions)
+        logger.info(f"Aura migration: {report['read']} read, {report['converted']} converted, {report['invalid']} invalid")
+
+        if len(batch) < batch_size:
+            break
+    return report
+
+async def backfill_group_ids(db, batch_size: int = MIGRATION_BATCH_SIZE, dry_run: bool = False) -> dict:
+    "Copy the group of every user that has one to their profile; returns how many were read and updated"
+    users = UserRepository(db)
+    profiles = ProfileRepository(db)
+    report = {"read": 0, "updated": 0}
+    last_id = None
+
+    while True:
+        batch = await users.get_group_ids(last_id, batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        report["read"] += len(batch)
+        if not dry_run:
+            report["updated"] += await profiles.set_groups([(user["id"], user["group_id"]) for user in batch])
+        logger.info(f"Group backfill: {report['read']} users read, {report['updated']} profiles updated")
+
+        if len(batch) < batch_size:
+            break
+    return report
+
+async def run_startup_migrations(db):
+    "Started by the lifespan in the background; a failed or interrupted run continues on the next startup"
+    if not settings.PROFILE_MIGRATIONS_ON_STARTUP:
+        # Then they are run by hand before deploying
+        completed_migrations.update({"aura", "groups"})
+        return
+    try:
+        report = await migrate_aura_to_int(db)
+        completed_migrations.add("aura")
+        logger.info(f"Aura migration finished: {report['converted']} converted, {report['invalid']} non-numeric")
+    except Exception:
+        logger.exception("The aura migration failed; it runs again on the next startup")
+    try:
+        report = await backfill_group_ids(db)
+        completed_migrations.add("groups")
+        logger.info(f"Group backfill finished: {report['updated']} profiles updated")
+    except Exception:
+        logger.exception("The group backfill failed; it runs again on the next startup")
+
+async def main():
+    from app.database.database import close_mongo_connection, connect_to_mongo
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="read and validate without writing")
+    parser.add_argument("--only", choices=["aura", "groups"], help="run a single migration")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(asctime)s - %(name)s - %(message)s')
+    db = await connect_to_mongo()
+    try:
+        if args.only in (None, "aura"):
+            report = await migrate_aura_to_int(db, args.batch_size, args.dry_run)
+            print(f"aura: profiles read {report['read']}, converted {report['converted']}, non-numeric {report['invalid']}")
+        if args.only in (None, "groups"):
+            report = await backfill_group_ids(db, args.batch_size, args.dry_run)
+            print(f"groups: users read {report['read']}, profiles updated {report['updated']}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
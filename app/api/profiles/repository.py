@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.database.repository import Repository
+
+import logging
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = {"_id": 0, "last_reward_ids": 0, "aura_week": 0, "aura_week_start": 0}
+# Reward bookkeeping used by the finalization worker
+PROFILE_REWARD_FIELDS = {"user_id": 1, "aura": 1, "aura_week": 1, "last_reward_ids": 1, "_id": 0}
+# How many applied reward ids a profile remembers to skip duplicates
+REWARD_IDS_KEPT = 100
+# What the group dashboard shows of each member
+PROFILE_SUMMARY_FIELDS = {"user_id": 1, "name": 1, "apodo": 1, "titulo": 1, "aura": 1, "img": 1, "_id": 0}
+# What a leaderboard row needs
+PROFILE_RANKING_FIELDS = {"user_id": 1, "name": 1, "apodo": 1, "aura": 1, "aura_week": 1, "aura_week_start": 1, "group_id": 1, "_id": 0}
+# What the mission generator needs to personalize a mission
+PROFILE_PROMPT_FIELDS = {
+    "name": 1, "apodo": 1, "peso_corporal": 1,
+    "altura": 1, "pesos": 1, "objetivo": 1, "_id": 0
+}
+
+def week_key(moment: datetime) -> str:
+    "ISO week a weekly aura delta belongs to, e.g. '2026-W42'"
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+class ProfileRepository(Repository):
+    collection_name = "profiles"
+
+    async def get_by_user_id(self, user_id: str, projection: dict = PROFILE_FIELDS) -> Optional[dict]:
+        return await self.find_one({"user_id": user_id}, projection)
+
+    async def get_by_user_ids(self, user_ids: list[str], projection: dict = PROFILE_FIELDS) -> list[dict]:
+        return await self.find_many({"user_id": {"$in": user_ids}}, projection, limit=len(user_ids))
+
+    async def get_group_ranking(self, group_id: str, limit: int) -> list[dict]:
+        "Members of a group by aura, highest first (profiles_group_aura index)"
+        return await self.find_many({"group_id": group_id}, PROFILE_RANKING_FIELDS, sort=[("aura", -1)], limit=limit)
+
+    async def get_members_ranking(self, user_ids: list[str]) -> list[dict]:
+        "Leaderboard rows of the given users, for profiles that may not hold their group_id yet"
+        return await self.get_by_user_ids(user_ids, PROFILE_RANKING_FIELDS)
+
+    async def get_top_ranking(self, limit: int) -> list[dict]:
+        "Profiles with the highest numeric aura across all groups (profiles_aura index)"
+        # Strings sort above every number in BSON order, so unmigrated profiles are read apart
+        return await self.find_many({"aura": {"$type": "number"}}, PROFILE_RANKING_FIELDS, sort=[("aura", -1)], limit=limit)
+
+    async def get_string_aura_ranking(self) -> list[dict]:
+        "Leaderboard rows of the profiles still holding the aura as a string"
+        return await self.find_many({"aura": {"$type": "string"}}, PROFILE_RANKING_FIELDS)
+
+    async def set_group(self, user_id: str, group_id: Optional[str]):
+        "Mirror users.group_id, so rankings can be read from profiles alone"
+        return await self.collection.update_one({"user_id": user_id}, {"$set": {"group_id": group_id}})
+
+    async def set_groups(self, groups: list[tuple[str, str]]) -> int:
+        "Write (user_id, group_id) pairs in one batch; returns how many profiles changed"
+        if not groups:
+            return 0
+        result = await self.collection.bulk_write(
+            [UpdateOne({"user_id": user_id, "group_id": {"$ne": group_id}}, {"$set": {"group_id": group_id}})
+             for user_id, group_id in groups],
+            ordered=False
+        )
+        return result.modified_count
+
+    async def clear_group(self, group_id: str):
+        return await self.collection.update_many({"group_id": group_id}, {"$set": {"group_id": None}})
+
+    async def get_aura(self, user_id: str) -> Optional[int]:
+        profile = await self.find_one({"user_id": user_id}, {"aura": 1, "_id": 0})
+        return int(profile["aura"]) if profile else None
+
+    async def apply_rewards(self, rewards: list[tuple[dict, list[str], int]], week: str):
+        """
+        Add rewards to several profiles in one batch. Each item is (profile, reward_ids, amount), where the profile
+        holds the PROFILE_REWARD_FIELDS that were read. A profile that already recorded one of the ids is
+        left as is; callers check last_reward_ids to see what was applied.
+        - A numeric aura gets a $inc.
+        - A string aura, not migrated yet, is converted: the sum is written only if the aura is still the one read.
+        - The first reward of a `week` also records the aura it started from (aura_week_start), again only
+          if the aura is still the one read, so leaderboards can show the weekly delta.
+        """
+        requests = []
+        for profile, reward_ids, amount in rewards:
+            filter = {"user_id": profile["user_id"], "last_reward_ids": {"$nin": reward_ids}}
+            remember = {"last_reward_ids": {"$each": reward_ids, "$slice": -REWARD_IDS_KEPT}}
+            aura = profile.get("aura")
+            if isinstance(aura, str):
+                try:
+                    aura = int(aura)
+                except ValueError:
+                    logger.error(f"Profile {profile['user_id']} has a non-numeric aura: {aura!r}")
+                    continue
+                filter["aura"] = profile["aura"]
+                update = {"$set": {"aura": aura + amount}, "$push": remember}
+            elif profile.get("aura_week") != week:
+                filter["aura"] = aura
+                update = {"$set": {"aura": (aura or 0) + amount}, "$push": remember}
+            else:
+                update = {"$inc": {"aura": amount}, "$push": remember}
+            if profile.get("aura_week") != week:
+                update["$set"].update({"aura_week": week, "aura_week_start": aura or 0})
+            requests.append(UpdateOne(filter, update))
+        if requests:
+            try:
+                await self.collection.bulk_write(requests, ordered=False)
+            except BulkWriteError as e:
+                # The other updates were applied; the failed ones show up as missing reward ids
+                logger.error(f"Some rewards could not be applied: {e.details['writeErrors']}")
+
+    async def get_string_auras(self, after_id, limit: int) -> list[dict]:
+        "Profiles still holding the aura as a string, in _id order"
+        filter = {"aura": {"$type": "string"}}
+        if after_id is not None:
+            filter["_id"] = {"$gt": after_id}
+        return await self.find_many(filter, {"aura": 1}, sort=[("_id", 1)], limit=limit)
+
+    async def convert_auras(self, auras: list[tuple]) -> int:
+        "Write (_id, string aura, number) conversions, each only if the aura was not changed meanwhile"
+        if not auras:
+            return 0
+        result = await self.collection.bulk_write(
+            [UpdateOne({"_id": _id, "aura": old}, {"$set": {"aura": new}}) for _id, old, new in auras],
+            ordered=False
+        )
+        return result.modified_count
+
+class SummaryRepository(Repository):
+    collection_name = "summary"
+
+    async def get_synthesized_profile(self, user_id: str) -> Optional[dict]:
+        return await self.find_one({"user_id": user_id}, {"perfil_sintetizado": 1, "_id": 0})
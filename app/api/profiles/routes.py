@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException,status
 from app.api.auth.schemas import User
 from app.api.users.service import get_current_user, get_current_user_id
-from app.database.database import get_database, parse_from_mongo
+from app.database.database import get_database
 from .schemas import EventResponse, Profile, ProfileInit, ProfileUpdate
-from .service import initialize_profile_data, update_the_profile_info
+from .service import initialize_profile_data, profile_codec, update_the_profile_info
+from .repository import ProfileRepository
+from app.api.group.repository import GroupRepository
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,11 +16,11 @@ router = APIRouter()
 async def get_profile(user_id:str=Depends(get_current_user_id),db=Depends(get_database)) -> Profile:
     try:
         logger.info(f"Retrieving profile for user {user_id}")
-        result = await db.profiles.find_one({"user_id": user_id})
+        result = await ProfileRepository(db).get_by_user_id(user_id)
         if not result:
             logger.error("Profile not found")
             raise HTTPException(status_code=404,detail="Profile not found")
-        return Profile(**parse_from_mongo(result))
+        return profile_codec.load(result)
     except HTTPException:
         raise
     except Exception as e:
@@ -40,14 +42,13 @@ async def update_profile_info(profile_info: ProfileUpdate,user_id:str=Depends(ge
 async def get_profiles_data(group_id:str,db=Depends(get_database),user_id:str=Depends(get_current_user_id)):
     try:
         logger.info(f"Retrieving profiles for group {group_id}")
-        group = await db.groups.find_one({"id":group_id})
-        if not group:
+        members = await GroupRepository(db).get_members(group_id)
+        if members is None:
             logger.error("Group not found")
             raise HTTPException(status_code=404, detail="Group not found")
-        members = group["members"]
         user_ids = [member["user_id"] for member in members]
 
-        profiles = await db.profiles.find({"user_id": {"$in": user_ids}}).to_list(len(members))
+        profiles = await ProfileRepository(db).get_by_user_ids(user_ids)
         return [Profile(**profile) for profile in profiles]
     
     except HTTPException:
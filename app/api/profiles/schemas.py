@@ -1,5 +1,5 @@
 import uuid
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer
 from typing import Dict, Optional
 
 class EventResponse(BaseModel):
@@ -27,12 +27,18 @@ class Profile(BaseModel):
     pesos: Pesos # updateable
     apodo: str = "" # updateable
     titulo: str = "" # te lo asigna la pagina
-    aura: str = "0" # te lo asigna la pagina
+    aura: int = 0 # te lo asigna la pagina; older documents hold it as a string
     deuda: Optional[Deuda] = None # te lo asigna la pagina
     mujeres: str = "" # updateable
     frase: str = ""# updateable
     objetivo: str = "" # updateable
     img: str = ""
+    group_id: Optional[str] = None # mirrors users.group_id, for the leaderboards
+
+    @field_serializer("aura", when_used="json")
+    def serialize_aura(self, aura: int) -> str:
+        "Stored as a number, sent as a string until clients migrate"
+        return str(aura)
 
 class ProfileUpdate(BaseModel):
     apodo: Optional[str] = None
@@ -1,7 +1,8 @@
 from app.api.errors import ERROR_CODES
 from app.api.users.schemas import UpdateUser, User
 from .schemas import EventResponse, Profile, ProfileInit, ProfileUpdate
-from app.database.database import parse_from_mongo, prepare_for_mongo
+from app.database.codec import codec_for
+from .repository import PROFILE_FIELDS, ProfileRepository
 from fastapi import HTTPException,status
 import logging
 from app.api.users.service import update_user_info
@@ -9,6 +10,8 @@ from app.api.assignments.service import create_assignments
 
 logger = logging.getLogger(__name__)
 
+profile_codec = codec_for(Profile)
+
 async def initialize_profile_data(
     user: User,
     profile_init_data: ProfileInit, 
@@ -17,9 +20,9 @@ async def initialize_profile_data(
     
     try:
         logger.info(f"Initializing profile for user {user.id}")
-        existing_profile = await db.profiles.find_one({"user_id": user.id})
+        profiles = ProfileRepository(db)
         
-        if existing_profile:
+        if await profiles.exists({"user_id": user.id}):
             logger.error("Profile already exists")
             raise HTTPException(status_code=status.HTTP_409_CONFLICT,detail="Profile already exists")
 
@@ -36,17 +39,18 @@ async def initialize_profile_data(
             "frase": profile_init_data.frase or "",
             "objetivo": profile_init_data.objetivo or "",
             "titulo": "",
-            "aura": "0",
+            "aura": 0,
             "mujeres": "",
             "img": "",
             "deuda": None,
+            "group_id": user.group_id,
         }
         
         profile_obj = Profile(**profile_dict)
 
-        profile_doc = prepare_for_mongo(profile_obj.dict())
+        profile_doc = profile_codec.encode(profile_obj)
         
-        profile_result = await db.profiles.insert_one(profile_doc)
+        profile_result = await profiles.insert_one(profile_doc)
         profile_id = profile_result.inserted_id
 
         if not profile_id:
@@ -82,26 +86,24 @@ async def update_the_profile_info(user_id: str, profile_info: ProfileUpdate, db)
     try:
         logger.info(f"Updating profile for user {user_id}")
         update_data = profile_info.dict(exclude_none=True)
-        
-        existing_profile = await db.profiles.find_one({"user_id": user_id})
-        
-        if not existing_profile:
-            logger.error(f"Profile not found")
-            return HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Profile not found")
+        profiles = ProfileRepository(db)
 
-        result = await db.profiles.update_one(
-            {"user_id": user_id}, 
-            {"$set": update_data}
-        )
-
-        if result.modified_count > 0:
-            logger.info(f"Profile updated successfully")
-            profile_response = await db.profiles.find_one({"user_id": user_id})
-        else:
+        if not update_data:
+            profile_response = await profiles.get_by_user_id(user_id)
+            if not profile_response:
+                logger.error(f"Profile not found")
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Profile not found")
             logger.info(f"No changes were made to the user profile.")
-            profile_response = existing_profile
+            return profile_codec.load(profile_response)
 
-        return Profile(**parse_from_mongo(profile_response))
+        profile_response = await profiles.update_and_return(
+            {"user_id": user_id},
+            {"$set": update_data},
+            PROFILE_FIELDS,
+            not_found_detail="Profile not found"
+        )
+        logger.info(f"Profile updated successfully")
+        return profile_codec.load(profile_response)
 
     except HTTPException:
         raise
@@ -0,0 +1,6 @@
+from app.database.indexes import IndexSpec
+
+INDEXES = [
+    IndexSpec(collection="secondary", keys=[("id", 1)], name="secondary_id_unique", unique=True),
+    IndexSpec(collection="secondary", keys=[("user_id", 1)], name="secondary_user_id"),
+]
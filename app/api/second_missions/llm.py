@@ -0,0 +1,54 @@
+import asyncio
+from functools import lru_cache
+from fastapi import HTTPException, status
+from app.core.config import settings
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Bounds the Gemini calls in flight in this process; callers beyond it wait their turn
+_llm_slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+
+@lru_cache(maxsize=1)
+def get_genai_client():
+    """
+    Gemini client, created on first use.
+    google.genai takes about a second to import, so it is only loaded when a mission is generated.
+    GEMINI_BASE_URL points it at another endpoint, e.g. benchmarks/fake_llm_server.py.
+    """
+    if not settings.GOOGLE_API_KEY:
+        logger.error("GOOGLE_API_KEY is not configured")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The mission generator is not configured."
+        )
+    from google import genai
+    from google.genai import types
+    return genai.Client(
+        api_key=settings.GOOGLE_API_KEY,
+        http_options=types.HttpOptions(base_url=settings.GEMINI_BASE_URL) if settings.GEMINI_BASE_URL else None
+    )
+
+async def generate_text(prompt: str) -> str:
+    """
+    Text of a Gemini completion, through the async client so the event loop keeps serving other requests.
+    The call is cancelled after GEMINI_TIMEOUT_SECONDS (504); any other failure is a 422.
+    """
+    client = get_genai_client()
+    async with _llm_slots:
+        try:
+            response = await asyncio.wait_for(
+                client.aio.models.generate_content(model=settings.GEMINI_MODEL, contents=prompt),
+                timeout=settings.GEMINI_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"The Gemini API did not answer within {settings.GEMINI_TIMEOUT_SECONDS}s")
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="The Gemini API timed out.")
+        except Exception as e:
+            logger.error(f"Error calling the Gemini API.: {str(e)}")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Error calling the Gemini API.")
+
+    if not response.text:
+        logger.error("Gemini API response is empty")
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Gemini API response is empty.")
+    return response.text
@@ -0,0 +1,21 @@
+from typing import Optional
+from app.database.repository import Repository
+
+SECONDARY_MISSION_FIELDS = {"_id": 0}
+
+class SecondaryMissionRepository(Repository):
+    collection_name = "secondary"
+
+    async def get_by_id(self, mission_id: str, projection: dict = SECONDARY_MISSION_FIELDS) -> Optional[dict]:
+        return await self.find_one({"id": mission_id}, projection)
+
+    async def get_all(self, projection: dict = SECONDARY_MISSION_FIELDS, limit: Optional[int] = None) -> list[dict]:
+        return await self.find_many({}, projection, limit=limit)
+
+    async def get_reward(self, mission_id: str) -> Optional[str]:
+        mission = await self.find_one({"id": mission_id}, {"recompensa": 1, "_id": 0})
+        return mission["recompensa"] if mission else None
+
+    async def get_rewards(self, mission_ids: list[str]) -> dict[str, str]:
+        missions = await self.find_many({"id": {"$in": mission_ids}}, {"id": 1, "recompensa": 1, "_id": 0}, limit=len(mission_ids))
+        return {mission["id"]: mission["recompensa"] for mission in missions}
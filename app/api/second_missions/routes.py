@@ -3,6 +3,7 @@ from app.api.users.service import get_current_user_id
 from app.database.database import get_database
 from .schemas import SecondaryMission
 from .service import create_secondary_mission
+from .repository import SecondaryMissionRepository
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,7 +14,7 @@ router = APIRouter()
 async def get_missions(user_id:str=Depends(get_current_user_id),db=Depends(get_database)):
     try:
         logger.info("Get all the secondary missions")
-        missions = await db.secondary.find().to_list(100)
+        missions = await SecondaryMissionRepository(db).get_all(limit=100)
         if not missions:
             logger.info("No secondary missions found")
             raise HTTPException(status_code=404, detail="No secondary missions found")
@@ -4,41 +4,30 @@ import re
 
 from fastapi import HTTPException,status
 from .schemas import MissionApi, SecondaryMission
-from app.database.database import prepare_for_mongo
-from app.core.config import settings
-from google import genai
+from app.database.codec import codec_for
+from app.api.history.repository import EVENT_PROMPT_FIELDS, HistoryRepository
+from app.api.profiles.repository import PROFILE_PROMPT_FIELDS, ProfileRepository, SummaryRepository
+from .repository import SecondaryMissionRepository
+from .llm import generate_text
 from typing import Optional
 
 import logging
 logger = logging.getLogger(__name__)
 
-GOOGLE_API_KEY = settings.GOOGLE_API_KEY
-client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+secondary_codec = codec_for(SecondaryMission)
 
 async def create_secondary_mission(user_id:str,db,instruction:Optional[str]=None) -> SecondaryMission:
     try:
         logger.info(f"creating a secondary mission for the user: {str(user_id)}")
-        profile = await db.profiles.find_one(
-            {"user_id": user_id},
-            {   
-                "name": 1, "apodo": 1, "peso_corporal": 1,
-                "altura": 1, "pesos": 1, "objetivo": 1, "_id": 0
-            }
-        )
+        profile = await ProfileRepository(db).get_by_user_id(user_id, PROFILE_PROMPT_FIELDS)
     
         if not profile:
             logger.error("Profile not found")
             return HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Profile not found")
         
-        resumen = await db.summary.find_one(
-            {"user_id": user_id},
-            {"perfil_sintetizado": 1, "_id": 0}
-        )
+        resumen = await SummaryRepository(db).get_synthesized_profile(user_id)
         
-        history = await db.history.find(
-            {"user_id": user_id},
-            {"tipo": 1, "description": 1, "result": 1, "_id": 0}
-        ).to_list(100)
+        history = await HistoryRepository(db).get_by_user_id(user_id, EVENT_PROMPT_FIELDS, limit=100)
 
         if not instruction:
             instruction = """Eres un asistente que genera retos semanales personalizados para un grupo de amigos que se motivan en un juego donde cumplen retos y misiones
@@ -66,21 +55,7 @@ async def create_secondary_mission(user_id:str,db,instruction:Optional[str]=None
         """
 
         # Call Google Gemini API
-        try:
-            response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-            )
-        except Exception as e:
-            logger.error(f"Error calling the Gemini API.: {str(e)}")
-            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,detail="Error calling the Gemini API.")
-
-        # Procesar la respuesta
-        if not response.text:
-            logger.error("Gemini API response is empty")
-            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,detail="Gemini API response is empty.")
-
-        mission_content = response.text
+        mission_content = await generate_text(prompt)
         
         # Clean and parse the JSON
         try:
@@ -121,7 +96,7 @@ async def create_secondary_mission(user_id:str,db,instruction:Optional[str]=None
             logger.error(f"Error validating mission data.: {str(e)}"),
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,detail="Error validating mission data.")
             
-        response = await db.secondary.insert_one(prepare_for_mongo(mission_obj.dict()))
+        response = await SecondaryMissionRepository(db).insert_one(secondary_codec.encode(mission_obj))
         logger.info(f"Secondary mission created successfully with id: {str(response.inserted_id)}")
         return mission_obj
     
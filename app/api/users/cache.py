@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import time
+from typing import Iterable, Optional
+from app.core.config import settings
+from .schemas import User
+
+class UserCache:
+    """
+    Bounded, per-process cache of authenticated users with a TTL.
+    - Least recently used entries are evicted when the cache is full.
+    - Services that change a user call invalidate(); the TTL bounds how stale another worker can be.
+    - Every invalidation bumps a generation, so a lookup that raced with it does not store the old user.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: str) -> Optional[User]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        # Callers get their own copy so they cannot change the cached user
+        return entry[1].model_copy()
+
+    def put(self, user: User, generation: int):
+        "Store a user read from the database while the cache was at `generation`"
+        if not self.enabled or generation != self.generation:
+            return
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user.model_copy())
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_ids: Iterable[str]):
+        self.generation += 1
+        for user_id in user_ids:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
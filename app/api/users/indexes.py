@@ -0,0 +1,7 @@
+from app.database.indexes import IndexSpec
+
+INDEXES = [
+    IndexSpec(collection="users", keys=[("id", 1)], name="users_id_unique", unique=True),
+    IndexSpec(collection="users", keys=[("email", 1)], name="users_email_unique", unique=True),
+    IndexSpec(collection="users", keys=[("group_id", 1)], name="users_group_id"),
+]
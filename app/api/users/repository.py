@@ -0,0 +1,49 @@
+from typing import Optional
+from pymongo.errors import OperationFailure
+from app.database.repository import Repository
+
+# Public user fields, never the password hash
+USER_FIELDS = {"_id": 0, "hashed_password": 0}
+# Everything needed to authenticate
+USER_WITH_PASSWORD_FIELDS = {"_id": 0}
+
+class UserRepository(Repository):
+    collection_name = "users"
+
+    async def get_by_id(self, user_id: str, projection: dict = USER_FIELDS) -> Optional[dict]:
+        return await self.find_one({"id": user_id}, projection)
+
+    async def get_by_email(self, email: str, projection: dict = USER_FIELDS) -> Optional[dict]:
+        return await self.find_one({"email": email}, projection)
+
+    async def has_unique_email_index(self) -> bool:
+        "Whether the database enforces unique emails"
+        try:
+            indexes = await self.collection.index_information()
+        except OperationFailure:
+            # The collection does not exist yet
+            return False
+        return any(
+            [(field, int(direction)) for field, direction in info["key"]] == [("email", 1)] and info.get("unique")
+            for info in indexes.values()
+        )
+
+    async def set_group(self, user_id: str, group_id: Optional[str]):
+        return await self.collection.update_one({"id": user_id}, {"$set": {"group_id": group_id}})
+
+    async def replace_password_hash(self, user_id: str, old_hash: str, new_hash: str):
+        "Swap the hash only if it was not changed since it was read"
+        return await self.collection.update_one(
+            {"id": user_id, "hashed_password": old_hash},
+            {"$set": {"hashed_password": new_hash}}
+        )
+
+    async def get_group_ids(self, after_id, limit: int) -> list[dict]:
+        "Users that belong to a group, in _id order"
+        filter = {"group_id": {"$ne": None}}
+        if after_id is not None:
+            filter["_id"] = {"$gt": after_id}
+        return await self.find_many(filter, {"id": 1, "group_id": 1}, sort=[("_id", 1)], limit=limit)
+
+    async def clear_group(self, group_id: str):
+        return await self.collection.update_many({"group_id": group_id}, {"$set": {"group_id": None}})
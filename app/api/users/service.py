@@ -1,21 +1,31 @@
 import jwt
 from app.core.security import decode_access_token
-from .schemas import UpdateUser, User, UserInDb
-from app.database.database import parse_from_mongo, get_database
+from .schemas import UpdateUser, User
+from .repository import USER_FIELDS, UserRepository
+from .cache import user_cache
+from app.api.profiles.repository import ProfileRepository
+from app.database.codec import codec_for
+from app.database.database import get_database
 import logging
 from fastapi import Depends, HTTPException,Request,status
 
 logger = logging.getLogger(__name__)
 
-async def get_user_by_id(user_id: str,db) -> UserInDb:
+user_codec = codec_for(User)
+
+ADMIN_ROLE = "admin"
+
+async def get_user_by_id(user_id: str,db) -> User:
     try:
         logger.info(f"Retrieving user by id: {user_id}")
-        user_data = await db.users.find_one({"id": user_id})
+        user_data = await UserRepository(db).get_by_id(user_id)
         if not user_data:
             logger.error(f"User with id {user_id} not found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User with id {user_id} not found")
-        return UserInDb(**parse_from_mongo(user_data))
+        return user_codec.load(user_data)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving user by id: {str(e)}")
         raise   HTTPException(
@@ -23,6 +33,15 @@ async def get_user_by_id(user_id: str,db) -> UserInDb:
             detail=f"Error retrieving user by id: {str(e)}"
         )
 
+async def get_cached_user(user_id: str, db) -> User:
+    "get_user_by_id through the per-process user cache"
+    user = user_cache.get(user_id)
+    if user is None:
+        generation = user_cache.generation
+        user = await get_user_by_id(user_id,db)
+        user_cache.put(user, generation)
+    return user
+
 async def get_current_user(request: Request, db=Depends(get_database)) -> User:
     try:
         logger.info("Retrieving current user from token")
@@ -32,25 +51,34 @@ async def get_current_user(request: Request, db=Depends(get_database)) -> User:
         # (opcional) verificar CSRF: comparar header 'x-csrf-token' con cookie 'csrf_token'
         
         payload = decode_access_token(token)
+        if payload is None:
+            logger.error("Invalid token")
+            raise HTTPException(status_code=401, detail="Invalid token")
         
         user_id: str = payload.get("sub")
         if user_id is None:
             logger.error("Invalid token")
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        user:UserInDb = await get_user_by_id(user_id,db)
+        user = await get_cached_user(user_id,db)
         if user is None:
             logger.error("User not found")
             raise HTTPException(status_code=401, detail="User not found")
         
-        # Public model
-        return User(**user.dict())
+        return user
     except HTTPException:
         raise
     except jwt.PyJWTError as e:
         logger.error(f"Invalid token error: {str(e)}")
         raise HTTPException(status_code=401, detail=f"Invalid token error: {str(e)}")
 
+async def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    "The current user, if it has the admin role"
+    if user.role != ADMIN_ROLE:
+        logger.error(f"User {user.id} is not an admin")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return user
+
 async def get_current_user_id(request: Request, db=Depends(get_database)) -> str:
     try:
         logger.info("Retrieving current user ID from token")
@@ -59,6 +87,9 @@ async def get_current_user_id(request: Request, db=Depends(get_database)) -> str
             logger.error("No access token found in cookies")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No access token found in cookies")
         payload = decode_access_token(token)
+        if payload is None:
+            logger.error("Invalid token")
+            raise HTTPException(status_code=401, detail="Invalid token")
         
         user_id: str = payload.get("sub")
         if user_id is None:
@@ -68,7 +99,7 @@ async def get_current_user_id(request: Request, db=Depends(get_database)) -> str
         return user_id
     except HTTPException:
         raise
-    except jwt.PyJWTErrora as e:
+    except jwt.PyJWTError as e:
         logger.error(f"Invalid token error: {str(e)}")
         raise HTTPException(status_code=401, detail=f"Invalid token error: {str(e)}")
     
@@ -77,21 +108,28 @@ async def update_user_info(user: User, user_info: UpdateUser, db)->User:
         logger.info(f"Updating user {user.id}")
         update_data = user_info.dict(exclude_none=True)
 
-        result = await db.users.update_one(
-            {"id": user.id}, 
-            {"$set": update_data}
-        )
-        
-        if result.modified_count > 0:
-            logger.info(f"User {user.id} updated successfully")
-            user_db:UserInDb = await get_user_by_id(user.id,db)
-            user_response = User(**user_db.dict())
-        else:
-            user_response = user
+        if update_data.get("role") == ADMIN_ROLE and user.role != ADMIN_ROLE:
+            logger.error(f"User {user.id} tried to grant itself the admin role")
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="The admin role cannot be self-assigned")
+
+        if not update_data:
             logger.info(f"No changes were made to the user {user.id} ")
-            
-        return user_response
+            return user
+
+        updated_user = await UserRepository(db).update_and_return(
+            {"id": user.id},
+            {"$set": update_data},
+            USER_FIELDS,
+            not_found_detail=f"User with id {user.id} not found"
+        )
+        user_cache.invalidate([user.id])
+        if "group_id" in update_data:
+            await ProfileRepository(db).set_group(user.id, update_data["group_id"])
+        logger.info(f"User {user.id} updated successfully")
+        return user_codec.load(updated_user)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating user: {str(e)}")
         raise HTTPException(
@@ -1,4 +1,5 @@
 #from pydantic import field_validator
+from typing import Optional
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,6 +17,8 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
     DEBUG: bool = True
+    # Mounts /internal (statistics of pools, caches and workers), restricted to users with the admin role
+    INTERNAL_ENDPOINTS_ENABLED: bool = False
     
     # Security
     ACCESS_TOKEN_SECRET_KEY: str
@@ -23,13 +26,67 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 1440
+    # A rotated refresh token replayed within this window is rejected without revoking its family (client retries)
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 5
     
+    # Registration email allowlist, kept in memory (a Bloom filter above the threshold)
+    EMAIL_ALLOWLIST_REFRESH_SECONDS: float = 30
+    EMAIL_ALLOWLIST_FULL_RELOAD_SECONDS: float = 600
+    EMAIL_ALLOWLIST_BLOOM_THRESHOLD: int = 1_000_000
+    EMAIL_ALLOWLIST_BLOOM_ERROR_RATE: float = 0.001
+
     # Database
     DATABASE_URL: str
     DB_NAME: str = "iron_brothers_db"
+    DATABASE_BACKEND: str = "mongo" # "mongo" or "memory" (in-process, for tests and benchmarks)
+
+    # Database connection pool
+    MONGO_MAX_POOL_SIZE: int = 50
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_COMPRESSORS: str = "" # comma-separated, e.g. "zstd,snappy,zlib"
+    MONGO_SLOW_QUERY_MS: int = 100
+
+    # Authenticated user cache (per process); a size or TTL of 0 disables it
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30
+    # Verified access-token claims kept per process; 0 disables the cache
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
+
+    # bcrypt cost; with BCRYPT_TARGET_MS set, startup picks the highest cost within that hash time
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: Optional[float] = None
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 16
+
+    # bcrypt runs off the event loop: "thread", "process" or "inline" (on the loop)
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 5
+
+    # How often each worker checks whether another one reseeded the mission catalog
+    CATALOG_REFRESH_SECONDS: float = 10
+
+    # Profile migrations (string aura to number, group_id backfill) run in the background on startup; see app/api/profiles/migration.py
+    PROFILE_MIGRATIONS_ON_STARTUP: bool = True
+
+    # Closed votings are finalized (history event and reward) by a background worker
+    FINALIZATION_OUTBOX_BATCH_SIZE: int = 100
+    FINALIZATION_OUTBOX_POLL_SECONDS: float = 5
+    FINALIZATION_OUTBOX_MAX_ATTEMPTS: int = 10
+    FINALIZATION_OUTBOX_RETRY_SECONDS: float = 2 # doubled after every failed attempt
 
     # api key
-    GOOGLE_API_KEY: str
+    GOOGLE_API_KEY: Optional[str] = None # secondary missions are unavailable without it
+
+    # Gemini calls for secondary missions; GEMINI_BASE_URL overrides the endpoint (e.g. a local fake server)
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    GEMINI_BASE_URL: Optional[str] = None
+    GEMINI_TIMEOUT_SECONDS: float = 30
+    GEMINI_MAX_CONCURRENCY: int = 16
     
     # CORS
     BACKEND_CORS_ORIGINS: str = "http://localhost:5173"
@@ -0,0 +1,144 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.security import (
+    calibrate_bcrypt_rounds,
+    configure_password_hashing,
+    get_bcrypt_rounds,
+    get_password_hash,
+    verify_and_update_password,
+)
+
+import logging
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+class PasswordHashExecutor:
+    """
+    Runs bcrypt hashing and verification away from the event loop.
+    - At most `workers` calls run at once; the rest wait in a queue of at most `max_pending` calls.
+    - A call that waits longer than `timeout` seconds for a worker, or finds the queue full, gets a 503.
+      A call that already started is never abandoned, so the cap always holds.
+    - kind="inline" runs the call on the event loop, as before, for comparisons.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int, timeout: float):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"PASSWORD_HASH_EXECUTOR must be one of {EXECUTOR_KINDS}, got {kind!r}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Worker processes start with the current cost, which may come from calibration
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=configure_password_hashing,
+                    initargs=(get_bcrypt_rounds(),)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        return self._semaphore
+
+    def _overloaded(self, detail: str):
+        logger.error(detail)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+    async def run(self, function, *args):
+        if self.kind == "inline":
+            self.completed += 1
+            return function(*args)
+
+        if self.queued >= self.max_pending:
+            self.rejected += 1
+            self._overloaded("Too many password operations in progress, try again later")
+
+        semaphore = self._get_semaphore()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._overloaded("Timed out waiting for a password worker")
+        finally:
+            self.queued -= 1
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), function, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            semaphore.release()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+    def snapshot(self) -> dict:
+        return {
+            "kind": self.kind,
+            "bcrypt_rounds": get_bcrypt_rounds(),
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "timeout_seconds": self.timeout,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+password_executor = PasswordHashExecutor(
+    settings.PASSWORD_HASH_EXECUTOR,
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_PENDING,
+    settings.PASSWORD_HASH_TIMEOUT_SECONDS
+)
+
+async def get_password_hash_async(password: str) -> str:
+    "get_password_hash on the password executor"
+    return await password_executor.run(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    "verify_and_update_password on the password executor"
+    return await password_executor.run(verify_and_update_password, plain_password, hashed_password)
+
+async def calibrate_password_hashing():
+    "Pick the bcrypt cost for this host when BCRYPT_TARGET_MS is set; called from the lifespan"
+    if settings.BCRYPT_TARGET_MS is None:
+        return
+    rounds = await asyncio.to_thread(
+        calibrate_bcrypt_rounds,
+        settings.BCRYPT_TARGET_MS,
+        settings.BCRYPT_MIN_ROUNDS,
+        settings.BCRYPT_MAX_ROUNDS
+    )
+    configure_password_hashing(rounds)
+    # Process workers read the cost when they start
+    password_executor.shutdown()
+    logger.info(f"bcrypt cost calibrated to {rounds} rounds for a {settings.BCRYPT_TARGET_MS:.0f}ms target")
@@ -1,3 +1,7 @@
+from collections import OrderedDict
+import hashlib
+import time
+import uuid
 from typing import Optional
 from passlib.context import CryptContext
 import jwt
@@ -6,7 +10,13 @@ from app.core.config import settings
 from datetime import datetime, timedelta
 from fastapi import HTTPException
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with fewer rounds than the configured cost are upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS
+)
 
 ACCESS_TOKEN_SECRET_KEY=settings.ACCESS_TOKEN_SECRET_KEY
 REFRESH_TOKEN_SECRET_KEY=settings.REFRESH_TOKEN_SECRET_KEY
@@ -20,6 +30,41 @@ def get_password_hash(password: str) -> str:
     "Get password hash"
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    "Verify a password and, when the stored hash uses a lower cost, return a new hash for it"
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def get_bcrypt_rounds() -> int:
+    return pwd_context.to_dict()["bcrypt__default_rounds"]
+
+def configure_password_hashing(rounds: int):
+    "Set the bcrypt cost for new hashes and the minimum below which stored hashes are upgraded"
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+def measure_bcrypt_ms(rounds: int, samples: int = 3) -> float:
+    "Fastest of a few bcrypt hashes at the given cost, in milliseconds"
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration password")
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """
+    Highest bcrypt cost whose hash time on this host stays within target_ms, never below min_rounds.
+    Each extra round doubles the work, so one measurement at min_rounds predicts the rest;
+    the prediction is then checked with a real measurement.
+    """
+    base_ms = measure_bcrypt_ms(min_rounds)
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    while rounds > min_rounds and measure_bcrypt_ms(rounds, samples=1) > target_ms:
+        rounds -= 1
+    return rounds
+
 def create_access_token(data: dict,expires_delta:Optional[timedelta] = None)-> str :
     """Create access JWT token"""
     to_encode = data.copy()
@@ -38,18 +83,82 @@ def create_refresh_token(data: dict,expires_delta:Optional[timedelta] = None)->
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    # jti keeps tokens issued in the same second for the same user distinct
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     token = jwt.encode(to_encode, REFRESH_TOKEN_SECRET_KEY, algorithm=ALGORITHM)
     return token
 
-def decode_access_token(token: str) -> Optional[dict]:
-    """Decode access JWT token"""
+class VerifiedClaimsCache:
+    """
+    Bounded map from token digest to the claims of an access token that already passed verification.
+    Entries expire at the token's own exp, so a cached token is never accepted longer than jwt.decode would.
+    Only the SHA-256 digest of the token is kept, never the token itself.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: bytes) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, key: bytes, claims: dict):
+        exp = claims.get("exp")
+        if self.maxsize <= 0 or not isinstance(exp, (int, float)):
+            return
+        self._entries[key] = (exp, dict(claims))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+access_claims_cache = VerifiedClaimsCache(settings.ACCESS_TOKEN_CACHE_SIZE)
+
+def verify_access_token(token: str) -> Optional[dict]:
+    "Full HS256 verification of an access token, without the cache"
     try:
-        payload = jwt.decode(token, ACCESS_TOKEN_SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        return jwt.decode(token, ACCESS_TOKEN_SECRET_KEY, algorithms=[settings.ALGORITHM])
     except InvalidTokenError:
         return None
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decode access JWT token, reusing the claims of tokens verified before"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = access_claims_cache.get(key)
+    if payload is None:
+        payload = verify_access_token(token)
+        if payload is not None:
+            access_claims_cache.put(key, payload)
+    return payload
     
+def refresh_token_digest(token: str) -> bytes:
+    "Fixed-size key under which a refresh token is stored and looked up"
+    return hashlib.sha256(token.encode()).digest()
+
 def decode_refresh_token(token: str):
     """Decode refresh JWT token"""
     try:
@@ -0,0 +1,94 @@
+from datetime import datetime
+import types
+from typing import Optional, Union, get_args, get_origin
+from pydantic import BaseModel
+
+# MongoDB stores dates as BSON Date objects, so datetimes are written as they are.
+# Older documents were written with ISO strings; those are converted back on read,
+# but only for the fields that the model declares as datetime.
+
+_DATETIME = "datetime"
+_MODEL = "model"
+_LIST = "list"
+
+def _unwrap(annotation):
+    "Strip Optional[...] / X | None down to the underlying type"
+    origin = get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return _unwrap(args[0])
+    return annotation
+
+def _is_model(annotation) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+class MongoCodec:
+    """
+    Converts between a Pydantic model and its MongoDB document.
+    The model is inspected once; decoding only touches the datetime fields found there.
+    """
+
+    def __init__(self, model: type[BaseModel]):
+        self.model = model
+        self.plan: list[tuple[str, str, Optional["MongoCodec"]]] = []
+
+        for name, field in model.model_fields.items():
+            key = field.alias or name
+            annotation = _unwrap(field.annotation)
+            origin = get_origin(annotation)
+
+            if annotation is datetime:
+                self.plan.append((key, _DATETIME, None))
+            elif _is_model(annotation):
+                nested = codec_for(annotation)
+                if nested.plan:
+                    self.plan.append((key, _MODEL, nested))
+            elif origin is list:
+                args = get_args(annotation)
+                item = _unwrap(args[0]) if args else None
+                if _is_model(item):
+                    nested = codec_for(item)
+                    if nested.plan:
+                        self.plan.append((key, _LIST, nested))
+
+    def encode(self, obj: BaseModel) -> dict:
+        "Model -> document. Datetimes stay native so they are stored as BSON dates."
+        return obj.model_dump()
+
+    def decode(self, doc: Optional[dict]) -> Optional[dict]:
+        "Document -> dict ready for the model. The document is updated in place."
+        if doc is None:
+            return None
+        for key, kind, nested in self.plan:
+            value = doc.get(key)
+            if value is None:
+                continue
+            if kind == _DATETIME:
+                if isinstance(value, str):
+                    try:
+                        doc[key] = datetime.fromisoformat(value)
+                    except ValueError:
+                        pass
+            elif kind == _MODEL:
+                if isinstance(value, dict):
+                    nested.decode(value)
+            else:
+                for item in value:
+                    if isinstance(item, dict):
+                        nested.decode(item)
+        return doc
+
+    def load(self, doc: dict) -> BaseModel:
+        "Document -> model instance"
+        return self.model(**self.decode(doc))
+
+_codecs: dict[type, MongoCodec] = {}
+
+def codec_for(model: type[BaseModel]) -> MongoCodec:
+    "Return the codec for a model, compiling it on first use"
+    codec = _codecs.get(model)
+    if codec is None:
+        codec = MongoCodec(model)
+        _codecs[model] = codec
+    return codec
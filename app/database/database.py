@@ -1,7 +1,9 @@
-from datetime import datetime
 import logging
 from app.core.config import settings
 from motor.motor_asyncio import AsyncIOMotorClient
+from app.database.indexes import reconcile_indexes
+from app.database.memory import MemoryClient
+from app.database.monitoring import pool_stats, query_stats
 
 logger = logging.getLogger(__name__)
 
@@ -10,14 +12,31 @@ DB_NAME = settings.DB_NAME
 
 client = None
 
+def client_options() -> dict:
+    "Motor client options built from the settings."
+    options = {
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "event_listeners": [pool_stats, query_stats],
+    }
+    if settings.MONGO_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    compressors = [c.strip() for c in settings.MONGO_COMPRESSORS.split(",") if c.strip()]
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
 async def connect_to_mongo():
     global client
     # create client if it does not exist
+    if client is None and settings.DATABASE_BACKEND == "memory":
+        client = MemoryClient()
+        logger.info("Using the in-memory database backend")
     if client is None:
-        client = AsyncIOMotorClient(MONGO_URL,serverSelectionTimeoutMS=5000, maxPoolSize=50)
-    
-        # serverSelectionTimeoutMS: server timeout
-        # maxPoolSize: adjust according to load 
+        client = AsyncIOMotorClient(MONGO_URL, **client_options())
         
         try:
             # comprobar coneccion
@@ -45,61 +64,13 @@ def get_database():
         raise RuntimeError("Mongo client not initialized. Call connect_to_mongo() first.")
     return client[DB_NAME]
 
-# MongoDB stores dates as BSON Date objects, not as Python objects.
-def prepare_for_mongo(data):
-    # If it's a dictionary, process each field
-    if isinstance(data, dict):
-        result = {}
-        for key, value in data.items():
-            # Case 1: If it's a datetime object → convert to ISO string
-            if isinstance(value, datetime):
-                result[key] = value.isoformat()
-            # Case 2: If it's another dictionary → recursion
-            elif isinstance(value, dict):
-                result[key] = prepare_for_mongo(value)
-            # Case 3: If it's a list → process each element
-            elif isinstance(value, list):
-                result[key] = [prepare_for_mongo(item) if isinstance(item, dict) else item for item in value]
-            # Case 4: Other types → direct copy
-            else:
-                result[key] = value
-        return result
-    return data
-
-def parse_from_mongo(item):
-    if isinstance(item, dict):
-        result = {}
-        for key, value in item.items():
-            if key.endswith('_at') and isinstance(value, str):
-                try:
-                    result[key] = datetime.fromisoformat(value)
-                except Exception:
-                    result[key] = value
-            elif isinstance(value, dict):
-                result[key] = parse_from_mongo(value)
-            elif isinstance(value, list):
-                result[key] = [parse_from_mongo(v) if isinstance(v, dict) else v for v in value]
-            else:
-                result[key] = value
-        return result
-    return item
-
-async def setup_ttl_indexes():
-    "Configure the necessary TTL indexes in the database."
+async def setup_indexes(registry):
+    "Reconcile the declared indexes with the ones present in the database."
     db = get_database()
     if db is None:
         raise Exception("Database not initialized")
-    
-    await setup_refresh_token_indexes(db)
-    logger.info("TTL Indexes configured")
 
-async def setup_refresh_token_indexes(db):
-    """Configure specific TTL indexes for refresh tokens"""
     try:
-        await db.refresh_tokens.create_index(
-            [("delete_at", 1)],  # Field and direction
-            expireAfterSeconds=0,  # 0 = delete immediately upon exceeding the date
-            name="auto_delete_refresh_tokens"
-        )
+        return await reconcile_indexes(db, registry)
     except Exception as e:
-        logger.error(f"Error creating TTL index for refresh_tokens: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error reconciling indexes: {str(e)}")
@@ -0,0 +1,100 @@
+import logging
+from typing import Optional
+from pydantic import BaseModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+class IndexSpec(BaseModel):
+    """Declarative description of an index owned by an API package."""
+    collection: str
+    keys: list[tuple[str, int]]
+    name: str
+    unique: bool = False
+    sparse: bool = False
+    expire_after_seconds: Optional[int] = None
+
+    def options(self) -> dict:
+        "Options as reported by index_information(), used to detect drift"
+        options = {}
+        if self.unique:
+            options["unique"] = True
+        if self.sparse:
+            options["sparse"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return options
+
+def _existing_options(info: dict) -> dict:
+    options = {}
+    if info.get("unique"):
+        options["unique"] = True
+    if info.get("sparse"):
+        options["sparse"] = True
+    if info.get("expireAfterSeconds") is not None:
+        options["expireAfterSeconds"] = int(info["expireAfterSeconds"])
+    return options
+
+def _normalize_keys(keys) -> list[tuple[str, int]]:
+    return [(field, int(direction)) for field, direction in keys]
+
+async def reconcile_indexes(db, registry: list[IndexSpec]) -> dict:
+    """
+    Make sure every index in the registry exists.
+    - Missing indexes are created in the background.
+    - Indexes that exist with different keys or options are reported as drift and left untouched.
+    - Running it again on an up to date database does nothing.
+    """
+    report = {"created": [], "unchanged": [], "drift": [], "failed": []}
+
+    by_collection: dict[str, list[IndexSpec]] = {}
+    for spec in registry:
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    for collection_name, specs in by_collection.items():
+        collection = db[collection_name]
+        try:
+            existing = await collection.index_information()
+        except OperationFailure:
+            # The collection does not exist yet
+            existing = {}
+
+        for spec in specs:
+            label = f"{collection_name}.{spec.name}"
+            keys = _normalize_keys(spec.keys)
+            same_name = existing.get(spec.name)
+            same_keys = next(
+                (name for name, info in existing.items() if _normalize_keys(info["key"]) == keys),
+                None
+            )
+
+            if same_name is not None and _normalize_keys(same_name["key"]) != keys:
+                logger.warning(f"Index drift on {label}: expected keys {keys}, found {same_name['key']}")
+                report["drift"].append(label)
+                continue
+
+            if same_keys is not None:
+                found = _existing_options(existing[same_keys])
+                if found != spec.options() or same_keys != spec.name:
+                    logger.warning(
+                        f"Index drift on {label}: expected {spec.name} {spec.options()}, "
+                        f"found {same_keys} {found}"
+                    )
+                    report["drift"].append(label)
+                else:
+                    report["unchanged"].append(label)
+                continue
+
+            try:
+                await collection.create_index(keys, name=spec.name, background=True, **spec.options())
+                report["created"].append(label)
+            except Exception as e:
+                logger.error(f"Error creating index {label}: {str(e)}")
+                report["failed"].append(label)
+
+    logger.info(
+        "Indexes reconciled: "
+        f"{len(report['created'])} created, {len(report['unchanged'])} unchanged, "
+        f"{len(report['drift'])} drift, {len(report['failed'])} failed"
+    )
+    return report
@@ -0,0 +1,914 @@
+"""
+In-process stand-in for the part of the Motor API the services use.
+Selected with DATABASE_BACKEND=memory to run the API without a MongoDB server,
+for hermetic tests and for benchmarks that leave the database out of the picture.
+
+Every operation runs to completion without yielding in the middle, so single document
+updates are atomic like they are on the server. TTL indexes are accepted but not enforced.
+Aggregations support $match, $project, $sort, $skip, $limit, $unwind and the
+localField/foreignField form of $lookup.
+"""
+import asyncio
+from datetime import datetime
+import re
+from typing import Any, Optional
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, WriteError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+MISSING = _Missing()
+
+def _copy(value):
+    "Deep copy of plain BSON-like values, much cheaper than copy.deepcopy"
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+def _freeze(value):
+    "Hashable form of a BSON-like value, for the unique index tables"
+    if isinstance(value, dict):
+        return ("document", tuple((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return ("array", tuple(_freeze(item) for item in value))
+    return value
+
+def _plain(value):
+    "Enum members stored through str subclasses are kept as their plain value, like BSON does"
+    if isinstance(value, str) and type(value) is not str:
+        return str.__str__(value)
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+# Paths
+
+def _values(value, parts: list[str]) -> list:
+    "Every value reachable through a dotted path, following arrays like MongoDB does"
+    if not parts:
+        return [value]
+    key, rest = parts[0], parts[1:]
+    if isinstance(value, dict):
+        if key in value:
+            return _values(value[key], rest)
+        return [MISSING]
+    if isinstance(value, list):
+        found = []
+        if key.isdigit():
+            index = int(key)
+            if index < len(value):
+                found.extend(_values(value[index], rest))
+        for item in value:
+            if isinstance(item, dict):
+                found.extend(v for v in _values(item, parts) if v is not MISSING)
+        return found or [MISSING]
+    return [MISSING]
+
+def _get(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, MISSING)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return MISSING
+        if value is MISSING:
+            return MISSING
+    return value
+
+def _parent(doc: dict, path: str, create: bool):
+    parts = path.split(".")
+    container = doc
+    for part in parts[:-1]:
+        if isinstance(container, list) and part.isdigit():
+            index = int(part)
+            if index >= len(container):
+                return None, None
+            container = container[index]
+            continue
+        if not isinstance(container, dict):
+            return None, None
+        if part not in container or container[part] is None:
+            if not create:
+                return None, None
+            container[part] = {}
+        container = container[part]
+    return container, parts[-1]
+
+def _set(doc: dict, path: str, value):
+    container, key = _parent(doc, path, create=True)
+    if isinstance(container, list) and key.isdigit():
+        index = int(key)
+        while len(container) <= index:
+            container.append(None)
+        container[index] = value
+    elif isinstance(container, dict):
+        container[key] = value
+    else:
+        raise WriteError(f"Cannot create field in element for path {path}", code=28)
+
+def _unset(doc: dict, path: str):
+    container, key = _parent(doc, path, create=False)
+    if isinstance(container, dict):
+        container.pop(key, None)
+    elif isinstance(container, list) and key.isdigit() and int(key) < len(container):
+        container[int(key)] = None
+
+# Comparison
+
+_TYPE_ORDER = [
+    (type(None), 1), (int, 2), (float, 2), (str, 3), (dict, 4), (list, 5),
+    (ObjectId, 7), (bool, 8), (datetime, 9),
+]
+
+def _type_rank(value) -> int:
+    if value is MISSING or value is None:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    for kind, rank in _TYPE_ORDER:
+        if isinstance(value, kind):
+            return rank
+    return 10
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank == 1:
+        return (rank, 0)
+    if rank in (4, 5):
+        return (rank, str(value))
+    return (rank, value)
+
+def _comparable(a, b) -> bool:
+    return _type_rank(a) == _type_rank(b) and a is not MISSING and a is not None
+
+def _equals(candidate, expected) -> bool:
+    if expected is None:
+        return candidate is None or candidate is MISSING
+    if candidate is MISSING:
+        return False
+    if candidate == expected:
+        return True
+    if isinstance(candidate, list) and not isinstance(expected, list):
+        return any(_equals(item, expected) for item in candidate)
+    return False
+
+_TYPE_NAMES = {
+    "string": (str,), "int": (int,), "long": (int,), "double": (float,),
+    "number": (int, float), "bool": (bool,), "object": (dict,), "array": (list,),
+    "date": (datetime,), "objectId": (ObjectId,), "null": (type(None),),
+}
+
+def _is_type(value, name) -> bool:
+    if value is MISSING:
+        return False
+    if isinstance(name, list):
+        return any(_is_type(value, item) for item in name)
+    kinds = _TYPE_NAMES.get(name)
+    if kinds is None:
+        raise NotImplementedError(f"$type {name!r} is not supported by the memory backend")
+    if isinstance(value, bool) and bool not in kinds:
+        return False
+    return isinstance(value, kinds)
+
+def _flatten(candidates: list) -> list:
+    "Candidates plus the elements of candidate arrays, for operators that look inside arrays"
+    flat = []
+    for candidate in candidates:
+        flat.append(candidate)
+        if isinstance(candidate, list):
+            flat.extend(candidate)
+    return flat
+
+def _match_operators(candidates: list, operators: dict) -> bool:
+    for operator, argument in operators.items():
+        if operator == "$eq":
+            ok = any(_equals(c, argument) for c in candidates)
+        elif operator == "$ne":
+            ok = not any(_equals(c, argument) for c in candidates)
+        elif operator == "$in":
+            ok = any(_equals(c, item) for c in candidates for item in argument)
+        elif operator == "$nin":
+            ok = not any(_equals(c, item) for c in candidates for item in argument)
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            ok = False
+            for c in _flatten(candidates):
+                if not _comparable(c, argument):
+                    continue
+                if ((operator == "$gt" and c > argument) or (operator == "$gte" and c >= argument)
+                        or (operator == "$lt" and c < argument) or (operator == "$lte" and c <= argument)):
+                    ok = True
+                    break
+        elif operator == "$exists":
+            ok = any(c is not MISSING for c in candidates) == bool(argument)
+        elif operator == "$size":
+            ok = any(isinstance(c, list) and len(c) == argument for c in candidates)
+        elif operator == "$type":
+            ok = any(_is_type(c, argument) for c in candidates)
+        elif operator == "$all":
+            ok = all(any(_equals(c, item) for c in candidates) for item in argument)
+        elif operator == "$elemMatch":
+            ok = any(
+                isinstance(c, list) and any(_match_element(item, argument) for item in c)
+                for c in candidates
+            )
+        elif operator == "$not":
+            ok = not _match_operators(candidates, argument)
+        elif operator == "$regex":
+            pattern = re.compile(argument, _regex_flags(operators.get("$options", "")))
+            ok = any(isinstance(c, str) and pattern.search(c) for c in _flatten(candidates))
+        elif operator == "$options":
+            continue
+        else:
+            raise NotImplementedError(f"Query operator {operator} is not supported by the memory backend")
+        if not ok:
+            return False
+    return True
+
+def _regex_flags(options: str) -> int:
+    flags = 0
+    if "i" in options:
+        flags |= re.IGNORECASE
+    if "m" in options:
+        flags |= re.MULTILINE
+    return flags
+
+def _is_operator_dict(value) -> bool:
+    return isinstance(value, dict) and bool(value) and all(key.startswith("$") for key in value)
+
+def _match_element(element, condition) -> bool:
+    if _is_operator_dict(condition):
+        return _match_operators([element], condition)
+    return isinstance(element, dict) and matches(element, condition)
+
+def matches(doc: dict, filter: Optional[dict]) -> bool:
+    "Whether a document matches a MongoDB query filter"
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches(doc, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, part) for part in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, part) for part in condition):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Query operator {key} is not supported by the memory backend")
+        else:
+            candidates = _values(doc, key.split("."))
+            if _is_operator_dict(condition):
+                if not _match_operators(candidates, condition):
+                    return False
+            elif isinstance(condition, re.Pattern):
+                if not any(isinstance(c, str) and condition.search(c) for c in _flatten(candidates)):
+                    return False
+            elif not any(_equals(c, condition) for c in candidates):
+                return False
+    return True
+
+# Projection
+
+def _projection_tree(fields: dict) -> dict:
+    tree: dict = {}
+    for path in fields:
+        node = tree
+        parts = path.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if node is True:
+                break
+        else:
+            node[parts[-1]] = True
+    return tree
+
+def _include(value, tree: dict):
+    if isinstance(value, list):
+        return [_include(item, tree) for item in value if isinstance(item, dict)]
+    if not isinstance(value, dict):
+        return MISSING
+    result = {}
+    for key, node in tree.items():
+        if key not in value:
+            continue
+        if node is True:
+            result[key] = _copy(value[key])
+        else:
+            nested = _include(value[key], node)
+            if nested is not MISSING:
+                result[key] = nested
+    return result
+
+def _exclude(value, tree: dict):
+    if isinstance(value, list):
+        return [_exclude(item, tree) if isinstance(item, dict) else _copy(item) for item in value]
+    if not isinstance(value, dict):
+        return _copy(value)
+    result = {}
+    for key, item in value.items():
+        node = tree.get(key)
+        if node is True:
+            continue
+        result[key] = _exclude(item, node) if node else _copy(item)
+    return result
+
+def project(doc: dict, projection) -> dict:
+    "Apply a find() projection to a document, returning a copy"
+    if not projection:
+        return _copy(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include_id = bool(projection.get("_id", 1))
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if fields and any(fields.values()):
+        result = _include(doc, _projection_tree(k for k, v in fields.items() if v))
+        if include_id and "_id" in doc:
+            result = {"_id": doc["_id"], **result}
+        return result
+    result = _exclude(doc, _projection_tree(fields))
+    if not include_id:
+        result.pop("_id", None)
+    return result
+
+# Updates
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False):
+    if not update or not all(key.startswith("$") for key in update):
+        raise NotImplementedError("Replacement updates are not supported by the memory backend")
+    for operator, fields in update.items():
+        for path, argument in fields.items():
+            argument = _plain(argument)
+            if operator == "$set":
+                _set(doc, path, _copy(argument))
+            elif operator == "$setOnInsert":
+                if inserting:
+                    _set(doc, path, _copy(argument))
+            elif operator == "$unset":
+                _unset(doc, path)
+            elif operator == "$inc":
+                current = _get(doc, path)
+                if current is MISSING or current is None:
+                    _set(doc, path, argument)
+                elif isinstance(current, (int, float)) and not isinstance(current, bool):
+                    _set(doc, path, current + argument)
+                else:
+                    raise WriteError(
+                        f"Cannot apply $inc to a value of non-numeric type. {{_id: {doc.get('_id')!r}}} "
+                        f"has the field '{path}' of non-numeric type {type(current).__name__}",
+                        code=14
+                    )
+            elif operator in ("$push", "$addToSet"):
+                current = _get(doc, path)
+                if current is MISSING or current is None:
+                    current = []
+                    _set(doc, path, current)
+                elif not isinstance(current, list):
+                    raise WriteError(f"The field '{path}' must be an array", code=2)
+                if isinstance(argument, dict) and "$each" in argument:
+                    items = argument["$each"]
+                else:
+                    items = [argument]
+                for item in items:
+                    if operator == "$push" or item not in current:
+                        current.append(_copy(item))
+                if operator == "$push" and isinstance(argument, dict) and "$slice" in argument:
+                    size = argument["$slice"]
+                    kept = current[size:] if size < 0 else current[:size]
+                    if size == 0:
+                        kept = []
+                    current[:] = kept
+            elif operator == "$pull":
+                current = _get(doc, path)
+                if isinstance(current, list):
+                    current[:] = [item for item in current if not _pull_matches(item, argument)]
+            elif operator in ("$min", "$max"):
+                current = _get(doc, path)
+                if (current is MISSING or current is None
+                        or (operator == "$min" and argument < current)
+                        or (operator == "$max" and argument > current)):
+                    _set(doc, path, argument)
+            else:
+                raise NotImplementedError(f"Update operator {operator} is not supported by the memory backend")
+
+def _pull_matches(item, condition) -> bool:
+    if isinstance(condition, dict):
+        if _is_operator_dict(condition):
+            return _match_operators([item], condition)
+        return isinstance(item, dict) and matches(item, condition)
+    return item == condition
+
+def _upsert_seed(filter: dict) -> dict:
+    "Fields an upsert copies from the equality conditions of its filter"
+    doc: dict = {}
+    for key, condition in (filter or {}).items():
+        if key == "$and":
+            for part in condition:
+                for seed_key, seed_value in _upsert_seed(part).items():
+                    doc[seed_key] = seed_value
+        elif key.startswith("$"):
+            continue
+        elif _is_operator_dict(condition):
+            if "$eq" in condition:
+                _set(doc, key, _copy(condition["$eq"]))
+        else:
+            _set(doc, key, _copy(condition))
+    return doc
+
+# Collections
+
+class MemoryCursor:
+    def __init__(self, collection: "MemoryCollection", filter: Optional[dict], projection):
+        self._collection = collection
+        self._filter = filter
+        self._projection = projection
+        self._sort: list[tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[list] = None
+
+    def sort(self, key_or_list, direction: Optional[int] = None) -> "MemoryCursor":
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction or 1)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def skip(self, count: int) -> "MemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._limit = count
+        return self
+
+    def _evaluate(self) -> list:
+        documents = self._collection._select(self._filter, self._sort)
+        if self._skip:
+            documents = documents[self._skip:]
+        if self._limit:
+            documents = documents[:abs(self._limit)]
+        return [project(doc, self._projection) for doc in documents]
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        await asyncio.sleep(0)
+        if self._results is None:
+            self._results = self._evaluate()
+        if length:
+            batch, self._results = self._results[:length], self._results[length:]
+            return batch
+        batch, self._results = self._results, []
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._results is None:
+            await asyncio.sleep(0)
+            self._results = self._evaluate()
+        if not self._results:
+            raise StopAsyncIteration
+        return self._results.pop(0)
+
+class MemoryCommandCursor(MemoryCursor):
+    "Cursor returned by aggregate(); the pipeline runs when results are first read"
+
+    def __init__(self, collection: "MemoryCollection", pipeline: list[dict]):
+        super().__init__(collection, None, None)
+        self._pipeline = pipeline
+
+    def _evaluate(self) -> list:
+        return self._collection._aggregate(self._pipeline)
+
+def _unwind(documents: list[dict], spec) -> list[dict]:
+    if isinstance(spec, str):
+        spec = {"path": spec}
+    path = spec["path"].lstrip("$")
+    keep_empty = spec.get("preserveNullAndEmptyArrays", False)
+    unwound = []
+    for doc in documents:
+        value = _get(doc, path)
+        if isinstance(value, list) and value:
+            for item in value:
+                copy = _copy(doc)
+                _set(copy, path, _copy(item))
+                unwound.append(copy)
+        elif isinstance(value, list) or value is MISSING or value is None:
+            if keep_empty:
+                copy = _copy(doc)
+                if isinstance(value, list):
+                    _unset(copy, path)
+                unwound.append(copy)
+        else:
+            unwound.append(doc)
+    return unwound
+
+class MemoryCollection:
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._documents: dict[Any, dict] = {}
+        # Insertion sequence of every document, so lookups return them in natural order without a scan
+        self._positions: dict[Any, int] = {}
+        self._inserted = 0
+        self._indexes: dict[str, dict] = {"_id_": {"key": [("_id", 1)], "unique": True}}
+        # field -> value -> ids, for single field equality lookups on indexed fields
+        self._lookup: dict[str, dict] = {}
+        # unique index name -> key -> id, so writes check uniqueness without a scan
+        self._unique: dict[str, dict] = {}
+
+    # Index maintenance
+
+    def _lookup_fields(self) -> set[str]:
+        return {info["key"][0][0] for info in self._indexes.values()}
+
+    def _hashable_values(self, doc: dict, field: str) -> Optional[list]:
+        values = []
+        for value in _values(doc, field.split(".")):
+            if value is MISSING:
+                value = None
+            candidates = value if isinstance(value, list) else [value]
+            for candidate in candidates:
+                try:
+                    hash(candidate)
+                except TypeError:
+                    return None
+                values.append(candidate)
+        return values
+
+    def _unique_key(self, info: dict, doc: dict) -> Optional[tuple]:
+        "The document's key in a unique index; None if a sparse index leaves it out"
+        key = [_get(doc, field) for field, _ in info["key"]]
+        if info.get("sparse") and all(value is MISSING for value in key):
+            return None
+        return tuple(_freeze(None if value is MISSING else value) for value in key)
+
+    def _index_doc(self, doc_id, doc: dict, add: bool):
+        for name, table in self._unique.items():
+            key = self._unique_key(self._indexes[name], doc)
+            if key is None:
+                continue
+            if add:
+                table[key] = doc_id
+            elif table.get(key) == doc_id:
+                del table[key]
+        for field, table in self._lookup.items():
+            values = self._hashable_values(doc, field)
+            keys = values if values is not None else [_UNHASHABLE]
+            for key in keys:
+                ids = table.setdefault(key, set())
+                if add:
+                    ids.add(doc_id)
+                else:
+                    ids.discard(doc_id)
+
+    def _rebuild_lookup(self):
+        self._lookup = {field: {} for field in self._lookup_fields()}
+        # _id is already the key of _documents
+        self._unique = {name: {} for name, info in self._indexes.items() if info.get("unique") and name != "_id_"}
+        for doc_id, doc in self._documents.items():
+            self._index_doc(doc_id, doc, add=True)
+
+    def _candidates(self, filter: Optional[dict]) -> list[dict]:
+        for key, condition in (filter or {}).items():
+            if key in self._lookup and not isinstance(condition, (dict, list, re.Pattern)):
+                table = self._lookup[key]
+                try:
+                    ids = table.get(condition, set()) | table.get(_UNHASHABLE, set())
+                except TypeError:
+                    break
+                return [self._documents[doc_id] for doc_id in sorted(ids, key=self._positions.__getitem__)]
+        return list(self._documents.values())
+
+    def _select(self, filter: Optional[dict], sort=None) -> list[dict]:
+        documents = [doc for doc in self._candidates(filter) if matches(doc, filter)]
+        for key, direction in reversed(sort or []):
+            documents.sort(key=lambda doc: _sort_key(_get(doc, key)), reverse=direction < 0)
+        return documents
+
+    def _duplicate(self, name: str, info: dict, doc: dict) -> DuplicateKeyError:
+        key = {field: _get(doc, field) for field, _ in info["key"]}
+        return DuplicateKeyError(
+            f"E11000 duplicate key error collection: {self.database.name}.{self.name} "
+            f"index: {name} dup key: {key}",
+            code=11000
+        )
+
+    def _check_unique(self, doc: dict, doc_id):
+        for name, table in self._unique.items():
+            key = self._unique_key(self._indexes[name], doc)
+            if key is not None and table.get(key, doc_id) != doc_id:
+                raise self._duplicate(name, self._indexes[name], doc)
+
+    def _store(self, doc: dict, previous: Optional[dict] = None):
+        doc_id = doc["_id"]
+        self._check_unique(doc, doc_id)
+        if previous is not None:
+            self._index_doc(doc_id, previous, add=False)
+        else:
+            self._positions[doc_id] = self._inserted
+            self._inserted += 1
+        self._documents[doc_id] = doc
+        self._index_doc(doc_id, doc, add=True)
+
+    def _insert(self, document: dict) -> Any:
+        if "_id" not in document:
+            # Like pymongo, the generated id is added to the caller's document
+            document["_id"] = ObjectId()
+        doc = _plain(_copy(document))
+        if doc["_id"] in self._documents:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.database.name}.{self.name} "
+                f"index: _id_ dup key: {{ _id: {doc['_id']!r} }}",
+                code=11000
+            )
+        self._store(doc)
+        return doc["_id"]
+
+    def _update(self, filter: dict, update: dict, *, multi: bool, upsert: bool, sort=None):
+        "Returns (matched, modified, upserted_id, [(before, after)])"
+        matched = self._select(filter, sort)
+        if not multi:
+            matched = matched[:1]
+        changes = []
+        modified = 0
+        for doc in matched:
+            updated = _copy(doc)
+            _apply_update(updated, update)
+            if updated != doc:
+                self._store(updated, previous=doc)
+                modified += 1
+            changes.append((doc, updated))
+        if matched or not upsert:
+            return len(matched), modified, None, changes
+        seed = _upsert_seed(filter)
+        _apply_update(seed, update, inserting=True)
+        upserted_id = self._insert(seed)
+        return 0, 0, upserted_id, [(None, self._documents[upserted_id])]
+
+    # Motor API
+
+    async def find_one(self, filter: Optional[dict] = None, projection=None, *args, sort=None, **kwargs):
+        await asyncio.sleep(0)
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        documents = self._select(filter, sort)
+        return project(documents[0], projection) if documents else None
+
+    def find(self, filter: Optional[dict] = None, projection=None, *args, **kwargs) -> MemoryCursor:
+        cursor = MemoryCursor(self, filter, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        if kwargs.get("limit"):
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    def aggregate(self, pipeline: list[dict], *args, **kwargs) -> MemoryCommandCursor:
+        return MemoryCommandCursor(self, pipeline)
+
+    def _lookup_stage(self, documents: list[dict], spec: dict) -> list[dict]:
+        if "pipeline" in spec or "localField" not in spec:
+            raise NotImplementedError("Only the localField/foreignField form of $lookup is supported by the memory backend")
+        foreign = self.database[spec["from"]]
+        for doc in documents:
+            values = [value for value in _values(doc, spec["localField"].split(".")) if value is not MISSING]
+            values = [item for value in values for item in (value if isinstance(value, list) else [value])]
+            # A missing local field matches foreign documents where the field is missing or null, like the server
+            condition = {spec["foreignField"]: {"$in": values}} if values else {spec["foreignField"]: None}
+            _set(doc, spec["as"], [_copy(match) for match in foreign._select(condition)])
+        return documents
+
+    def _aggregate(self, pipeline: list[dict]) -> list[dict]:
+        stages = list(pipeline)
+        # A leading $match can use the equality lookup tables, like find()
+        first = stages.pop(0)["$match"] if stages and "$match" in stages[0] else None
+        documents = [_copy(doc) for doc in self._select(first)]
+        for stage in stages:
+            (operator, spec), = stage.items()
+            if operator == "$match":
+                documents = [doc for doc in documents if matches(doc, spec)]
+            elif operator == "$project":
+                documents = [project(doc, spec) for doc in documents]
+            elif operator == "$sort":
+                for key, direction in reversed(list(spec.items())):
+                    documents.sort(key=lambda doc: _sort_key(_get(doc, key)), reverse=direction < 0)
+            elif operator == "$skip":
+                documents = documents[spec:]
+            elif operator == "$limit":
+                documents = documents[:spec]
+            elif operator == "$unwind":
+                documents = _unwind(documents, spec)
+            elif operator == "$lookup":
+                documents = self._lookup_stage(documents, spec)
+            else:
+                raise NotImplementedError(f"Aggregation stage {operator} is not supported by the memory backend")
+        return documents
+
+    async def count_documents(self, filter: dict, limit: int = 0, skip: int = 0, **kwargs) -> int:
+        await asyncio.sleep(0)
+        count = max(0, len(self._select(filter)) - skip)
+        return min(count, limit) if limit else count
+
+    async def insert_one(self, document: dict, *args, **kwargs) -> InsertOneResult:
+        await asyncio.sleep(0)
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: list[dict], ordered: bool = True, *args, **kwargs) -> InsertManyResult:
+        await asyncio.sleep(0)
+        inserted_ids = []
+        for document in documents:
+            try:
+                inserted_ids.append(self._insert(document))
+            except DuplicateKeyError:
+                if ordered:
+                    raise
+        return InsertManyResult(inserted_ids, True)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, *args, **kwargs) -> UpdateResult:
+        await asyncio.sleep(0)
+        matched, modified, upserted_id, _ = self._update(filter, update, multi=False, upsert=upsert)
+        raw = {"n": matched or (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False, *args, **kwargs) -> UpdateResult:
+        await asyncio.sleep(0)
+        matched, modified, upserted_id, _ = self._update(filter, update, multi=True, upsert=upsert)
+        raw = {"n": matched or (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: dict,
+        projection=None,
+        sort=None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        *args,
+        **kwargs
+    ) -> Optional[dict]:
+        await asyncio.sleep(0)
+        _, _, upserted_id, changes = self._update(filter, update, multi=False, upsert=upsert, sort=sort)
+        if not changes:
+            return None
+        before, after = changes[0]
+        document = after if return_document == ReturnDocument.AFTER else before
+        return project(document, projection) if document is not None else None
+
+    def _delete(self, filter: dict, multi: bool) -> int:
+        documents = self._select(filter)
+        if not multi:
+            documents = documents[:1]
+        for doc in documents:
+            self._index_doc(doc["_id"], doc, add=False)
+            del self._documents[doc["_id"]]
+            del self._positions[doc["_id"]]
+        return len(documents)
+
+    async def delete_one(self, filter: dict, *args, **kwargs) -> DeleteResult:
+        await asyncio.sleep(0)
+        return DeleteResult({"n": self._delete(filter, multi=False)}, True)
+
+    async def delete_many(self, filter: dict, *args, **kwargs) -> DeleteResult:
+        await asyncio.sleep(0)
+        return DeleteResult({"n": self._delete(filter, multi=True)}, True)
+
+    async def bulk_write(self, requests: list, ordered: bool = True, *args, **kwargs) -> BulkWriteResult:
+        await asyncio.sleep(0)
+        result = {
+            "writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+            "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": [],
+        }
+        for index, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self._insert(request._doc)
+                    result["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany)):
+                    matched, modified, upserted_id, _ = self._update(
+                        request._filter,
+                        request._doc,
+                        multi=isinstance(request, UpdateMany),
+                        upsert=bool(request._upsert)
+                    )
+                    result["nMatched"] += matched
+                    result["nModified"] += modified
+                    if upserted_id is not None:
+                        result["nUpserted"] += 1
+                        result["upserted"].append({"index": index, "_id": upserted_id})
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    result["nRemoved"] += self._delete(request._filter, multi=isinstance(request, DeleteMany))
+                else:
+                    raise NotImplementedError(f"{type(request).__name__} is not supported by the memory backend")
+            except (DuplicateKeyError, WriteError) as e:
+                result["writeErrors"].append({"index": index, "code": e.code, "errmsg": str(e), "op": request})
+                if ordered:
+                    break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    async def create_index(self, keys, name: Optional[str] = None, **kwargs) -> str:
+        await asyncio.sleep(0)
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        keys = [(field, direction) for field, direction in keys]
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        info = {"key": keys}
+        for option in ("unique", "sparse", "expireAfterSeconds"):
+            if kwargs.get(option) is not None and kwargs.get(option) is not False:
+                info[option] = kwargs[option]
+        existing = self._indexes.get(name)
+        if existing is not None and existing != info:
+            raise OperationFailure(f"An existing index has the same name as the requested index: {name}", code=86)
+        if info.get("unique"):
+            keys_seen = set()
+            for doc in self._documents.values():
+                key = self._unique_key(info, doc)
+                if key in keys_seen:
+                    raise self._duplicate(name, info, doc)
+                if key is not None:
+                    keys_seen.add(key)
+        self._indexes[name] = info
+        self._rebuild_lookup()
+        return name
+
+    async def index_information(self) -> dict:
+        await asyncio.sleep(0)
+        return _copy(self._indexes)
+
+    async def drop_index(self, name: str):
+        await asyncio.sleep(0)
+        self._indexes.pop(name, None)
+        self._rebuild_lookup()
+
+    async def drop(self):
+        await asyncio.sleep(0)
+        self._documents.clear()
+        self._positions.clear()
+        self._indexes = {"_id_": {"key": [("_id", 1)], "unique": True}}
+        self._rebuild_lookup()
+
+_UNHASHABLE = object()
+
+class MemoryDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = MemoryCollection(self, name)
+            self._collections[name] = collection
+        return collection
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, command, *args, **kwargs) -> dict:
+        await asyncio.sleep(0)
+        if command in ("ping", {"ping": 1}):
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Command {command!r} is not supported by the memory backend")
+
+    async def list_collection_names(self, *args, **kwargs) -> list[str]:
+        return list(self._collections)
+
+class MemoryClient:
+    """Drop-in replacement for AsyncIOMotorClient backed by Python dictionaries."""
+
+    def __init__(self, *args, **kwargs):
+        self._databases: dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        database = self._databases.get(name)
+        if database is None:
+            database = MemoryDatabase(name)
+            self._databases[name] = database
+        return database
+
+    def __getattr__(self, name: str) -> MemoryDatabase:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def close(self):
+        pass
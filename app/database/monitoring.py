@@ -0,0 +1,245 @@
+from collections import deque
+from contextvars import ContextVar
+import logging
+import threading
+from fastapi import Request
+from pymongo import monitoring
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.database.slow_queries")
+
+LATENCY_SAMPLES = 1000
+SLOW_QUERY_SAMPLES = 100
+
+# Route handling the current request, e.g. "GET /api/v1/assignments/{person_id}"
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Collects connection pool (CMAP) statistics for the Motor client.
+    Events arrive from the driver threads, so every counter is guarded by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.pools = 0
+            self.open_connections = 0
+            self.checked_out = 0
+            self.wait_queue = 0
+            self.max_wait_queue = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.pool_clears = 0
+            self.latencies = deque(maxlen=LATENCY_SAMPLES)
+            self.max_latency = 0.0
+
+    def _record_latency(self, event):
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            self.latencies.append(duration)
+            self.max_latency = max(self.max_latency, duration)
+
+    def pool_created(self, event):
+        with self._lock:
+            self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.pools = max(0, self.pools - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.wait_queue += 1
+            self.max_wait_queue = max(self.max_wait_queue, self.wait_queue)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.wait_queue = max(0, self.wait_queue - 1)
+            self.checkout_failures += 1
+            self._record_latency(event)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.wait_queue = max(0, self.wait_queue - 1)
+            self.checked_out += 1
+            self.checkouts += 1
+            self._record_latency(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = list(self.latencies)
+            return {
+                "pools": self.pools,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "wait_queue": self.wait_queue,
+                "max_wait_queue": self.max_wait_queue,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+                "checkout_latency_ms": {
+                    "samples": len(samples),
+                    "avg": sum(samples) / len(samples) * 1000 if samples else 0.0,
+                    "p50": _percentile(samples, 0.50) * 1000,
+                    "p95": _percentile(samples, 0.95) * 1000,
+                    "p99": _percentile(samples, 0.99) * 1000,
+                    "max": self.max_latency * 1000,
+                },
+            }
+
+pool_stats = PoolStatsListener()
+
+async def track_route(request: Request):
+    "Router dependency that attributes the queries of a request to its route."
+    route = request.scope.get("route")
+    path = route.path if route is not None else request.url.path
+    current_route.set(f"{request.method} {path}")
+
+def filter_shape(value):
+    "Replace the values of a query with '?' so queries with the same shape group together"
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [filter_shape(value[0])] if value else []
+    return "?"
+
+def _command_filter(command_name: str, command: dict):
+    if command_name in ("find", "count", "distinct"):
+        return command.get("filter", command.get("query"))
+    if command_name == "findAndModify":
+        return command.get("query")
+    if command_name == "update":
+        updates = command.get("updates") or [{}]
+        return updates[0].get("q")
+    if command_name == "delete":
+        deletes = command.get("deletes") or [{}]
+        return deletes[0].get("q")
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        return pipeline[0].get("$match")
+    return None
+
+class QueryStatsListener(monitoring.CommandListener):
+    """
+    Records the duration of every command, grouped by route, collection and operation.
+    Commands slower than MONGO_SLOW_QUERY_MS are logged with the shape of their filter.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: dict = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats: dict[tuple[str, str, str], dict] = {}
+            self.slow_queries = deque(maxlen=SLOW_QUERY_SAMPLES)
+
+    def started(self, event):
+        command_name = event.command_name
+        collection = event.command.get(command_name)
+        if command_name == "getMore":
+            collection = event.command.get("collection")
+        if not isinstance(collection, str):
+            collection = "-"
+        shape = filter_shape(_command_filter(command_name, event.command) or {})
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                current_route.get(), collection, command_name, shape
+            )
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+            if pending is None:
+                return
+            route, collection, operation, shape = pending
+            duration_ms = event.duration_micros / 1000
+
+            entry = self.stats.get((route, collection, operation))
+            if entry is None:
+                entry = {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0}
+                self.stats[(route, collection, operation)] = entry
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            if failed:
+                entry["failures"] += 1
+
+            is_slow = duration_ms >= settings.MONGO_SLOW_QUERY_MS
+            if is_slow:
+                self.slow_queries.append({
+                    "route": route,
+                    "collection": collection,
+                    "operation": operation,
+                    "duration_ms": duration_ms,
+                    "filter": shape,
+                })
+
+        if is_slow:
+            slow_query_logger.warning(
+                f"Slow query {duration_ms:.1f}ms on {collection}.{operation} "
+                f"from {route}: filter={shape}"
+            )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes: dict[str, dict] = {}
+            for (route, collection, operation), entry in self.stats.items():
+                route_stats = routes.setdefault(route, {"count": 0, "total_ms": 0.0, "commands": []})
+                route_stats["count"] += entry["count"]
+                route_stats["total_ms"] += entry["total_ms"]
+                route_stats["commands"].append({
+                    "collection": collection,
+                    "operation": operation,
+                    **entry,
+                    "avg_ms": entry["total_ms"] / entry["count"],
+                })
+            for route_stats in routes.values():
+                route_stats["commands"].sort(key=lambda command: command["total_ms"], reverse=True)
+            return {
+                "slow_query_ms": settings.MONGO_SLOW_QUERY_MS,
+                "routes": dict(sorted(routes.items(), key=lambda item: item[1]["total_ms"], reverse=True)),
+                "slow_queries": list(self.slow_queries),
+            }
+
+query_stats = QueryStatsListener()
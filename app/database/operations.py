@@ -0,0 +1,60 @@
+from typing import NamedTuple, Optional
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Precondition(NamedTuple):
+    """Extra filter a document must match for an update to apply, and the error raised when it does not."""
+    filter: dict
+    status_code: int
+    detail: str
+
+def _combine(*filters: dict) -> dict:
+    "Merge filters into one query, falling back to $and when they constrain the same field"
+    combined = {}
+    for filter in filters:
+        if combined.keys() & filter.keys():
+            return {"$and": list(filters)}
+        combined.update(filter)
+    return combined
+
+async def find_one_and_update_or_raise(
+    collection,
+    filter: dict,
+    update: dict,
+    *,
+    preconditions: list[Precondition] = (),
+    not_found_detail: str = "Document not found",
+    projection: Optional[dict] = None,
+) -> dict:
+    """
+    Apply an update and return the updated document in a single round trip.
+    - The update only applies when the document matches the filter and every precondition.
+    - When nothing matched, the reason is looked up afterwards: 404 if the document does not exist,
+      otherwise the error of the first precondition that fails.
+    """
+    query = _combine(filter, *(p.filter for p in preconditions))
+
+    document = await collection.find_one_and_update(
+        query,
+        update,
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
+    if document is not None:
+        return document
+
+    # Only failed updates pay for the extra reads.
+    if await collection.find_one(filter, {"_id": 1}) is None:
+        logger.error(not_found_detail)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+
+    for precondition in preconditions:
+        if await collection.find_one(_combine(filter, precondition.filter), {"_id": 1}) is None:
+            logger.error(precondition.detail)
+            raise HTTPException(status_code=precondition.status_code, detail=precondition.detail)
+
+    logger.error("The document was modified by another request")
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The document was modified by another request")
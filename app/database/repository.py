@@ -0,0 +1,80 @@
+from typing import Iterable, Optional
+from pymongo import UpdateOne
+from app.database.operations import Precondition, find_one_and_update_or_raise
+
+class Repository:
+    """
+    Thin access layer over one collection.
+    Every read takes an explicit projection so callers only decode the fields they use.
+    """
+    collection_name: str
+
+    def __init__(self, db):
+        self.collection = db[self.collection_name]
+
+    async def find_one(self, filter: dict, projection: dict) -> Optional[dict]:
+        return await self.collection.find_one(filter, projection)
+
+    async def find_many(
+        self,
+        filter: dict,
+        projection: dict,
+        *,
+        sort: Optional[list[tuple[str, int]]] = None,
+        limit: Optional[int] = None
+    ) -> list[dict]:
+        cursor = self.collection.find(filter, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=limit or None)
+
+    async def aggregate(self, pipeline: list[dict], limit: Optional[int] = None) -> list[dict]:
+        return await self.collection.aggregate(pipeline).to_list(length=limit)
+
+    async def exists(self, filter: dict) -> bool:
+        return await self.collection.find_one(filter, {"_id": 1}) is not None
+
+    async def insert_one(self, document: dict):
+        return await self.collection.insert_one(document)
+
+    async def update_and_return(
+        self,
+        filter: dict,
+        update: dict,
+        projection: dict,
+        *,
+        preconditions: list[Precondition] = (),
+        not_found_detail: str = "Document not found"
+    ) -> dict:
+        return await find_one_and_update_or_raise(
+            self.collection,
+            filter,
+            update,
+            preconditions=preconditions,
+            not_found_detail=not_found_detail,
+            projection=projection
+        )
+
+    async def bulk_upsert(self, documents: Iterable[dict], key: str = "id", batch_size: int = 1000) -> dict:
+        """
+        Upsert documents keyed on `key` with one bulk_write per batch.
+        Unchanged documents are matched but not modified, so running it twice is harmless.
+        """
+        report = {"inserted": 0, "updated": 0, "unchanged": 0}
+        batch = []
+        for document in documents:
+            batch.append(UpdateOne({key: document[key]}, {"$set": document}, upsert=True))
+            if len(batch) >= batch_size:
+                await self._write_batch(batch, report)
+                batch = []
+        if batch:
+            await self._write_batch(batch, report)
+        return report
+
+    async def _write_batch(self, batch: list[UpdateOne], report: dict):
+        result = await self.collection.bulk_write(batch, ordered=False)
+        report["inserted"] += result.upserted_count
+        report["updated"] += result.modified_count
+        report["unchanged"] += result.matched_count - result.modified_count
@@ -0,0 +1,64 @@
+import json
+from typing import Iterator
+
+READ_CHUNK_SIZE = 64 * 1024
+
+def iter_json_array(path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array one at a time.
+    The file is read in chunks, so memory stays proportional to the largest element, not the file.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        position = 0
+        started = False
+        eof = False
+
+        while True:
+            # Skip whitespace and separators up to the next element
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+
+            if position == len(buffer) and not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            if not started:
+                if position == len(buffer) or buffer[position] != "[":
+                    raise ValueError(f"{path} does not contain a JSON array")
+                started = True
+                position += 1
+                continue
+
+            if position == len(buffer):
+                raise ValueError(f"{path} ends before the JSON array is closed")
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element continues in the next chunk
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(buffer) and not eof and not isinstance(element, (dict, list, str)):
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            yield element
+            position = end
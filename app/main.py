@@ -2,27 +2,58 @@ import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api.api import api_router
+from app.api.assignments.outbox import finalization_outbox
+from app.api.auth.allowlist import email_allowlist
+from app.api.auth.service import verify_email_index
+from app.api.missions.catalog import catalog
+from app.api.profiles.migration import run_startup_migrations
+from app.api.indexes import INDEX_REGISTRY
 from app.core.config import settings
-from app.database.database import close_mongo_connection, connect_to_mongo, setup_ttl_indexes
+from app.core.hashing import calibrate_password_hashing, password_executor
+from app.database.database import close_mongo_connection, connect_to_mongo, setup_indexes
 from starlette.middleware.cors import CORSMiddleware
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(levelname)s - %(asctime)s - %(name)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Show in console
-        logging.FileHandler('app.log')  # Save to file
-    ]
-)
+def configure_logging():
+    "Called from the lifespan so importing the app does not create app.log"
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(levelname)s - %(asctime)s - %(name)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(),  # Show in console
+            logging.FileHandler('app.log')  # Save to file
+        ]
+    )
+
+async def build_indexes(db):
+    await setup_indexes(INDEX_REGISTRY)
+    # Registrations rely on the unique email index once it is confirmed
+    await verify_email_index(db)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
-    await connect_to_mongo()
-    await setup_ttl_indexes()
+    configure_logging()
+    await calibrate_password_hashing()
+    db = await connect_to_mongo()
+    # Serve the mission catalog and the email allowlist from memory; they load on first use if this fails
+    try:
+        await catalog.reload(db)
+        await email_allowlist.reload(db)
+    except Exception:
+        logging.getLogger(__name__).exception("Could not load the in-memory data on startup")
+    # Indexes are built in the background so startup is not blocked
+    index_task = asyncio.create_task(build_indexes(db))
+    # Resumable profile migrations; the API handles unmigrated profiles until they finish
+    migration_task = asyncio.create_task(run_startup_migrations(db))
+    # Finalizes closed votings, including those left pending by a previous process
+    finalization_outbox.start(db)
     yield
     # Shutdown logic
+    index_task.cancel()
+    migration_task.cancel()
+    await finalization_outbox.stop()
+    password_executor.shutdown()
     await close_mongo_connection()
 
 app = FastAPI(
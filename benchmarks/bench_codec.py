@@ -0,0 +1,150 @@
+"""
+Micro-benchmark: MongoCodec against the recursive prepare_for_mongo / parse_from_mongo helpers.
+
+Run from the repository root:
+    python -m benchmarks.bench_codec
+"""
+from datetime import datetime, timezone
+import timeit
+from app.api.assignments.schemas import Assignments, Mission, MissionStatus
+from app.api.auth.schemas import UserInDb
+from app.api.group.schemas import Group, Member
+from app.api.history.schemas import Event
+from app.api.profiles.schemas import Deuda, Pesos, Profile
+from app.api.second_missions.schemas import SecondaryMission
+from app.database.codec import codec_for
+
+ROUNDS = 20000
+
+# Previous implementation, kept here as the baseline.
+# MongoDB stores dates as BSON Date objects, not as Python objects.
+def prepare_for_mongo(data):
+    # If it's a dictionary, process each field
+    if isinstance(data, dict):
+        result = {}
+        for key, value in data.items():
+            # Case 1: If it's a datetime object → convert to ISO string
+            if isinstance(value, datetime):
+                result[key] = value.isoformat()
+            # Case 2: If it's another dictionary → recursion
+            elif isinstance(value, dict):
+                result[key] = prepare_for_mongo(value)
+            # Case 3: If it's a list → process each element
+            elif isinstance(value, list):
+                result[key] = [prepare_for_mongo(item) if isinstance(item, dict) else item for item in value]
+            # Case 4: Other types → direct copy
+            else:
+                result[key] = value
+        return result
+    return data
+
+def parse_from_mongo(item):
+    if isinstance(item, dict):
+        result = {}
+        for key, value in item.items():
+            if key.endswith('_at') and isinstance(value, str):
+                try:
+                    result[key] = datetime.fromisoformat(value)
+                except Exception:
+                    result[key] = value
+            elif isinstance(value, dict):
+                result[key] = parse_from_mongo(value)
+            elif isinstance(value, list):
+                result[key] = [parse_from_mongo(v) if isinstance(v, dict) else v for v in value]
+            else:
+                result[key] = value
+        return result
+    return item
+
+def mission(mission_id: str) -> Mission:
+    return Mission(
+        mission_name=f"Mission {mission_id}",
+        mission_id=mission_id,
+        status=MissionStatus.PENDING_REVIEW,
+        creation_date=datetime.now(),
+        result="Done it twice, video in the group chat",
+        like=3,
+        dislike=1,
+        voters=["a1b2c3", "d4e5f6", "g7h8i9", "j0k1l2"],
+    )
+
+SAMPLES = [
+    UserInDb(
+        email="someone@example.com",
+        name="Someone",
+        role="user",
+        created_at=datetime.now(timezone.utc),
+        is_active=True,
+        group_id="3f1c2a4e-0000-4000-8000-000000000000",
+        hashed_password="$2b$12$" + "x" * 53,
+    ),
+    Profile(
+        name="Someone",
+        email="someone@example.com",
+        user_id="3f1c2a4e-0000-4000-8000-000000000001",
+        edad="27",
+        estatura="180",
+        peso_corporal="82",
+        pesos=Pesos(pressBanca="100", sentadilla="140", pesoMuerto="180", prensa="250", biceps="20"),
+        apodo="El Toro",
+        aura="1250",
+        deuda=Deuda(tipo="cerveza", cantidad="2"),
+        frase="No pain no gain",
+        objetivo="Press banca 120",
+    ),
+    Assignments(
+        person_id="3f1c2a4e-0000-4000-8000-000000000001",
+        person_name="Someone",
+        mission=mission("4"),
+        secondary_mission=mission("9a7e0c1d-0000-4000-8000-000000000000"),
+        group_mission=None,
+    ),
+    Event(
+        user_id="3f1c2a4e-0000-4000-8000-000000000001",
+        mission_id="4",
+        name="Mission 4",
+        tipo="mission",
+        result="Done",
+        status="completed",
+        logro_name="El Temerario del Fallo Muscular",
+    ),
+    SecondaryMission(
+        user_id="3f1c2a4e-0000-4000-8000-000000000001",
+        nombre="Reto de la semana",
+        descripcion="Invita a un amigo nuevo al gym y entrenad juntos tres dias. " * 4,
+        recompensa="500",
+    ),
+    Group(
+        group_name="Iron Brothers",
+        members=[Member(user_id=f"user-{i}", user_name=f"User {i}") for i in range(5)],
+        created=datetime.now(),
+        created_by="User 0",
+        creator_id="user-0",
+    ),
+]
+
+def bench(label: str, fn) -> float:
+    seconds = min(timeit.repeat(fn, number=ROUNDS, repeat=3))
+    per_call = seconds / ROUNDS * 1e6
+    print(f"  {label:<10} {per_call:8.2f} us/op")
+    return per_call
+
+def main():
+    for sample in SAMPLES:
+        model = type(sample)
+        codec = codec_for(model)
+        legacy_doc = prepare_for_mongo(sample.model_dump())
+        codec_doc = codec.encode(sample)
+
+        print(f"{model.__name__}")
+        print(" write")
+        before = bench("legacy", lambda: prepare_for_mongo(sample.model_dump()))
+        after = bench("codec", lambda: codec.encode(sample))
+        print(f"  speedup    {before / after:8.2f}x")
+        print(" read")
+        before = bench("legacy", lambda: model(**parse_from_mongo(dict(legacy_doc))))
+        after = bench("codec", lambda: codec.load(dict(codec_doc)))
+        print(f"  speedup    {before / after:8.2f}x")
+
+if __name__ == "__main__":
+    main()
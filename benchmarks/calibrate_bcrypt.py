@@ -0,0 +1,35 @@
+"""
+Measure bcrypt on this host and recommend BCRYPT_ROUNDS for a target hash time.
+
+Prints the hash time for each cost in the allowed range and the highest cost within the target,
+the same choice the app makes at startup when BCRYPT_TARGET_MS is set.
+
+Run from the repository root:
+    python -m benchmarks.calibrate_bcrypt --target-ms 250
+"""
+import argparse
+from app.core.config import settings
+from app.core.security import calibrate_bcrypt_rounds, measure_bcrypt_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=settings.BCRYPT_TARGET_MS or 250)
+    parser.add_argument("--min-rounds", type=int, default=settings.BCRYPT_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=settings.BCRYPT_MAX_ROUNDS)
+    parser.add_argument("--table", action="store_true", help="time every cost up to the target and one above")
+    args = parser.parse_args()
+
+    if args.table:
+        print(f"{'rounds':>6} {'hash ms':>9}")
+        for rounds in range(args.min_rounds, args.max_rounds + 1):
+            elapsed = measure_bcrypt_ms(rounds, samples=1)
+            print(f"{rounds:6d} {elapsed:9.1f}")
+            if elapsed > args.target_ms:
+                break
+
+    rounds = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"Recommended BCRYPT_ROUNDS={rounds} ({measure_bcrypt_ms(rounds):.1f}ms, target {args.target_ms:.0f}ms, "
+          f"currently {settings.BCRYPT_ROUNDS})")
+
+if __name__ == "__main__":
+    main()
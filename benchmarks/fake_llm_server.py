@@ -0,0 +1,97 @@
+"""
+Local stand-in for the Gemini API, to test mission generation offline.
+
+Answers `POST /{version}/models/{model}:generateContent` with a mission JSON in the Gemini
+response format, after `--latency` seconds (plus up to `--jitter`). `--failure-rate` answers
+that share of requests with a 500 and `--hang-rate` never answers them, to exercise the
+client timeout. GET /stats reports the requests served and the peak in flight.
+
+Run it and point the app at it:
+    python -m benchmarks.fake_llm_server --port 8090 --latency 2 --failure-rate 0.05
+    GOOGLE_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:8090 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+
+@dataclass
+class FakeLLMBehaviour:
+    latency: float = 1.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    hang_rate: float = 0.0
+
+def mission_response(number: int) -> dict:
+    mission = {
+        "nombre": f"Reto de prueba {number}",
+        "descripcion": "Haz 20 flexiones cada mañana durante una semana y compártelo con el grupo.",
+        "recompensa": str(random.randrange(100, 1001, 50)),
+    }
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": json.dumps(mission, ensure_ascii=False)}]},
+            "finishReason": "STOP",
+        }],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0},
+    }
+
+def create_app(behaviour: FakeLLMBehaviour) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    stats = {"requests": 0, "answered": 0, "failed": 0, "hung": 0, "in_flight": 0, "peak_in_flight": 0}
+
+    @app.post("/{api_version}/models/{model_action}")
+    async def generate_content(api_version: str, model_action: str):
+        if not model_action.endswith(":generateContent"):
+            raise HTTPException(status_code=404, detail=f"Unsupported action: {model_action}")
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        try:
+            roll = random.random()
+            if roll < behaviour.hang_rate:
+                stats["hung"] += 1
+                # Held until the client gives up and disconnects
+                await asyncio.Event().wait()
+            await asyncio.sleep(behaviour.latency + random.uniform(0, behaviour.jitter))
+            if roll < behaviour.hang_rate + behaviour.failure_rate:
+                stats["failed"] += 1
+                return JSONResponse(
+                    status_code=500,
+                    content={"error": {"code": 500, "message": "Injected failure", "status": "INTERNAL"}}
+                )
+            stats["answered"] += 1
+            return mission_response(stats["answered"])
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds before each answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with a 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests never answered")
+
+def behaviour_from(args) -> FakeLLMBehaviour:
+    return FakeLLMBehaviour(args.latency, args.jitter, args.failure_rate, args.hang_rate)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(behaviour_from(args)), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Import-time budget check for app.main, based on `python -X importtime`.
+
+Fails (exit code 1) when importing the app takes longer than the budget, pulls in a module
+that must stay lazy, or configures logging as a side effect.
+
+tests/test_import_time.py enforces the same checks in the test suite; this script prints the slowest modules.
+
+Run from the repository root:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 800 --runs 5
+"""
+import argparse
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 1000
+DEFAULT_RUNS = 3
+
+# Modules that are loaded on first use, never while importing the app
+LAZY_MODULES = ["google.genai"]
+
+CHILD = (
+    "import logging, sys\n"
+    "import app.main\n"
+    "sys.exit(3 if logging.getLogger().handlers else 0)\n"
+)
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    "Module -> (self us, cumulative us) from the -X importtime report"
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+def measure() -> dict[str, tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode == 3:
+        raise SystemExit("FAIL: importing app.main configured logging handlers")
+    if result.returncode != 0:
+        raise SystemExit(f"FAIL: importing app.main failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to print")
+    args = parser.parse_args()
+
+    # Keep the fastest run; the slower ones measure disk cache and scheduler noise
+    best = min((measure() for _ in range(args.runs)), key=lambda modules: modules["app.main"][1])
+    total_ms = best["app.main"][1] / 1000
+
+    print(f"import app.main: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for name, (self_us, cumulative_us) in sorted(best.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+    failures = []
+    loaded = [module for module in LAZY_MODULES if module in best]
+    if loaded:
+        failures.append(f"modules that must be imported lazily were loaded: {', '.join(loaded)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
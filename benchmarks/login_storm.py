@@ -0,0 +1,116 @@
+"""
+Load test: latency of unrelated requests while a burst of logins is being processed.
+
+A probe keeps calling GET / while `--logins` logins run with `--concurrency` in flight.
+With the inline executor every bcrypt call blocks the event loop, so the probe's p99 grows
+to the cost of several hashes; with the thread or process executor it should stay close to
+the idle baseline.
+
+Runs the whole app in-process on the memory database backend:
+    python -m benchmarks.login_storm
+    python -m benchmarks.login_storm --modes inline thread process --logins 40 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+
+import httpx
+import logging
+from app.core import hashing
+from app.core.config import settings
+from app.core.hashing import PasswordHashExecutor
+from app.database.database import close_mongo_connection, connect_to_mongo
+from app.main import app
+
+EMAIL = "storm@example.com"
+PASSWORD = "storm-password"
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summary(samples: list[float]) -> str:
+    ms = [sample * 1000 for sample in samples]
+    return (
+        f"n={len(ms):4d}  p50={percentile(ms, 0.50):7.1f}ms  p95={percentile(ms, 0.95):7.1f}ms  "
+        f"p99={percentile(ms, 0.99):7.1f}ms  max={max(ms):7.1f}ms"
+    )
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+        await asyncio.sleep(interval)
+    return latencies
+
+async def login(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, statuses: dict):
+    async with semaphore:
+        response = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+async def run_mode(client: httpx.AsyncClient, mode: str, args) -> None:
+    hashing.password_executor.shutdown()
+    hashing.password_executor = PasswordHashExecutor(
+        mode,
+        args.workers,
+        settings.PASSWORD_HASH_MAX_PENDING,
+        settings.PASSWORD_HASH_TIMEOUT_SECONDS
+    )
+    # Warm up the executor (process pools start their workers here)
+    await login(client, asyncio.Semaphore(1), {})
+
+    stop = asyncio.Event()
+    idle_task = asyncio.create_task(probe(client, stop, args.interval))
+    await asyncio.sleep(args.idle_seconds)
+    stop.set()
+    idle = await idle_task
+
+    stop = asyncio.Event()
+    statuses: dict[int, int] = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    probe_task = asyncio.create_task(probe(client, stop, args.interval))
+    started = time.perf_counter()
+    await asyncio.gather(*(login(client, semaphore, statuses) for _ in range(args.logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    storm = await probe_task
+
+    print(f"[{mode}] logins: {args.logins} in {elapsed:.1f}s ({args.logins / elapsed:.1f}/s), statuses {statuses}")
+    print(f"[{mode}]   GET / idle        {summary(idle)}")
+    print(f"[{mode}]   GET / during storm {summary(storm)}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread"], choices=hashing.EXECUTOR_KINDS)
+    parser.add_argument("--logins", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--interval", type=float, default=0.005, help="pause between probe requests (s)")
+    parser.add_argument("--idle-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    db = await connect_to_mongo()
+    await db.emails.insert_one({"email": EMAIL})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="https://test") as client:
+        response = await client.post(
+            "/api/v1/auth/register",
+            json={"name": "storm", "email": EMAIL, "password": PASSWORD, "role": "user"}
+        )
+        assert response.status_code == 201, response.text
+        for mode in args.modes:
+            await run_mode(client, mode, args)
+
+    hashing.password_executor.shutdown()
+    await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
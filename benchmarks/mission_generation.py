@@ -0,0 +1,108 @@
+"""
+Load test: concurrent secondary mission generation against the fake LLM server.
+
+Starts benchmarks/fake_llm_server.py in-process, points GEMINI_BASE_URL at it and generates
+`--missions` secondary missions with `--concurrency` in flight. A probe measures how late the
+event loop wakes it up meanwhile: with a blocking LLM call the lag grows to the full LLM latency,
+with the async client it should stay within a few milliseconds.
+
+Runs on the memory database backend:
+    python -m benchmarks.mission_generation
+    python -m benchmarks.mission_generation --missions 200 --concurrency 50 --latency 1 --hang-rate 0.02
+"""
+import argparse
+import asyncio
+import os
+import socket
+import time
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+os.environ.setdefault("GOOGLE_API_KEY", "fake")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+PORT = free_port()
+os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{PORT}"
+
+import httpx
+import logging
+import uvicorn
+from fastapi import HTTPException
+from app.api.second_missions.llm import get_genai_client
+from app.api.second_missions.service import create_secondary_mission
+from app.core.config import settings
+from app.database.database import close_mongo_connection, connect_to_mongo
+from benchmarks.fake_llm_server import add_behaviour_arguments, behaviour_from, create_app
+from benchmarks.login_storm import summary
+
+async def probe(stop: asyncio.Event, interval: float) -> list[float]:
+    "Lateness of each wake-up past `interval`"
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+    return lags
+
+async def generate(db, user_id: str, semaphore: asyncio.Semaphore, statuses: dict, latencies: list):
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            await create_secondary_mission(user_id, db)
+            code = 200
+        except HTTPException as e:
+            code = e.status_code
+        latencies.append(time.perf_counter() - started)
+        statuses[code] = statuses.get(code, 0) + 1
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--missions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--interval", type=float, default=0.01, help="probe sleep (s)")
+    add_behaviour_arguments(parser)
+    parser.set_defaults(latency=0.5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    server = uvicorn.Server(uvicorn.Config(create_app(behaviour_from(args)), port=PORT, log_level="warning", lifespan="off"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    db = await connect_to_mongo()
+    # google.genai is imported on first use; keep that out of the measurement
+    get_genai_client()
+    user_ids = [f"user-{i}" for i in range(args.missions)]
+    await db.profiles.insert_many([{"user_id": user_id, "name": user_id, "aura": 0} for user_id in user_ids])
+
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, args.interval))
+    statuses: dict[int, int] = {}
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(generate(db, user_id, semaphore, statuses, latencies) for user_id in user_ids))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = await probe_task
+
+    async with httpx.AsyncClient(base_url=os.environ["GEMINI_BASE_URL"]) as client:
+        stats = (await client.get("/stats")).json()
+    print(
+        f"{args.missions} missions in {elapsed:.1f}s ({args.missions / elapsed:.1f}/s), statuses {dict(sorted(statuses.items()))}, "
+        f"LLM peak in flight {stats['peak_in_flight']} (GEMINI_MAX_CONCURRENCY={settings.GEMINI_MAX_CONCURRENCY})"
+    )
+    print(f"  generation      {summary(latencies)}")
+    print(f"  event loop lag  {summary(lags)}")
+
+    await close_mongo_connection()
+    # Hung requests never finish, so do not wait for them
+    server.should_exit = server.force_exit = True
+    await server_task
+
+if __name__ == "__main__":
+    asyncio.run(main())
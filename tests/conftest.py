@@ -0,0 +1,56 @@
+"""
+The tests run on the in-memory database backend and need no .env file.
+Set TEST_MONGODB_URL to also run the `any_db` tests against a real server (each test uses a fresh database).
+"""
+import asyncio
+import os
+import uuid
+
+os.environ.setdefault("ACCESS_TOKEN_SECRET_KEY", "test-access-secret")
+os.environ.setdefault("REFRESH_TOKEN_SECRET_KEY", "test-refresh-secret")
+os.environ.setdefault("DATABASE_URL", "mongodb://localhost:27017")
+os.environ["DATABASE_BACKEND"] = "memory"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+from app.database.memory import MemoryClient
+
+TEST_MONGODB_URL = os.environ.get("TEST_MONGODB_URL")
+
+@pytest.fixture(scope="session")
+def run():
+    """
+    Run a coroutine on one event loop shared by the whole session.
+    The app keeps module-level locks and semaphores, which are bound to the first loop they wait on.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+@pytest.fixture
+def db():
+    "A fresh in-memory database"
+    return MemoryClient()[f"test_{uuid.uuid4().hex}"]
+
+@pytest.fixture(params=["memory", "mongo"])
+def any_db(request, run):
+    "A fresh database on each backend; the mongo case is skipped without TEST_MONGODB_URL"
+    if request.param == "memory":
+        yield MemoryClient()[f"test_{uuid.uuid4().hex}"]
+        return
+    if not TEST_MONGODB_URL:
+        pytest.skip("TEST_MONGODB_URL is not set")
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(TEST_MONGODB_URL, serverSelectionTimeoutMS=2000)
+    name = f"test_{uuid.uuid4().hex}"
+    yield client[name]
+    run(client.drop_database(name))
+    client.close()
+
+@pytest.fixture(autouse=True)
+def no_completed_migrations():
+    "Each test starts as a process whose startup migrations have not finished"
+    from app.api.profiles.migration import completed_migrations
+    completed_migrations.clear()
+    yield
+    completed_migrations.clear()
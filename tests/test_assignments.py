@@ -0,0 +1,18 @@
+"""Replacing the mission of an assignment."""
+import pytest
+from fastapi import HTTPException
+from app.api.assignments import service
+from app.api.assignments.schemas import MissionType
+
+def test_unknown_user_is_rejected_before_generating_a_mission(db, run, monkeypatch):
+    generated = []
+
+    async def create_secondary_mission(user_id, db):
+        generated.append(user_id)
+
+    monkeypatch.setattr(service, "create_secondary_mission", create_secondary_mission)
+    with pytest.raises(HTTPException) as error:
+        run(service.update_assignments_missions("nobody", MissionType.SECONDARY, db))
+    assert error.value.status_code == 404
+    assert generated == []
+    assert run(db.secondary.count_documents({})) == 0
@@ -0,0 +1,81 @@
+"""Mission catalog: the progression index and what the catalog serves to clients."""
+import json
+
+import pytest
+from pydantic import ValidationError
+from app.api.missions.catalog import MissionCatalog, build_progression
+from app.api.missions.schemas import CatalogMission, Logro, Mission
+from app.core.config import settings
+
+NIVEL = {"descripcionNivel": "", "rangoXp": "", "imagen": ""}
+
+def mission(mission_id: str, level: int = 1, **extra) -> dict:
+    return {
+        "id": mission_id, "imagen": "", "nombre": f"Mission {mission_id}", "recompensa": "100",
+        "descripcion": "", "nivel": {"numeroNivel": level, **NIVEL}, **extra,
+    }
+
+def logro(logro_id: str, mission_id: str) -> Logro:
+    return Logro(
+        id=logro_id, nombre=f"Logro {mission_id}", descripcion="", pegatina="",
+        misionAsociada="", idMision=mission_id, nivel="1"
+    )
+
+def test_progression_follows_catalog_order_and_siguiente():
+    missions = [
+        CatalogMission(**mission("1")),
+        CatalogMission(**mission("2", logro={"nombre": "Embedded", "descripcion": "", "pegatina": ""})),
+        CatalogMission(**mission("5", level=2, siguiente="9")),
+        CatalogMission(**mission("7", level=2, siguiente="404")),
+        CatalogMission(**mission("9", level=3)),
+    ]
+    progression = build_progression(missions, [logro("l1", "1"), logro("l2", "2")])
+
+    # Gaps in the ids are skipped, siguiente overrides the order, unknown successors end the chain
+    assert [progression[mission_id].next_id for mission_id in ("1", "2", "5", "7", "9")] == ["2", "5", "9", None, None]
+    assert progression["5"].level == 2
+    # The embedded logro wins over the logro that points to the mission
+    assert (progression["1"].logro_name, progression["2"].logro_name, progression["9"].logro_name) == ("Logro 1", "Embedded", None)
+
+def test_branching_siguiente_is_rejected():
+    with pytest.raises(ValidationError):
+        CatalogMission(**mission("1", siguiente=["2", "3"]))
+
+def test_catalog_serves_missions_without_server_fields(db, run):
+    run(db.missions.insert_many([mission("1", siguiente="3"), mission("2"), mission("3")]))
+    snapshot = run(MissionCatalog().reload(db))
+
+    served = json.loads(snapshot.missions_json)
+    assert [item["id"] for item in served] == ["1", "2", "3"]
+    assert all("siguiente" not in item for item in served)
+    assert "siguiente" not in Mission.model_fields
+    assert snapshot.first_mission_id == "1"
+    assert snapshot.get_next_mission("1").id == "3"
+    assert snapshot.get_next_mission("3") is None
+
+def test_reseed_in_one_worker_reaches_the_others(db, run, monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_REFRESH_SECONDS", 0)
+    run(db.missions.insert_many([mission("1"), mission("2")]))
+    # Two processes, each with its own catalog
+    serving, other = MissionCatalog(), MissionCatalog()
+    run(serving.reload(db))
+    run(other.reload(db))
+
+    run(db.missions.update_one({"id": "2"}, {"$set": {"nombre": "Renamed"}}))
+    published = run(serving.publish(db))
+    assert published.version == 1
+    assert other.snapshot.get_mission("2").nombre == "Mission 2"
+
+    assert other.is_due()
+    refreshed = run(other.refresh(db))
+    assert (refreshed.version, refreshed.etag) == (published.version, published.etag)
+    assert refreshed.get_mission("2").nombre == "Renamed"
+    # Nothing changed since: the snapshot is kept
+    assert run(other.refresh(db)) is refreshed
+
+def test_refresh_waits_for_the_interval(db, run, monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_REFRESH_SECONDS", 3600)
+    run(db.missions.insert_one(mission("1")))
+    worker = MissionCatalog()
+    run(worker.reload(db))
+    assert not worker.is_due()
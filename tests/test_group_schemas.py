@@ -0,0 +1,11 @@
+"""Aura is sent to clients as a string everywhere, like Profile.aura."""
+from app.api.group.schemas import DashboardProfile, LeaderboardEntry
+
+def test_leaderboard_aura_is_sent_as_a_string():
+    entry = LeaderboardEntry(rank=1, user_id="u1", name="ana", aura=120, delta=20)
+    assert entry.model_dump(mode="json")["aura"] == "120"
+    assert entry.model_dump()["aura"] == 120
+
+def test_dashboard_aura_is_sent_as_a_string():
+    profile = DashboardProfile(name="ana", aura=-40)
+    assert profile.model_dump(mode="json")["aura"] == "-40"
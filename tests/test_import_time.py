@@ -0,0 +1,35 @@
+"""Importing the app stays within its time budget, keeps heavy modules lazy and has no logging side effects."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from benchmarks.import_time import CHILD, DEFAULT_BUDGET_MS, LAZY_MODULES, parse_importtime
+
+ROOT = Path(__file__).resolve().parent.parent
+# Shared CI machines can be slower than a workstation; raise the budget there rather than skip the test
+BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS))
+RUNS = 3
+
+@pytest.fixture(scope="module")
+def import_runs() -> list[subprocess.CompletedProcess]:
+    return [
+        subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD], capture_output=True, text=True, cwd=ROOT)
+        for _ in range(RUNS)
+    ]
+
+def test_import_configures_no_logging(import_runs):
+    for result in import_runs:
+        assert result.returncode != 3, "importing app.main configured logging handlers"
+        assert result.returncode == 0, result.stderr[-2000:]
+
+def test_lazy_modules_are_not_imported(import_runs):
+    for result in import_runs:
+        loaded = [module for module in LAZY_MODULES if module in parse_importtime(result.stderr)]
+        assert not loaded, f"imported while loading the app: {loaded}"
+
+def test_import_time_within_budget(import_runs):
+    # The fastest run; the slower ones measure disk cache and scheduler noise
+    total_ms = min(parse_importtime(result.stderr)["app.main"][1] for result in import_runs) / 1000
+    assert total_ms <= BUDGET_MS, f"import app.main took {total_ms:.1f} ms, budget {BUDGET_MS:.0f} ms"
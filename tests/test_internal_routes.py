@@ -0,0 +1,23 @@
+"""The internal statistics endpoints are only served where enabled, and only to admins."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.internal.routes import router
+from app.api.users.schemas import User
+from app.api.users.service import get_current_user
+
+def client_for(role: str) -> TestClient:
+    app = FastAPI()
+    app.include_router(router, prefix="/internal")
+    app.dependency_overrides[get_current_user] = lambda: User(id="u1", name="u", email="u@example.com", role=role)
+    return TestClient(app)
+
+def test_admin_can_read_internal_stats():
+    assert client_for("admin").get("/internal/user-cache").status_code == 200
+
+def test_other_roles_are_forbidden():
+    for path in ("/internal/pool-stats", "/internal/query-stats", "/internal/finalization-outbox"):
+        assert client_for("user").get(path).status_code == 403
+
+def test_internal_routes_are_not_mounted_by_default():
+    from app.main import app
+    assert not [route for route in app.routes if getattr(route, "path", "").startswith("/api/v1/internal")]
@@ -0,0 +1,45 @@
+"""Leaderboards rank every member, also of profiles the startup migrations have not reached yet."""
+import uuid
+
+from app.api.group.service import get_global_leaderboard, get_group_leaderboard
+from app.api.profiles.migration import run_startup_migrations
+
+async def seed_legacy_group(db, auras: list) -> str:
+    "A group created before profiles.group_id existed: only users.group_id and the member list hold it"
+    group_id = str(uuid.uuid4())
+    user_ids = [str(uuid.uuid4()) for _ in auras]
+    await db.users.insert_many([{"id": user_id, "email": f"{user_id}@example.com", "group_id": group_id} for user_id in user_ids])
+    await db.groups.insert_one({"id": group_id, "members": [{"user_id": user_id, "user_name": user_id[:8]} for user_id in user_ids]})
+    await db.profiles.insert_many([
+        {"user_id": user_id, "name": f"member {position}", "aura": aura}
+        for position, (user_id, aura) in enumerate(zip(user_ids, auras))
+    ])
+    return group_id
+
+def ranking(leaderboard) -> dict[str, tuple[int, int]]:
+    return {entry.name: (entry.rank, entry.aura) for entry in leaderboard.entries}
+
+def test_group_leaderboard_before_the_backfill(db, run):
+    group_id = run(seed_legacy_group(db, ["30", 50, "50"]))
+    leaderboard = run(get_group_leaderboard(group_id, db))
+    assert ranking(leaderboard) == {"member 1": (1, 50), "member 2": (1, 50), "member 0": (3, 30)}
+    assert {entry.group_id for entry in leaderboard.entries} == {group_id}
+
+def test_group_leaderboard_after_the_backfill(db, run):
+    group_id = run(seed_legacy_group(db, ["30", 50, "50"]))
+    run(run_startup_migrations(db))
+    assert run(db.profiles.count_documents({"group_id": group_id})) == 3
+    leaderboard = run(get_group_leaderboard(group_id, db))
+    assert ranking(leaderboard) == {"member 1": (1, 50), "member 2": (1, 50), "member 0": (3, 30)}
+
+def test_global_leaderboard_with_mixed_aura_types(db, run):
+    # More string auras than the limit; in BSON order all of them sort above the numbers
+    run(db.profiles.insert_many(
+        [{"user_id": f"s{aura}", "name": f"string {aura}", "aura": str(aura)} for aura in (5, 7, 9, 11)]
+        + [{"user_id": f"n{aura}", "name": f"number {aura}", "aura": aura} for aura in (100, 8, 1)]
+    ))
+    expected = {"number 100": (1, 100), "string 11": (2, 11), "string 9": (3, 9)}
+    assert ranking(run(get_global_leaderboard(3, db))) == expected
+
+    run(run_startup_migrations(db))
+    assert ranking(run(get_global_leaderboard(3, db))) == expected
@@ -0,0 +1,165 @@
+"""
+Behaviour of the in-memory backend that the services rely on.
+Every case also runs against a real server when TEST_MONGODB_URL is set, so the two stay in agreement.
+"""
+import re
+
+import pytest
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+PEOPLE = [
+    {"_id": 1, "name": "ana", "age": 30, "tags": ["a", "b"], "group": {"id": "g1"}, "scores": [{"v": 5}, {"v": 9}]},
+    {"_id": 2, "name": "bea", "age": 25, "tags": ["b"], "group": {"id": "g2"}, "scores": []},
+    {"_id": 3, "name": "Carla", "age": None, "tags": [], "group": {"id": "g1"}},
+    {"_id": 4, "name": "dani", "age": 41},
+]
+
+@pytest.fixture
+def people(any_db, run):
+    run(any_db.people.insert_many([dict(person) for person in PEOPLE]))
+    return any_db.people
+
+def ids(run, collection, filter, **kwargs) -> list:
+    return [doc["_id"] for doc in run(collection.find(filter, {"_id": 1}, **kwargs).to_list(None))]
+
+@pytest.mark.parametrize("filter,expected", [
+    ({"name": "ana"}, [1]),
+    ({"group.id": "g1"}, [1, 3]),
+    ({"tags": "b"}, [1, 2]),
+    ({"tags": ["b"]}, [2]),
+    ({"tags": {"$size": 0}}, [3]),
+    ({"age": {"$gt": 25}}, [1, 4]),
+    ({"age": {"$gte": 25, "$lt": 41}}, [1, 2]),
+    ({"age": None}, [3]),
+    ({"missing": None}, [1, 2, 3, 4]),
+    ({"age": {"$ne": None}}, [1, 2, 4]),
+    ({"age": {"$exists": False}}, []),
+    ({"group": {"$exists": False}}, [4]),
+    ({"name": {"$in": ["ana", "dani", "zoe"]}}, [1, 4]),
+    ({"name": {"$nin": ["ana", "dani"]}}, [2, 3]),
+    ({"tags": {"$all": ["a", "b"]}}, [1]),
+    ({"scores.v": 9}, [1]),
+    ({"scores": {"$elemMatch": {"v": {"$gt": 6}}}}, [1]),
+    ({"scores.1": {"$exists": True}}, [1]),
+    ({"age": {"$not": {"$gt": 26}}}, [2, 3]),
+    ({"name": {"$regex": "^c", "$options": "i"}}, [3]),
+    ({"name": re.compile("a$")}, [1, 2, 3]),
+    ({"$or": [{"age": 25}, {"name": "dani"}]}, [2, 4]),
+    ({"$and": [{"group.id": "g1"}, {"tags": "a"}]}, [1]),
+    ({"$nor": [{"age": {"$gt": 26}}, {"age": None}]}, [2]),
+])
+def test_query_operators(people, run, filter, expected):
+    assert sorted(ids(run, people, filter)) == expected
+
+def test_sort_skip_limit_and_count(people, run):
+    assert ids(run, people, {}, sort=[("age", -1)]) == [4, 1, 2, 3]
+    assert [doc["_id"] for doc in run(people.find({}).sort("name", 1).skip(1).limit(2).to_list(None))] == [1, 2]
+    assert run(people.count_documents({"group.id": "g1"})) == 2
+    assert run(people.count_documents({}, limit=3)) == 3
+
+def test_projection(people, run):
+    assert run(people.find_one({"_id": 1}, {"group.id": 1, "_id": 0})) == {"group": {"id": "g1"}}
+    assert run(people.find_one({"_id": 2}, {"scores": 0, "tags": 0, "group": 0})) == {"_id": 2, "name": "bea", "age": 25}
+
+def test_update_operators(people, run):
+    run(people.update_one({"_id": 1}, {
+        "$set": {"group.role": "admin"},
+        "$unset": {"age": ""},
+        "$inc": {"visits": 2},
+        "$addToSet": {"tags": {"$each": ["b", "c"]}},
+    }))
+    run(people.update_one({"_id": 1}, {"$push": {"log": {"$each": [1, 2, 3], "$slice": -2}}, "$pull": {"scores": {"v": 5}}}))
+    run(people.update_one({"_id": 1}, {"$inc": {"visits": 1}, "$max": {"best": 7}, "$min": {"worst": 3}}))
+    assert run(people.find_one({"_id": 1})) == {
+        "_id": 1, "name": "ana", "tags": ["a", "b", "c"], "group": {"id": "g1", "role": "admin"},
+        "scores": [{"v": 9}], "visits": 3, "log": [2, 3], "best": 7, "worst": 3,
+    }
+
+def test_inc_on_a_string_is_rejected(people, run):
+    with pytest.raises(WriteError):
+        run(people.update_one({"_id": 1}, {"$inc": {"name": 1}}))
+    assert run(people.find_one({"_id": 1}))["name"] == "ana"
+
+def test_update_many_and_upsert(people, run):
+    result = run(people.update_many({"group.id": "g1"}, {"$set": {"flag": True}}))
+    assert (result.matched_count, result.modified_count) == (2, 2)
+    result = run(people.update_one({"name": "eva", "age": {"$gt": 1}}, {"$set": {"age": 20}, "$setOnInsert": {"new": True}}, upsert=True))
+    assert result.upserted_id is not None
+    assert run(people.find_one({"_id": result.upserted_id}, {"_id": 0})) == {"name": "eva", "age": 20, "new": True}
+
+def test_find_one_and_update_returns_the_requested_version(people, run):
+    before = run(people.find_one_and_update({"_id": 2}, {"$inc": {"age": 1}}, projection={"age": 1, "_id": 0}))
+    after = run(people.find_one_and_update(
+        {"_id": 2}, {"$inc": {"age": 1}}, projection={"age": 1, "_id": 0}, return_document=ReturnDocument.AFTER
+    ))
+    assert (before, after) == ({"age": 25}, {"age": 27})
+    assert run(people.find_one_and_update({"_id": 99}, {"$set": {"age": 1}})) is None
+
+def test_conditional_update_applies_once(people, run):
+    filter = {"_id": 2, "tags": {"$ne": "z"}}
+    assert run(people.find_one_and_update(filter, {"$push": {"tags": "z"}})) is not None
+    assert run(people.find_one_and_update(filter, {"$push": {"tags": "z"}})) is None
+    assert run(people.find_one({"_id": 2}))["tags"] == ["b", "z"]
+
+def test_unique_indexes(any_db, run):
+    users = any_db.users
+    run(users.create_index([("email", 1)], name="email_unique", unique=True))
+    run(users.create_index([("token", 1)], name="token_unique", unique=True, sparse=True))
+    run(users.insert_one({"_id": 1, "email": "a@x", "token": "t1"}))
+    run(users.insert_one({"_id": 2, "email": "b@x"}))
+    # Sparse: documents without the field do not collide
+    run(users.insert_one({"_id": 3, "email": "c@x"}))
+
+    with pytest.raises(DuplicateKeyError):
+        run(users.insert_one({"_id": 4, "email": "a@x"}))
+    with pytest.raises(DuplicateKeyError):
+        run(users.insert_one({"_id": 1, "email": "d@x"}))
+    with pytest.raises(DuplicateKeyError):
+        run(users.update_one({"_id": 2}, {"$set": {"token": "t1"}}))
+    # Updating a document keeps its own key; a freed key can be taken
+    run(users.update_one({"_id": 1}, {"$set": {"email": "a@x", "name": "a"}}))
+    run(users.update_one({"_id": 1}, {"$set": {"email": "z@x"}}))
+    run(users.insert_one({"_id": 5, "email": "a@x"}))
+    run(users.delete_one({"_id": 5}))
+    run(users.insert_one({"_id": 6, "email": "a@x"}))
+    assert run(users.count_documents({})) == 4
+
+    # Without sparse, every document missing the field counts as null
+    with pytest.raises(DuplicateKeyError):
+        run(users.create_index([("phone", 1)], name="phone_unique", unique=True))
+    assert "phone_unique" not in run(users.index_information())
+
+def test_bulk_write_reports_errors(any_db, run):
+    items = any_db.items
+    run(items.create_index([("key", 1)], name="key_unique", unique=True))
+    run(items.insert_many([{"_id": 1, "key": "a"}, {"_id": 2, "key": "b"}]))
+    with pytest.raises(BulkWriteError) as error:
+        run(items.bulk_write([
+            UpdateOne({"_id": 1}, {"$set": {"n": 1}}),
+            UpdateOne({"_id": 2}, {"$set": {"key": "a"}}),
+            UpdateOne({"_id": 3}, {"$set": {"key": "c"}}, upsert=True),
+        ], ordered=False))
+    assert [e["index"] for e in error.value.details["writeErrors"]] == [1]
+    assert error.value.details["nUpserted"] == 1
+    assert sorted(doc["key"] for doc in run(items.find({}).to_list(None))) == ["a", "b", "c"]
+
+def test_indexed_lookups_return_documents_in_insertion_order(any_db, run):
+    items = any_db.items
+    run(items.create_index([("group", 1)], name="group"))
+    run(items.insert_many([{"_id": i, "group": i % 2} for i in (5, 1, 4, 2, 3)]))
+    run(items.delete_one({"_id": 1}))
+    run(items.insert_one({"_id": 7, "group": 1}))
+    assert ids(run, items, {"group": 1}) == [5, 3, 7]
+    assert run(items.find_one({"group": 0}))["_id"] == 4
+
+def test_aggregate_lookup(any_db, run):
+    run(any_db.owners.insert_many([{"_id": 1, "pet_id": "p1"}, {"_id": 2, "pet_id": None}]))
+    run(any_db.pets.insert_many([{"_id": 10, "id": "p1", "kind": "cat"}, {"_id": 11, "id": "p2", "kind": "dog"}]))
+    documents = run(any_db.owners.aggregate([
+        {"$match": {"_id": {"$in": [1, 2]}}},
+        {"$sort": {"_id": 1}},
+        {"$lookup": {"from": "pets", "localField": "pet_id", "foreignField": "id", "as": "pets"}},
+        {"$project": {"_id": 1, "pets.kind": 1}},
+    ]).to_list(None))
+    assert documents == [{"_id": 1, "pets": [{"kind": "cat"}]}, {"_id": 2, "pets": []}]
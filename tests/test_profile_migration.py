@@ -0,0 +1,22 @@
+"""The profile migrations started by the lifespan convert legacy profiles and can be turned off."""
+from app.api.profiles.migration import completed_migrations, run_startup_migrations
+from app.core.config import settings
+
+def test_startup_converts_string_auras(db, run):
+    run(db.profiles.insert_many([
+        {"user_id": "a", "aura": "120"},
+        {"user_id": "b", "aura": 40},
+        {"user_id": "c", "aura": "lots"},
+    ]))
+    run(run_startup_migrations(db))
+    auras = {profile["user_id"]: profile["aura"] for profile in run(db.profiles.find({}).to_list(None))}
+    assert auras == {"a": 120, "b": 40, "c": "lots"}
+    assert completed_migrations == {"aura", "groups"}
+
+def test_startup_migrations_can_be_disabled(db, run, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_MIGRATIONS_ON_STARTUP", False)
+    run(db.profiles.insert_one({"user_id": "a", "aura": "120"}))
+    run(run_startup_migrations(db))
+    assert run(db.profiles.find_one({"user_id": "a"}))["aura"] == "120"
+    # Run by hand before deploying, so the leaderboards read the migrated fields only
+    assert completed_migrations == {"aura", "groups"}
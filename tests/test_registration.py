@@ -0,0 +1,45 @@
+"""Duplicate registrations are rejected whether or not the unique email index is in place."""
+import pytest
+from fastapi import HTTPException
+from app.api.auth import service
+from app.api.auth.allowlist import email_allowlist
+from app.api.auth.schemas import UserCreate
+from app.api.indexes import INDEX_REGISTRY
+from app.database.indexes import reconcile_indexes
+
+EMAIL = "someone@example.com"
+
+@pytest.fixture
+def registration_db(db, run):
+    run(db.emails.insert_one({"email": EMAIL}))
+    run(email_allowlist.reload(db))
+    return db
+
+def register(run, db) -> int:
+    try:
+        run(service.create_user(UserCreate(name="someone", email=EMAIL, password="password", role="user"), db))
+        return 201
+    except HTTPException as e:
+        return e.status_code
+
+def test_duplicate_rejected_before_the_index_exists(registration_db, run):
+    assert run(service.verify_email_index(registration_db)) is False
+    assert register(run, registration_db) == 201
+    assert register(run, registration_db) == 409
+    assert run(registration_db.users.count_documents({"email": EMAIL})) == 1
+
+def test_duplicate_rejected_by_the_unique_index(registration_db, run):
+    run(reconcile_indexes(registration_db, INDEX_REGISTRY))
+    assert run(service.verify_email_index(registration_db)) is True
+    assert register(run, registration_db) == 201
+    assert register(run, registration_db) == 409
+    assert run(registration_db.users.count_documents({"email": EMAIL})) == 1
+
+def test_index_without_unique_is_not_trusted(registration_db, run):
+    run(registration_db.users.create_index([("email", 1)], name="users_email_unique"))
+    assert run(service.verify_email_index(registration_db)) is False
+
+def test_admin_role_cannot_be_chosen_at_registration(registration_db, run):
+    with pytest.raises(HTTPException) as error:
+        run(service.create_user(UserCreate(name="someone", email=EMAIL, password="password", role="admin"), registration_db))
+    assert error.value.status_code == 403
@@ -0,0 +1,125 @@
+"""Concurrent votes on one mission are never lost or counted twice, and a closed voting stays closed."""
+import asyncio
+import random
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from app.api.assignments.outbox import finalization_outbox
+from app.api.assignments.repository import AssignmentRepository
+from app.api.assignments.schemas import MissionStatus, MissionType, ParamsUpdateVote
+from app.api.assignments.service import create_assignments, update_missions_params_vote
+from app.api.missions.catalog import catalog
+from app.api.missions.service import initialize_logros, initialize_missions
+from app.api.profiles.repository import ProfileRepository
+
+@pytest.fixture
+def voting_db(db, run):
+    run(initialize_missions(db))
+    run(initialize_logros(db))
+    run(catalog.reload(db))
+    return db
+
+async def setup_group(db, members: int) -> tuple[str, list[str], str]:
+    "A group whose first member has a primary mission pending review; returns (person, other members, group)"
+    group_id = str(uuid.uuid4())
+    user_ids = [str(uuid.uuid4()) for _ in range(members)]
+    await db.users.insert_many([
+        {"id": user_id, "email": f"{user_id}@example.com", "name": user_id[:8], "role": "user", "group_id": group_id}
+        for user_id in user_ids
+    ])
+    await db.groups.insert_one({
+        "id": group_id,
+        "group_name": f"voting-{group_id[:8]}",
+        "members": [{"user_id": user_id, "user_name": user_id[:8]} for user_id in user_ids],
+    })
+    person_id = user_ids[0]
+    await db.profiles.insert_one({"user_id": person_id, "name": "voting", "aura": 0})
+    await create_assignments(person_id, "voting", db)
+    await db.assignments.update_one({"person_id": person_id}, {"$set": {"mission.status": MissionStatus.PENDING_REVIEW}})
+    return person_id, user_ids[1:], group_id
+
+async def add_member(db, group_id: str) -> str:
+    user_id = str(uuid.uuid4())
+    await db.users.insert_one({"id": user_id, "email": f"{user_id}@example.com", "name": user_id[:8], "role": "user", "group_id": group_id})
+    await db.groups.update_one({"id": group_id}, {"$push": {"members": {"user_id": user_id, "user_name": user_id[:8]}}})
+    return user_id
+
+async def vote(db, person_id: str, voter_id: str, like: bool) -> int:
+    try:
+        await update_missions_params_vote(person_id, voter_id, ParamsUpdateVote(mission_type=MissionType.MAIN, like=like), db)
+        return 200
+    except HTTPException as e:
+        return e.status_code
+
+async def assert_finalized_once(db, person_id: str, status: MissionStatus):
+    await finalization_outbox.drain(db)
+    assert (await db.assignments.find_one({"person_id": person_id})).get("outbox") is None
+    assert await db.history.count_documents({"user_id": person_id}) == 1
+    reward = int(catalog.snapshot.get_reward("1"))
+    aura = await ProfileRepository(db).get_aura(person_id)
+    assert aura == (reward if status == MissionStatus.COMPLETED else -reward)
+
+@pytest.mark.parametrize("members,repeats,outsiders,seed", [(2, 3, 2, 1), (5, 2, 3, 2), (8, 3, 5, 3), (12, 2, 0, 4)])
+def test_concurrent_votes_are_counted_once(voting_db, run, members, repeats, outsiders, seed):
+    db = voting_db
+    random.seed(seed)
+
+    async def scenario():
+        person_id, voters, _ = await setup_group(db, members)
+        calls = [(voter_id, random.random() < 0.6) for voter_id in voters for _ in range(repeats)]
+        calls += [(str(uuid.uuid4()), random.random() < 0.6) for _ in range(outsiders)]
+        random.shuffle(calls)
+        codes = await asyncio.gather(*(vote(db, person_id, voter_id, like) for voter_id, like in calls))
+        accepted = [call for call, code in zip(calls, codes) if code == 200]
+        return person_id, accepted, codes
+
+    person_id, accepted, codes = run(scenario())
+    votes_needed = members - 1
+    mission = run(AssignmentRepository(db).get_by_person_id(person_id))["mission"]
+    likes = sum(1 for _, like in accepted if like)
+    accepted_ids = [voter_id for voter_id, _ in accepted]
+
+    assert set(codes) <= {200, 406, 409}
+    assert len(accepted) == votes_needed
+    assert len(set(accepted_ids)) == len(accepted_ids)
+    assert sorted(mission["voters"]) == sorted(accepted_ids)
+    assert (mission["like"], mission["dislike"]) == (likes, votes_needed - likes)
+    expected = MissionStatus.COMPLETED if likes >= votes_needed - likes else MissionStatus.FAILED
+    assert mission["status"] == expected
+    run(assert_finalized_once(db, person_id, expected))
+
+def test_member_joining_after_the_voting_closed_cannot_reopen_it(voting_db, run):
+    db = voting_db
+
+    async def scenario():
+        person_id, voters, group_id = await setup_group(db, 3)
+        assert [await vote(db, person_id, voter_id, True) for voter_id in voters] == [200, 200]
+        # The group now needs one more vote than the voting closed with
+        newcomer = await add_member(db, group_id)
+        assert await vote(db, person_id, newcomer, False) == 406
+        return person_id
+
+    person_id = run(scenario())
+    mission = run(AssignmentRepository(db).get_by_person_id(person_id))["mission"]
+    assert mission["status"] == MissionStatus.COMPLETED
+    assert (mission["like"], mission["dislike"], len(mission["voters"])) == (2, 0, 2)
+    run(assert_finalized_once(db, person_id, MissionStatus.COMPLETED))
+
+def test_member_leaving_lets_the_next_vote_close_the_voting(voting_db, run):
+    db = voting_db
+
+    async def scenario():
+        person_id, voters, group_id = await setup_group(db, 5)
+        assert [await vote(db, person_id, voter_id, False) for voter_id in voters[:3]] == [200, 200, 200]
+        # Two members that voted leave: the three votes already exceed what the smaller group needs
+        await db.groups.update_one({"id": group_id}, {"$pull": {"members": {"user_id": {"$in": voters[1:3]}}}})
+        assert await vote(db, person_id, voters[0], True) == 409
+        assert await vote(db, person_id, voters[3], True) == 200
+        return person_id
+
+    person_id = run(scenario())
+    mission = run(AssignmentRepository(db).get_by_person_id(person_id))["mission"]
+    assert mission["status"] == MissionStatus.FAILED
+    assert (mission["like"], mission["dislike"], len(mission["voters"])) == (1, 3, 4)
+    run(assert_finalized_once(db, person_id, MissionStatus.FAILED))